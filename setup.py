@@ -10,8 +10,10 @@ setup(
         "chardet",
         "ipinfo",
         "keyring",
+        "numpy",
         "pandas",
         "pre-commit",
+        "pyarrow",
         "psutil",
         "pyinstaller",
         "PySide6",
@@ -0,0 +1,216 @@
+import itertools
+import logging
+import threading
+from typing import Dict, Optional, Tuple
+
+from PySide6.QtCore import QObject, QRunnable, Qt, QThreadPool, Signal, Slot
+
+logger = logging.getLogger("core")
+
+
+class CalculationCancelled(Exception):
+    """Raised inside a job's progress callback once the job has been cancelled."""
+
+
+class ProgressCoalescer(QObject):
+    """
+    Forwards progress from worker threads to the main window controller.
+
+    Workers only store the latest (percentage, message). One queued delivery is
+    scheduled per burst, so the GUI thread handles at most one progress event
+    per event loop iteration however often a job reports.
+    """
+
+    _delivery_requested = Signal()
+
+    def __init__(self):
+        super().__init__()
+        self.main_window_controller = None
+        self._lock = threading.Lock()
+        self._latest: Optional[Tuple[int, str]] = None
+        self._delivery_scheduled = False
+        self._delivery_requested.connect(self._deliver)
+
+    def set_controller(self, controller):
+        self.main_window_controller = controller
+
+    def report(self, percentage: int, message: str) -> None:
+        with self._lock:
+            self._latest = (percentage, message)
+            if self._delivery_scheduled:
+                return
+            self._delivery_scheduled = True
+        self._delivery_requested.emit()
+
+    @Slot()
+    def _deliver(self) -> None:
+        with self._lock:
+            latest, self._latest = self._latest, None
+            self._delivery_scheduled = False
+        if latest is not None and self.main_window_controller:
+            self.main_window_controller.update_progress(*latest)
+
+
+class CalculationJob(QRunnable):
+    """A single calculate_emissions call queued on the executor's thread pool."""
+
+    def __init__(self, executor: "CalculationExecutor", job_id: int, kwargs: dict):
+        super().__init__()
+        # The executor keeps a reference until the job finishes.
+        self.setAutoDelete(False)
+        self.executor = executor
+        self.job_id = job_id
+        self.kwargs = kwargs
+        self._cancelled = threading.Event()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def cancel(self) -> None:
+        self._cancelled.set()
+
+    def report_progress(self, percentage: int, message: str) -> None:
+        # 100 is reported after calculation_result was emitted, the job completed
+        if self.cancelled and percentage < 100:
+            raise CalculationCancelled()
+        self.executor.progress.report(percentage, message)
+
+    def run(self) -> None:
+        try:
+            if self.cancelled:
+                raise CalculationCancelled()
+            self.executor.calculation_model.calculate_emissions(
+                **self.kwargs, progress_callback=self.report_progress
+            )
+        except CalculationCancelled:
+            logger.info(f"CalculationJob.run: Job {self.job_id} cancelled")
+            self.executor.progress.report(0, "Calculation cancelled")
+        except Exception as e:
+            logger.error(f"CalculationJob.run: Job {self.job_id} failed: {str(e)}")
+            self.executor.progress.report(0, "Calculation failed")
+            self.executor.calculation_failed.emit(self.job_id, str(e))
+        finally:
+            self.executor._job_finished(self.job_id)
+
+
+class CalculationExecutor(QObject):
+    """
+    Runs calculationModel.calculate_emissions off the GUI thread.
+
+    Jobs run one at a time on a private thread pool so results are logged in the
+    order they were requested. At most max_queue_depth jobs are queued or running,
+    further submissions are rejected. Results are delivered through the
+    calculation model's calculation_result signal as before.
+    """
+
+    calculation_failed = Signal(int, str)  # job_id, error message
+    calculation_rejected = Signal(str)
+    # Emitted by shutdown once the running job has finished and delivered its
+    # result, with False if it was still running when shutdown stopped waiting
+    shut_down = Signal(bool)
+
+    def __init__(self, calculation_model, max_queue_depth: int = 4):
+        super().__init__()
+        self.calculation_model = calculation_model
+        self.max_queue_depth = max_queue_depth
+        self.main_window_controller = None
+        self.progress = ProgressCoalescer()
+        self.thread_pool = QThreadPool()
+        self.thread_pool.setMaxThreadCount(1)
+        self._lock = threading.Lock()
+        self._jobs: Dict[int, CalculationJob] = {}
+        self._job_ids = itertools.count(1)
+        self._accepting = True
+
+    def set_controller(self, controller):
+        self.main_window_controller = controller
+        self.progress.set_controller(controller)
+        self.__connect_signals()
+
+    def __connect_signals(self):
+        self.main_window_controller.application_closed.connect(self.shutdown)
+
+    @property
+    def pending_jobs(self) -> int:
+        with self._lock:
+            return len(self._jobs)
+
+    def deliver_results_to(self, slot) -> None:
+        """
+        Connects slot to calculation_result so it runs in the worker thread as the
+        job finishes. shutdown() then returns only after the running job's result
+        was delivered, instead of leaving it queued for the GUI thread's event loop.
+        slot must be thread safe.
+        """
+        self.calculation_model.calculation_result.connect(
+            slot, Qt.ConnectionType.DirectConnection
+        )
+
+    def submit(self, **kwargs) -> Optional[int]:
+        """
+        Queues a calculate_emissions call with the given keyword arguments.
+        :return: The job id, or None if the queue is full or the executor shut down.
+        """
+        with self._lock:
+            if not self._accepting:
+                reason = "Calculation executor is shut down"
+            elif len(self._jobs) >= self.max_queue_depth:
+                reason = f"{len(self._jobs)} calculations are already queued"
+            else:
+                reason = None
+                job = CalculationJob(self, next(self._job_ids), kwargs)
+                self._jobs[job.job_id] = job
+        if reason:
+            logger.warning(
+                f"CalculationExecutor.submit: Rejected calculation: {reason}"
+            )
+            self.calculation_rejected.emit(reason)
+            return None
+
+        logger.debug(f"CalculationExecutor.submit: Queued job {job.job_id}")
+        self.thread_pool.start(job)
+        return job.job_id
+
+    def cancel(self, job_id: int) -> bool:
+        """
+        Cancels a job. A queued job is removed before it starts, a running job stops
+        at its next progress report and does not deliver a result. A job that already
+        emitted its result completes as usual.
+        :return: False if the job already finished.
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is None:
+            return False
+        job.cancel()
+        if self.thread_pool.tryTake(job):
+            self._job_finished(job_id)
+        logger.debug(f"CalculationExecutor.cancel: Cancelled job {job_id}")
+        return True
+
+    def cancel_all(self) -> None:
+        with self._lock:
+            job_ids = list(self._jobs)
+        for job_id in job_ids:
+            self.cancel(job_id)
+
+    def _job_finished(self, job_id: int) -> None:
+        with self._lock:
+            self._jobs.pop(job_id, None)
+
+    def wait_for_done(self, timeout_ms: int = -1) -> bool:
+        return self.thread_pool.waitForDone(timeout_ms)
+
+    def shutdown(self, timeout_ms: int = 5000) -> None:
+        """Rejects new jobs, cancels queued ones and waits for the running job."""
+        with self._lock:
+            self._accepting = False
+        self.cancel_all()
+        finished = self.wait_for_done(timeout_ms)
+        if not finished:
+            logger.warning(
+                "CalculationExecutor.shutdown: Running calculation did not finish in time"
+            )
+        logger.debug("CalculationExecutor.shutdown: Executor shut down")
+        self.shut_down.emit(finished)
@@ -1,5 +1,8 @@
 import logging
+from dataclasses import dataclass, field
+from typing import Dict, Tuple
 
+import numpy as np
 from PySide6.QtCore import QObject, Signal
 
 from data.data_validator import DataValidator
@@ -10,6 +13,40 @@ from services.unit_conversions_service import UnitConversionsService
 
 logger = logging.getLogger("core")
 
+BASELINE_TEMPERATURES = {
+    "Celsius": 20.0,
+    "Fahrenheit": 68.0,
+    "Kelvin": 293.15,
+}
+
+# Lowest valid reading per scale, mirrors DataValidator.validate_temperature.
+ABSOLUTE_ZERO_TEMPERATURES = {
+    "Celsius": -273.15,
+    "Fahrenheit": -459.67,
+    "Kelvin": 0.0,
+}
+
+
+@dataclass
+class BatchEmissionsResult:
+    """
+    Result of calculationModel.calculate_emissions_batch.
+
+    emissions holds one value per input row in the requested calculation unit,
+    rows that failed validation are NaN, flagged False in valid and have their
+    reason stored in errors (keyed by row position).
+    """
+
+    user_id: np.ndarray
+    emissions: np.ndarray
+    valid: np.ndarray
+    calculation_unit: str
+    errors: Dict[int, str] = field(default_factory=dict)
+
+    @property
+    def invalid_rows(self) -> np.ndarray:
+        return np.flatnonzero(~self.valid)
+
 
 class calculationModel(QObject):
     calculation_completed = Signal()
@@ -36,6 +73,191 @@ class calculationModel(QObject):
     def __connect_signals(self):
         pass
 
+    @staticmethod
+    def _lookup(keys: np.ndarray, table: dict) -> np.ndarray:
+        """
+        Maps every key to its value in table, NaN where the key is unknown.
+        Each distinct key is only looked up once.
+        """
+        uniques, inverse = np.unique(keys.astype(str), return_inverse=True)
+        values = np.array([table.get(key, np.nan) for key in uniques], dtype=float)
+        return values[inverse.reshape(-1)]
+
+    @staticmethod
+    def _to_floats(values) -> Tuple[np.ndarray, Dict[int, object]]:
+        """
+        Converts values to floats one row at a time when the column is not all numbers,
+        so a single bad value does not fail the whole batch.
+
+        :return: The floats, NaN for blank or non-numeric values, and the non-numeric (not blank) values by row position.
+        """
+        try:
+            return np.asarray(values, dtype=float), {}
+        except (TypeError, ValueError):
+            pass
+        raw = np.asarray(values, dtype=object)
+        floats = np.full(len(raw), np.nan)
+        not_numeric = {}
+        for i, value in enumerate(raw):
+            try:
+                floats[i] = float(value)
+            except (TypeError, ValueError):
+                if value is not None and str(value).strip() != "":
+                    not_numeric[i] = value
+        return floats, not_numeric
+
+    @staticmethod
+    def _unit_factors(units: np.ndarray, converter) -> np.ndarray:
+        """
+        Returns the multiplier converter applies for each unit, NaN for units it does not support.
+        """
+        factors = {}
+        for unit in np.unique(units.astype(str)):
+            try:
+                factors[unit] = converter(1.0, unit)
+            except (KeyError, ValueError):
+                logger.debug(f"calculationModel: Unsupported unit {unit}")
+        return calculationModel._lookup(units, factors)
+
+    def calculate_emissions_batch(
+        self, data, calculation_unit="Kilograms"
+    ) -> BatchEmissionsResult:
+        """
+        Calculate the emissions of many readings in a single vectorized pass.
+
+        Parameters: data (mapping or pandas DataFrame): Columns user_id, fuel_type, fuel_unit, fuel_used and
+        farming_technique, plus the optional temperature and temperature_type columns. Rows whose temperature is NaN
+        or whose temperature_type is empty use the standard emissions factor. Calculation_unit (str): The unit every
+        result is converted to.
+
+        Returns:
+        BatchEmissionsResult: Emissions per row, with the reason for every invalid row instead of raising.
+        """
+        logger.info("calculationModel.calculate_emissions_batch: Starting batch")
+        if self.main_window_controller is not None:
+            self.main_window_controller.update_progress(
+                10, "Calculating batch emissions..."
+            )
+
+        user_id = np.asarray(data["user_id"])
+        fuel_type = np.asarray(data["fuel_type"], dtype=object)
+        fuel_unit = np.asarray(data["fuel_unit"], dtype=object)
+        farming_technique = np.asarray(data["farming_technique"], dtype=object)
+        fuel_used, non_numeric_fuel_used = self._to_floats(data["fuel_used"])
+        row_count = len(fuel_used)
+
+        # A blank temperature means no reading, one that is not a number is an invalid row.
+        if "temperature" in data:
+            temperature, non_numeric_temperature = self._to_floats(data["temperature"])
+        else:
+            temperature = np.full(row_count, np.nan)
+            non_numeric_temperature = {}
+        if "temperature_type" in data:
+            temperature_type = np.asarray(data["temperature_type"], dtype=object)
+        else:
+            temperature_type = np.full(row_count, "", dtype=object)
+
+        fuel_type_emissions_variable = self._lookup(
+            fuel_type, databasesModel.get_fuel_type_emissions_modifiers()
+        )
+        farming_technique_emissions_variable = self._lookup(
+            farming_technique,
+            databasesModel.get_farming_technique_emissions_modifiers(),
+        )
+        converted_fuel_amount = fuel_used * self._unit_factors(
+            fuel_unit, UnitConversionsService.convert_volume_to_volume
+        )
+
+        # Same temperature deviation formula as calculate_emissions,
+        # rows without temperature data get a deviation of zero.
+        has_temperature = ~np.isnan(temperature) & (temperature_type.astype(str) != "")
+        baseline_temperature = self._lookup(temperature_type, BASELINE_TEMPERATURES)
+        absolute_zero = self._lookup(temperature_type, ABSOLUTE_ZERO_TEMPERATURES)
+        with np.errstate(invalid="ignore"):
+            temp_deviation = np.where(
+                has_temperature,
+                (temperature - baseline_temperature) / baseline_temperature,
+                0.0,
+            )
+            adjusted_emissions_factor = fuel_type_emissions_variable * (
+                1 + temp_deviation**2
+            )
+            emissions = (
+                converted_fuel_amount
+                * adjusted_emissions_factor
+                * farming_technique_emissions_variable
+            )
+
+            # Checks run in order, a row keeps the first error it hits.
+            checks = (
+                (
+                    ~np.isfinite(fuel_used) | (fuel_used < 0),
+                    lambda i: f"{non_numeric_fuel_used.get(i, fuel_used[i])} is not a valid amount of fuel",
+                ),
+                (
+                    np.isin(np.arange(row_count), list(non_numeric_temperature)),
+                    lambda i: f"{non_numeric_temperature[i]} is not a valid temperature",
+                ),
+                (
+                    np.isnan(fuel_type_emissions_variable),
+                    lambda i: f"No emissions modifier found for fuel type: {fuel_type[i]}",
+                ),
+                (
+                    np.isnan(converted_fuel_amount),
+                    lambda i: f"Unsupported fuel unit: {fuel_unit[i]}",
+                ),
+                (
+                    np.isnan(farming_technique_emissions_variable),
+                    lambda i: f"No emissions modifier found for farming technique: {farming_technique[i]}",
+                ),
+                (
+                    has_temperature & np.isnan(baseline_temperature),
+                    lambda i: f"{temperature_type[i]} is not a valid temperature type",
+                ),
+                (
+                    has_temperature
+                    & (
+                        (temperature < absolute_zero)
+                        | ((temperature_type == "Kelvin") & (temperature <= 0))
+                    ),
+                    lambda i: f"{temperature[i]} is not a valid temperature",
+                ),
+                (
+                    ~(emissions >= 0),
+                    lambda i: "Invalid emissions data",
+                ),
+            )
+        valid = np.ones(row_count, dtype=bool)
+        errors = {}
+        for failed, message in checks:
+            for i in np.flatnonzero(failed & valid):
+                errors[int(i)] = message(i)
+            valid &= ~failed
+
+        emissions = np.where(valid, emissions, np.nan)
+        emissions = UnitConversionsService.convert_calculation_result_to_desired_unit(
+            emissions, calculation_unit
+        )
+
+        if errors:
+            logger.warning(
+                f"calculationModel.calculate_emissions_batch: {len(errors)} of {row_count} rows are invalid"
+            )
+        logger.info(
+            f"calculationModel.calculate_emissions_batch: Calculated {row_count} rows"
+        )
+        if self.main_window_controller is not None:
+            self.main_window_controller.update_progress(
+                100, "Batch calculation complete"
+            )
+        return BatchEmissionsResult(
+            user_id=user_id,
+            emissions=emissions,
+            valid=valid,
+            calculation_unit=calculation_unit,
+            errors=errors,
+        )
+
     def calculate_emissions(
         self,
         user_id: int,
@@ -46,6 +268,7 @@ class calculationModel(QObject):
         temperature_type=None,
         farming_technique=None,
         calculation_unit=None,
+        progress_callback=None,
     ):
         """
         Calculate the emissions based on the fuel type, fuel used, and optional temperature data.
@@ -53,6 +276,8 @@ class calculationModel(QObject):
         Parameters: user_id (str): The ID of the user. Fuel_type (str): The type of fuel used. Fuel_used (float): The
         amount of fuel used. Temperature (float, optional): The temperature at which the fuel is used. Defaults to None.
         Temperature_type (string, optional): The type of temperatures provided (Celsius, Fahrenheit, Kelvin). Defaults to None.
+        Progress_callback (callable, optional): Receives (percentage, message) progress updates instead of the
+        main window controller. CalculationExecutor uses it to coalesce updates and to cancel jobs.
 
         Returns:
         tuple: A tuple containing user_id, fuel_type, fuel_used, and calculated emissions.
@@ -60,15 +285,16 @@ class calculationModel(QObject):
         Raises:
         ValueError: If any of the inputs are invalid or if the calculated emissions data is invalid.
         """
+        report_progress = (
+            progress_callback or self.main_window_controller.update_progress
+        )
         # Validate temperature type and temperature values
-        self.main_window_controller.update_progress(10, "Validating input data...")
+        report_progress(10, "Validating input data...")
         if temperature_type is not None and temperature is not None:
             DataValidator.validate_temperature_type(temperature_type)
             DataValidator.validate_temperature(temperature, temperature_type)
 
-        self.main_window_controller.update_progress(
-            25, "Retrieving emissions factors..."
-        )
+        report_progress(25, "Retrieving emissions factors...")
         fuel_type_emissions_variable = databasesModel.get_fuel_type_emissions_modifier(
             fuel_type
         )
@@ -82,21 +308,13 @@ class calculationModel(QObject):
                 "emissions_modifier", farming_technique
             )
         )
-        self.main_window_controller.update_progress(
-            40, "Preparing calculation parameters..."
-        )
+        report_progress(40, "Preparing calculation parameters...")
 
         # * Check This ⬇️ if emission tests have failed
         if temperature is not None and temperature_type is not None:
             logger.info("Temperature data available, adjusting emissions factor")
-            baseline_temperatures = {
-                "Celsius": 20.0,
-                "Fahrenheit": 68.0,
-                "Kelvin": 293.15,
-            }
-            self.main_window_controller.update_progress(
-                50, "Applying temperature adjustments..."
-            )
+            baseline_temperatures = BASELINE_TEMPERATURES
+            report_progress(50, "Applying temperature adjustments...")
             baseline_temperature = (
                 baseline_temperatures.get(temperature_type, None)
                 if temperature_type
@@ -108,7 +326,7 @@ class calculationModel(QObject):
             adjusted_emissions_factor = fuel_type_emissions_variable * (
                 1 + temp_deviation**2
             )
-            self.main_window_controller.update_progress(65, "Calculating emissions...")
+            report_progress(65, "Calculating emissions...")
             emissions = (
                 converted_fuel_amount
                 * adjusted_emissions_factor
@@ -118,16 +336,14 @@ class calculationModel(QObject):
             if not DataValidator.validate_emissions_result(emissions):
                 raise ValueError("Invalid emissions data")
 
-            self.main_window_controller.update_progress(
-                80, "Converting to requested units..."
-            )
+            report_progress(80, "Converting to requested units...")
             emissions = (
                 UnitConversionsService.convert_calculation_result_to_desired_unit(
                     emissions, calculation_unit
                 )
             )
 
-            self.main_window_controller.update_progress(95, "Finalizing results...")
+            report_progress(95, "Finalizing results...")
             self.calculation_completed.emit()
             self.calculation_result.emit(
                 user_id,
@@ -140,14 +356,14 @@ class calculationModel(QObject):
                 farming_technique,
                 calculation_unit,
             )
-            self.main_window_controller.update_progress(100, "Calculation complete")
+            report_progress(100, "Calculation complete")
         else:
             logger.info(
                 "Temperature data not available, using standard emissions factor"
             )
-            self.main_window_controller.update_progress(60, "Calculating emissions...")
+            report_progress(60, "Calculating emissions...")
             emissions = (
-                fuel_used
+                converted_fuel_amount
                 * fuel_type_emissions_variable
                 * farming_technique_emissions_variable
             )
@@ -155,16 +371,14 @@ class calculationModel(QObject):
             if not DataValidator.validate_emissions_result(emissions):
                 raise ValueError("Invalid emissions data")
 
-            self.main_window_controller.update_progress(
-                80, "Converting to requested units..."
-            )
+            report_progress(80, "Converting to requested units...")
             emissions = (
                 UnitConversionsService.convert_calculation_result_to_desired_unit(
                     emissions, calculation_unit
                 )
             )
 
-            self.main_window_controller.update_progress(95, "Finalizing results...")
+            report_progress(95, "Finalizing results...")
             self.calculation_completed.emit()
             self.calculation_result.emit(
                 user_id,
@@ -177,4 +391,4 @@ class calculationModel(QObject):
                 farming_technique,
                 calculation_unit,
             )
-            self.main_window_controller.update_progress(100, "Calculation complete")
+            report_progress(100, "Calculation complete")
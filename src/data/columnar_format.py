@@ -0,0 +1,155 @@
+import logging
+from typing import Iterable, Iterator, List
+
+import pyarrow as pa
+import pyarrow.compute as pc
+
+logger = logging.getLogger("data")
+
+# Column order matches EXPORT_COLUMNS and the INSERT in ImportManager.insert_data.
+# Units and categories are dictionary encoded, pandas reads them as categoricals.
+EMISSIONS_SCHEMA = pa.schema(
+    [
+        ("user_id", pa.int64()),
+        ("fuel_type", pa.dictionary(pa.int32(), pa.string())),
+        ("fuel_used", pa.float64()),
+        ("fuel_unit", pa.dictionary(pa.int32(), pa.string())),
+        ("emissions", pa.float64()),
+        ("emissions_unit", pa.dictionary(pa.int32(), pa.string())),
+        ("temperature", pa.float64()),
+        ("temperature_unit", pa.dictionary(pa.int32(), pa.string())),
+        ("farming_technique", pa.dictionary(pa.int32(), pa.string())),
+        ("timestamp", pa.timestamp("s")),
+    ]
+)
+
+# Arrow IPC files allow a single dictionary per column for the whole file, so they
+# store the dictionary encoded columns as plain strings.
+IPC_SCHEMA = pa.schema(
+    [
+        (
+            pa.field(field.name, field.type.value_type)
+            if pa.types.is_dictionary(field.type)
+            else field
+        )
+        for field in EMISSIONS_SCHEMA
+    ]
+)
+
+# Columns that may be missing from an imported file, they are imported as NULL.
+OPTIONAL_COLUMNS = frozenset({"fuel_unit", "temperature_unit"})
+
+COMPRESSION = "zstd"
+
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+def _timestamps_to_arrow(values: List) -> pa.Array:
+    """
+    Parses timestamps in TIMESTAMP_FORMAT or as dates.
+    :raises ValueError: If a timestamp cannot be parsed, instead of writing a null
+    that could not be imported again.
+    """
+    strings = pa.array(values, type=pa.string())
+    try:
+        return pc.cast(strings, pa.timestamp("s"))
+    except pa.ArrowInvalid:
+        # Imported rows can carry timestamps without a time
+        parsed = pc.coalesce(
+            pc.strptime(strings, TIMESTAMP_FORMAT, "s", error_is_null=True),
+            pc.strptime(strings, "%Y-%m-%d", "s", error_is_null=True),
+        )
+    unparsed = pc.filter(strings, pc.and_(parsed.is_null(), strings.is_valid()))
+    if len(unparsed):
+        logger.error(
+            f"_timestamps_to_arrow: {len(unparsed)} timestamps could not be parsed"
+        )
+        raise ValueError(
+            f"{len(unparsed)} timestamps could not be parsed, e.g. "
+            f"{unparsed[0].as_py()!r}, expected {TIMESTAMP_FORMAT}"
+        )
+    return parsed
+
+
+def rows_to_record_batch(rows: List[tuple]) -> pa.RecordBatch:
+    """Converts rows in EXPORT_COLUMNS order into a typed record batch."""
+    columns = list(zip(*rows)) if rows else [[] for _ in EMISSIONS_SCHEMA]
+    arrays = []
+    for field, values in zip(EMISSIONS_SCHEMA, columns):
+        if field.name == "timestamp":
+            arrays.append(_timestamps_to_arrow(values))
+        elif pa.types.is_dictionary(field.type):
+            arrays.append(pa.array(values, type=pa.string()).dictionary_encode())
+        else:
+            arrays.append(pa.array(values, type=field.type))
+    return pa.RecordBatch.from_arrays(arrays, schema=EMISSIONS_SCHEMA)
+
+
+def iter_record_batches(
+    rows: Iterable[tuple], batch_size: int
+) -> Iterator[pa.RecordBatch]:
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == batch_size:
+            yield rows_to_record_batch(batch)
+            batch = []
+    if batch:
+        yield rows_to_record_batch(batch)
+
+
+def decode_dictionaries(batch: pa.RecordBatch) -> pa.RecordBatch:
+    """Converts a batch from EMISSIONS_SCHEMA to IPC_SCHEMA."""
+    return pa.RecordBatch.from_arrays(
+        [column.cast(field.type) for column, field in zip(batch.columns, IPC_SCHEMA)],
+        schema=IPC_SCHEMA,
+    )
+
+
+def record_batch_to_rows(batch: pa.RecordBatch) -> List[tuple]:
+    """
+    Converts an imported record batch into rows for ImportManager.insert_data.
+    Columns are matched by name, so any column order and extra columns are accepted.
+    """
+    missing_columns = (
+        set(EMISSIONS_SCHEMA.names) - OPTIONAL_COLUMNS - set(batch.schema.names)
+    )
+    if missing_columns:
+        raise ValueError(f"Missing required keys: {missing_columns}")
+
+    columns = []
+    for field in EMISSIONS_SCHEMA:
+        if field.name not in batch.schema.names:
+            columns.append([None] * batch.num_rows)
+            continue
+        column = batch.column(field.name)
+        if field.name not in OPTIONAL_COLUMNS and column.null_count:
+            raise ValueError(f"Missing value for key: {field.name}")
+        if field.name == "timestamp" and pa.types.is_timestamp(column.type):
+            seconds = column.cast(pa.timestamp("s", column.type.tz), safe=False)
+            column = pc.strftime(seconds, format=TIMESTAMP_FORMAT)
+        elif field.name == "timestamp":
+            column = column.cast(pa.string())
+        elif pa.types.is_dictionary(field.type):
+            column = column.cast(pa.string())
+        else:
+            column = column.cast(field.type)
+        columns.append(column.to_pylist())
+    return list(zip(*columns))
+
+
+def iter_rows(
+    batches: Iterable[pa.RecordBatch], chunk_size: int, skip: int = 0
+) -> Iterator[tuple]:
+    """
+    Yields the rows of batches, converting at most chunk_size rows at a time.
+    :param skip: Rows at the start that are left out without being converted.
+    """
+    for batch in batches:
+        if skip >= batch.num_rows:
+            skip -= batch.num_rows
+            continue
+        batch = batch.slice(skip)
+        skip = 0
+        for offset in range(0, batch.num_rows, chunk_size):
+            yield from record_batch_to_rows(batch.slice(offset, chunk_size))
@@ -0,0 +1,169 @@
+import itertools
+import logging
+import sqlite3
+import threading
+import weakref
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Tuple
+
+logger = logging.getLogger("data")
+
+
+class _ThreadConnections(dict):
+    """
+    A thread's connections by db_path, kept in a threading.local. Python drops it
+    when the thread state goes away, which for threads started by Qt's thread pool
+    can happen after every job, and its finalizer then closes the connections.
+    """
+
+    def __init__(self, owner: int):
+        super().__init__()
+        self.owner = owner
+
+
+class ConnectionPool:
+    """
+    Thread-aware pool of SQLite connections.
+
+    Every thread gets its own connection per database file, opened once and reused
+    for the lifetime of the thread, and closed when the thread ends. Connections are configured for WAL journaling so
+    readers (the visualization tab, exports) never block on a writer (log_transaction,
+    imports) and the other way around.
+    """
+
+    def __init__(
+        self,
+        busy_timeout_ms: int = 5000,
+        mmap_size: int = 256 * 1024 * 1024,
+        journal_mode: str = "WAL",
+        synchronous: str = "NORMAL",
+    ):
+        self.busy_timeout_ms = busy_timeout_ms
+        self.mmap_size = mmap_size
+        self.journal_mode = journal_mode
+        self.synchronous = synchronous
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        # Bumped by close_database, a thread closes its connection from an older
+        # generation the next time it asks for one.
+        self._generations: Dict[str, int] = {}
+        # (db_path, connection, owner) where owner identifies the opening thread
+        self._connections: List[Tuple[str, sqlite3.Connection, int]] = []
+        self._owners = itertools.count()
+
+    def _configure(self, conn: sqlite3.Connection) -> None:
+        conn.execute(f"PRAGMA busy_timeout = {int(self.busy_timeout_ms)}")
+        conn.execute(f"PRAGMA journal_mode = {self.journal_mode}")
+        conn.execute(f"PRAGMA synchronous = {self.synchronous}")
+        conn.execute(f"PRAGMA mmap_size = {int(self.mmap_size)}")
+
+    def get_connection(self, db_path: str) -> sqlite3.Connection:
+        """
+        Returns the calling thread's connection to db_path, opening it on first use.
+        The connection is owned by the pool, callers must not close it.
+        """
+        connections = getattr(self._local, "connections", None)
+        if connections is None:
+            connections = self._local.connections = _ThreadConnections(
+                next(self._owners)
+            )
+            weakref.finalize(connections, self._release_owner, connections.owner)
+
+        generation = self._generations.get(db_path, 0)
+        cached = connections.get(db_path)
+        if cached is not None:
+            if cached[0] == generation:
+                return cached[1]
+            self._close(cached[1])
+
+        logger.debug(
+            f"ConnectionPool.get_connection: Opening connection to {db_path} "
+            f"for thread {threading.get_ident()}"
+        )
+        # check_same_thread is disabled so finished threads' connections can be
+        # closed from another thread, a connection is only used by its own thread.
+        conn = sqlite3.connect(
+            db_path,
+            timeout=self.busy_timeout_ms / 1000,
+            check_same_thread=False,
+        )
+        try:
+            self._configure(conn)
+        except sqlite3.Error:
+            conn.close()
+            raise
+        with self._lock:
+            self._connections.append((db_path, conn, connections.owner))
+        connections[db_path] = (generation, conn)
+        return conn
+
+    @contextmanager
+    def connection(self, db_path: str) -> Iterator[sqlite3.Connection]:
+        """
+        Yields the calling thread's connection to db_path inside a transaction that is
+        committed when the block exits normally and rolled back if it raises.
+        """
+        conn = self.get_connection(db_path)
+        with conn:
+            yield conn
+
+    def _close(self, conn: sqlite3.Connection) -> None:
+        with self._lock:
+            self._connections = [
+                entry for entry in self._connections if entry[1] is not conn
+            ]
+        conn.close()
+
+    def _release_owner(self, owner: int) -> None:
+        """Closes the connections of a thread whose connections holder was dropped."""
+        with self._lock:
+            released = [entry for entry in self._connections if entry[2] == owner]
+            self._connections = [
+                entry for entry in self._connections if entry[2] != owner
+            ]
+        for _, conn, _ in released:
+            conn.close()
+
+    def close_database(self, db_path: str) -> None:
+        """
+        Closes the calling thread's connection to db_path. Connections of other
+        threads may be in the middle of a query, they are marked stale and closed by
+        their own thread on its next get_connection, or when that thread ends.
+        """
+        connections = getattr(self._local, "connections", None)
+        current_owner = connections.owner if connections is not None else None
+        with self._lock:
+            self._generations[db_path] = self._generations.get(db_path, 0) + 1
+            remaining = []
+            for path, conn, owner in self._connections:
+                if path == db_path and owner == current_owner:
+                    conn.close()
+                else:
+                    remaining.append((path, conn, owner))
+            self._connections = remaining
+        logger.debug(f"ConnectionPool.close_database: Closed connections to {db_path}")
+
+    def close_all(self) -> None:
+        """
+        Closes the calling thread's pooled connections, used when the application
+        shuts down. Like close_database, connections of other threads, such as a
+        calculation still running after the executor stopped waiting, are marked
+        stale instead and closed by their own thread or when that thread ends.
+        """
+        connections = getattr(self._local, "connections", None)
+        current_owner = connections.owner if connections is not None else None
+        with self._lock:
+            remaining = []
+            for path, conn, owner in self._connections:
+                self._generations[path] = self._generations.get(path, 0) + 1
+                if owner == current_owner:
+                    conn.close()
+                else:
+                    remaining.append((path, conn, owner))
+            self._connections = remaining
+        logger.debug(
+            f"ConnectionPool.close_all: Closed this thread's connections, {len(remaining)} of other threads marked stale"
+        )
+
+
+connection_pool = ConnectionPool()
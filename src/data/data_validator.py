@@ -1,7 +1,7 @@
 import logging
 import os
-import sqlite3
 
+from data.connection_pool import connection_pool
 from data.database_model import databases_folder
 
 # validates user input and database data
@@ -13,14 +13,16 @@ class DataValidator:
     @staticmethod
     def validate_fuel_type(fuel_type: str) -> bool:
         logger.info("DataValidator.validate_fuel_type: Validating fuel type")
-        db_path = os.path.join(databases_folder, "fuel_type_conversions.db")
+        db_path = os.path.join(databases_folder, "emissions_variables.db")
 
-        with sqlite3.connect(db_path) as conn:
+        with connection_pool.connection(db_path) as conn:
             cursor = conn.cursor()
-            cursor.execute("SELECT fuel_type FROM fuel_types")
-            fuel_types = cursor.fetchone()
+            cursor.execute(
+                "SELECT fuel_type FROM fuel_types WHERE fuel_type = ?", (fuel_type,)
+            )
+            row = cursor.fetchone()
             logger.info("DataValidator.validate_fuel_type: Fuel type database accessed")
-            if fuel_type in fuel_types:
+            if row is not None:
                 logger.info(
                     f"DataValidator.validate_fuel_type: Checking fuel type '{fuel_type}'"
                 )
@@ -1,3 +1,4 @@
+import hashlib
 import json
 import logging
 import os
@@ -6,10 +7,19 @@ import sys
 
 from PySide6.QtCore import QObject, Signal
 
+from data.connection_pool import connection_pool
+from data.emissions_factor_registry import EmissionsFactorRegistry
+from data.emissions_rollups import KNOWN_EMISSIONS_UNITS, in_kilograms, range_total
+from data.schema_migrations import migrate_emissions_database
+from data.write_behind_buffer import WriteBehindBuffer
 from utils.gui_utilities import connect_threaded
+from utils.startup_tracer import startup_tracer
 
 logger = logging.getLogger("data")
 
+# Rows keep the unit they were calculated in, chart series are read in kilograms
+EMISSIONS_IN_KILOGRAMS = in_kilograms("emissions")
+
 
 def determine_application_path():
     if getattr(sys, "frozen", False) and hasattr(sys, "_MEIPASS"):
@@ -37,14 +47,24 @@ def determine_application_path():
 
 application_path, databases_folder = determine_application_path()
 
+# Process-wide cache of emissions_variables.db, invalidated whenever it is rebuilt.
+emissions_factor_registry = EmissionsFactorRegistry(
+    os.path.join(databases_folder, "emissions_variables.db")
+)
+
 
 class databasesModel(QObject):
     databases_initialized = Signal()
-    calculation_logged = Signal()
+    calculation_logged = Signal(list)  # EmissionsSpans of the logged rows
 
     def __init__(self):
         super().__init__()
         self.main_window_controller = None
+        # Calculations are written in batches, see log_transaction.
+        self.emissions_write_buffer = WriteBehindBuffer(
+            os.path.join(databases_folder, "emissions.db")
+        )
+        self.emissions_write_buffer.flushed.connect(self.handle_emissions_flushed)
         logger.debug("databasesModel.__init__: Initialized databases model")
 
     def set_controller(self, controller):
@@ -61,6 +81,36 @@ class databasesModel(QObject):
             "initialization",
             self.database_initialization,
         )
+        calculation_executor = self.main_window_controller.model.calculation_executor
+        calculation_executor.shut_down.connect(
+            self.handle_calculation_executor_shut_down
+        )
+        connect_threaded(
+            self.main_window_controller.model.settings_model,
+            "emissions_modifiers_path_changed",
+            self.handle_emissions_modifiers_path_changed,
+        )
+
+    def handle_calculation_executor_shut_down(self, finished: bool) -> None:
+        """
+        Writes the buffered calculations once the executor has delivered the running
+        calculation's result, then closes the pooled connections. A calculation still
+        running keeps its connection until its thread ends.
+        :param finished: False if a calculation was still running. Its result
+        arrives after the buffer was closed and is dropped.
+        """
+        if not finished:
+            logger.warning(
+                "databasesModel.handle_calculation_executor_shut_down: A calculation is still running, its result will not be saved"
+            )
+        self.emissions_write_buffer.flush_final()
+        connection_pool.close_all()
+
+    def handle_emissions_modifiers_path_changed(self, json_path):
+        logger.info(
+            f"databasesModel.handle_emissions_modifiers_path_changed: Rebuilding emissions variables from {json_path}"
+        )
+        self.initialize_emissions_variables_database()
 
     @staticmethod
     def setup_databases_folder():
@@ -81,18 +131,11 @@ class databasesModel(QObject):
         )
         try:
             db_path = os.path.join(databases_folder, "emissions.db")
-            conn = sqlite3.connect(db_path)
-            cursor = conn.cursor()
-            cursor.execute(
-                """CREATE TABLE IF NOT EXISTS emissions
-                (user_id INTEGER, fuel_type TEXT, fuel_used REAL,
-                emissions REAL, emissions_unit TEXT, temperature REAL, farming_technique TEXT, timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY(user_id) REFERENCES users(username))"""
-            )
-            conn.commit()
-            conn.close()
+            conn = connection_pool.get_connection(db_path)
+            # Creates the table on a new database and upgrades older schemas in place
+            schema_version = migrate_emissions_database(conn)
             logger.info(
-                "databasesModel.initialize_emissions_database: Emissions database created successfully"
+                f"databasesModel.initialize_emissions_database: Emissions database ready at schema version {schema_version}"
             )
             return 1
         except sqlite3.Error as e:
@@ -111,14 +154,13 @@ class databasesModel(QObject):
         )
         try:
             db_path = os.path.join(databases_folder, "user_data.db")
-            conn = sqlite3.connect(db_path)
+            conn = connection_pool.get_connection(db_path)
             cursor = conn.cursor()
             cursor.execute(
                 """CREATE TABLE IF NOT EXISTS users
                 (username TEXT PRIMARY KEY, password TEXT)"""
             )
             conn.commit()
-            conn.close()
             logger.info(
                 "databasesModel.initialize_user_data_database: User data database created successfully"
             )
@@ -213,7 +255,7 @@ class databasesModel(QObject):
             f"databasesModel.create_emissions_variables_database: Creating database at {db_path}"
         )
         try:
-            conn = sqlite3.connect(db_path)
+            conn = connection_pool.get_connection(db_path)
             cursor = conn.cursor()
 
             # Create fuel types table
@@ -228,6 +270,12 @@ class databasesModel(QObject):
                 farming_techniques (technique TEXT PRIMARY KEY, emissions_modifier REAL, description TEXT)"""
             )
 
+            # Fingerprint of the factor file the tables were filled from
+            cursor.execute(
+                """CREATE TABLE IF NOT EXISTS
+                factor_source (key TEXT PRIMARY KEY, value TEXT)"""
+            )
+
             conn.commit()
             logger.info(
                 "databasesModel.create_emissions_variables_database: Tables created successfully"
@@ -240,57 +288,71 @@ class databasesModel(QObject):
             return None
 
     @staticmethod
-    def insert_fuel_data(conn, fuel_data):
-        """Insert fuel data into the fuel_types table"""
+    def insert_fuel_data(conn, fuel_data) -> bool:
+        """
+        Insert fuel data into the fuel_types table
+        :return: True if every fuel type was inserted.
+        """
         logger.info(
             f"databasesModel.insert_fuel_data: Inserting {len(fuel_data)} fuel types"
         )
         try:
-            cursor = conn.cursor()
-            for fuel in fuel_data:
-                cursor.execute(
-                    "INSERT OR REPLACE INTO fuel_types VALUES (?, ?)",
-                    (fuel["fuel_type"], fuel["emissions_modifier"]),
-                )
+            conn.executemany(
+                "INSERT OR REPLACE INTO fuel_types VALUES (?, ?)",
+                [(fuel["fuel_type"], fuel["emissions_modifier"]) for fuel in fuel_data],
+            )
             conn.commit()
             logger.debug(
                 "databasesModel.insert_fuel_data: Fuel data inserted successfully"
             )
+            return True
         except Exception as e:
             logger.error(
                 f"databasesModel.insert_fuel_data: Error inserting fuel data: {e}"
             )
+            return False
 
     @staticmethod
-    def insert_farming_techniques(conn, farming_techniques_data):
-        """Insert farming techniques into the database"""
+    def insert_farming_techniques(conn, farming_techniques_data) -> bool:
+        """
+        Insert farming techniques into the database
+        :return: True if every farming technique was inserted.
+        """
         logger.info(
             f"databasesModel.insert_farming_techniques: Inserting {len(farming_techniques_data)} farming techniques"
         )
         try:
-            cursor = conn.cursor()
-            for technique in farming_techniques_data:
-                # Get the description if available, otherwise use empty string
-                description = technique.get("description", "")
-                cursor.execute(
-                    "INSERT OR REPLACE INTO farming_techniques VALUES (?, ?, ?)",
+            # Get the description if available, otherwise use empty string
+            conn.executemany(
+                "INSERT OR REPLACE INTO farming_techniques VALUES (?, ?, ?)",
+                [
                     (
                         technique["technique"],
                         technique["emissions_modifier"],
-                        description,
-                    ),
-                )
+                        technique.get("description", ""),
+                    )
+                    for technique in farming_techniques_data
+                ],
+            )
             conn.commit()
             logger.info(
                 "databasesModel.insert_farming_techniques: Farming techniques inserted successfully"
             )
+            return True
         except Exception as e:
             logger.error(
                 f"databasesModel.insert_farming_techniques: Error inserting farming techniques: {e}"
             )
+            return False
 
     def initialize_emissions_variables_database(self):
-        """Initialize the emissions' variables database with fuel types and farming techniques"""
+        """
+        Builds the emissions' variables database with fuel types and farming
+        techniques from the factor file, unless it was built from the same content.
+        A new database is built next to the old one and copied over it with
+        EmissionsFactorRegistry.replace_database, through SQLite's backup API under
+        the registry lock, so open connections see the old or the new tables.
+        """
         logger.info(
             "databasesModel.initialize_emissions_variables_database: Initializing emissions variables database"
         )
@@ -298,13 +360,6 @@ class databasesModel(QObject):
             self.setup_databases_folder()
             db_path = os.path.join(databases_folder, "emissions_variables.db")
 
-            # Remove existing database if it exists
-            if os.path.exists(db_path):
-                os.remove(db_path)
-                logger.debug(
-                    f"databasesModel.initialize_emissions_variables_database: Removed existing database at {db_path}"
-                )
-
             # Load configuration data
             json_path = self.load_settings()
             if not json_path:
@@ -316,6 +371,14 @@ class databasesModel(QObject):
                 f"databasesModel.initialize_emissions_variables_database: Loaded json path: {json_path}"
             )
 
+            stored_fingerprint = self.read_factor_fingerprint(db_path)
+            fingerprint = self.factor_file_fingerprint(json_path, stored_fingerprint)
+            if fingerprint["sha256"] == stored_fingerprint.get("sha256"):
+                logger.info(
+                    "databasesModel.initialize_emissions_variables_database: Factor file unchanged, keeping existing database"
+                )
+                return 1
+
             data = self.load_emissions_variables(json_path)
             if not data:
                 logger.error(
@@ -326,34 +389,48 @@ class databasesModel(QObject):
                 "databasesModel.initialize_emissions_variables_database: Loaded emissions data successfully"
             )
 
+            # Build into a temporary file so the current database stays usable
+            build_path = f"{db_path}.tmp"
+            self.remove_database_files(build_path)
+
             # Create a database with both tables
-            conn = self.create_emissions_variables_database(db_path)
+            conn = self.create_emissions_variables_database(build_path)
             if not conn:
                 logger.error(
                     "databasesModel.initialize_emissions_variables_database: Failed to create database"
                 )
                 return 0
 
-            # Initialize fuel types
-            fuel_data = data.get("fuel_types", [])
-            self.insert_fuel_data(conn, fuel_data)
+            # Initialize fuel types and farming techniques in the same database.
+            # A partial build is discarded, the current database stays and the
+            # factor file is read again on the next launch.
+            if not (
+                self.insert_fuel_data(conn, data.get("fuel_types", []))
+                and self.insert_farming_techniques(
+                    conn, data.get("farming_techniques", [])
+                )
+            ):
+                self.remove_database_files(build_path)
+                logger.error(
+                    "databasesModel.initialize_emissions_variables_database: Invalid factor file, keeping existing database"
+                )
+                return 0
             logger.info(
-                "databasesModel.initialize_emissions_variables_database: Fuel type data initialized successfully"
+                "databasesModel.initialize_emissions_variables_database: Fuel types and farming techniques initialized successfully"
             )
 
-            # Initialize farming techniques in the same database
-            farming_techniques_data = data.get("farming_techniques", [])
-            self.insert_farming_techniques(conn, farming_techniques_data)
-            logger.info(
-                "databasesModel.initialize_emissions_variables_database: Farming techniques initialized successfully"
-            )
+            with conn:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO factor_source VALUES (?, ?)",
+                    fingerprint.items(),
+                )
+            # Closing the last connection checkpoints the WAL into the file
+            connection_pool.close_database(build_path)
 
-            # Close connection
-            conn.close()
-            logger.debug(
-                "databasesModel.initialize_emissions_variables_database: Database connection closed"
+            emissions_factor_registry.replace_database(build_path)
+            logger.info(
+                f"databasesModel.initialize_emissions_variables_database: Rebuilt {db_path} from {json_path}"
             )
-
             return 1
 
         except Exception as e:
@@ -362,122 +439,108 @@ class databasesModel(QObject):
             )
             return 0
 
+    @staticmethod
+    def remove_database_files(db_path) -> None:
+        """Closes a database and deletes it with its WAL and shared memory files."""
+        connection_pool.close_database(db_path)
+        for path in (db_path, f"{db_path}-wal", f"{db_path}-shm"):
+            if os.path.exists(path):
+                os.remove(path)
+
+    @staticmethod
+    def read_factor_fingerprint(db_path) -> dict:
+        """
+        The fingerprint of the factor file the database was built from, empty if
+        the database is missing or was built before fingerprints were stored.
+        """
+        if not os.path.exists(db_path):
+            return {}
+        try:
+            with connection_pool.connection(db_path) as conn:
+                return dict(conn.execute("SELECT key, value FROM factor_source"))
+        except sqlite3.Error as e:
+            logger.debug(
+                f"databasesModel.read_factor_fingerprint: No fingerprint in {db_path}: {e}"
+            )
+            return {}
+
+    @staticmethod
+    def factor_file_fingerprint(json_path, stored_fingerprint=None) -> dict:
+        """
+        Size, modification time and SHA-256 of the factor file. The file is only
+        hashed when its size or modification time differ from stored_fingerprint.
+        """
+        stat = os.stat(json_path)
+        fingerprint = {"size": str(stat.st_size), "mtime_ns": str(stat.st_mtime_ns)}
+        stored_fingerprint = stored_fingerprint or {}
+        if "sha256" in stored_fingerprint and all(
+            stored_fingerprint.get(key) == value for key, value in fingerprint.items()
+        ):
+            fingerprint["sha256"] = stored_fingerprint["sha256"]
+        else:
+            with open(json_path, "rb") as file:
+                fingerprint["sha256"] = hashlib.sha256(file.read()).hexdigest()
+        return fingerprint
+
     @staticmethod
     def get_fuel_types():
-        """Get a list of all fuel types from the database"""
+        """Get a list of all fuel types from the factor registry"""
         logger.info("databasesModel.get_fuel_types: Retrieving all fuel types")
-        db_path = os.path.join(databases_folder, "emissions_variables.db")
-        conn = sqlite3.connect(db_path)
-        cursor = conn.cursor()
-        cursor.execute("SELECT fuel_type FROM fuel_types")
-        fuel_types = cursor.fetchall()
-        conn.close()
+        fuel_types = emissions_factor_registry.fuel_types()
         logger.debug(
             f"databasesModel.get_fuel_types: Retrieved {len(fuel_types)} fuel types"
         )
-        return [fuel_type[0] for fuel_type in fuel_types]
+        return fuel_types
 
     @staticmethod
     def get_farming_techniques():
-        """Get a list of all farming techniques from the database"""
+        """Get a list of all farming techniques from the factor registry"""
         logger.info(
             "databasesModel.get_farming_techniques: Retrieving all farming techniques"
         )
-        db_path = os.path.join(databases_folder, "emissions_variables.db")
-        try:
-            conn = sqlite3.connect(db_path)
-            cursor = conn.cursor()
-            cursor.execute("SELECT technique FROM farming_techniques")
-            techniques = cursor.fetchall()
-            conn.close()
-            logger.debug(
-                f"databasesModel.get_farming_techniques: Retrieved {len(techniques)} techniques"
-            )
-            return [technique[0] for technique in techniques]
-        except sqlite3.Error as e:
-            logger.error(
-                f"databasesModel.get_farming_techniques: Error getting farming techniques: {e}"
-            )
-            return []
+        techniques = emissions_factor_registry.farming_techniques()
+        logger.debug(
+            f"databasesModel.get_farming_techniques: Retrieved {len(techniques)} techniques"
+        )
+        return techniques
 
     @staticmethod
     def get_farming_technique_info(info, technique=None):
         """
         Get information about farming techniques
         """
-        logger.info(
+        logger.debug(
             f"databasesModel.get_farming_technique_info: Retrieving info '{info}' for technique: {technique if technique else 'all'}"
         )
-        db_path = os.path.join(databases_folder, "emissions_variables.db")
-        try:
-            conn = sqlite3.connect(db_path)
-            cursor = conn.cursor()
+        technique_information = emissions_factor_registry.get_farming_technique(
+            technique
+        )
+        if technique_information is None:
+            logger.debug(
+                f"databasesModel.get_farming_technique_info: No information found for technique: {technique}"
+            )
+            return None
+        return technique_information.get(info, None)
 
-            if technique:
-                cursor.execute(
-                    "SELECT technique, emissions_modifier, description FROM farming_techniques WHERE technique = ?",
-                    (technique,),
-                )
-                row = cursor.fetchone()
-                conn.close()
-
-                if row:
-                    technique_information = {
-                        "technique": row[0],
-                        "emissions_modifier": row[1],
-                        "description": row[2],
-                    }
-                    return technique_information.get(info, None)
-                logger.debug(
-                    f"databasesModel.get_farming_technique_info: No information found for technique: {technique}"
-                )
-                return None
-            else:
-                cursor.execute(
-                    "SELECT technique, emissions_modifier, description FROM farming_techniques"
-                )
-                rows = cursor.fetchall()
-                conn.close()
-
-                technique_information = [
-                    {
-                        "technique": row[0],
-                        "emissions_modifier": row[1],
-                        "description": row[2],
-                    }
-                    for row in rows
-                ]
+    @staticmethod
+    def get_fuel_type_emissions_modifiers() -> dict:
+        """Get the emissions factor of every fuel type, keyed by fuel type"""
+        return emissions_factor_registry.fuel_type_emissions_modifiers()
 
-                logger.debug(
-                    f"databasesModel.get_farming_technique_info: Retrieved information for {len(rows)} techniques"
-                )
-                return technique_information[0].get(info, None)
-        except sqlite3.Error as e:
-            logger.error(
-                f"databasesModel.get_farming_technique_info: Error getting farming technique info: {e}"
-            )
-            return [] if technique is None else None
+    @staticmethod
+    def get_farming_technique_emissions_modifiers() -> dict:
+        """Get the emissions modifier of every farming technique, keyed by technique"""
+        return emissions_factor_registry.farming_technique_emissions_modifiers()
 
     @staticmethod
     def get_fuel_type_emissions_modifier(fuel_type: str) -> int:
         """Get the emissions factor for a specific fuel type"""
-        logger.info(
-            f"databasesModel.get_fuel_type_emissions_modifier: Getting modifier for {fuel_type}"
-        )
-        db_path = os.path.join(databases_folder, "emissions_variables.db")
-        conn = sqlite3.connect(db_path)
-        cursor = conn.cursor()
-        cursor.execute(
-            "SELECT emissions_modifier FROM fuel_types WHERE fuel_type = ?",
-            (fuel_type,),
-        )
-        row = cursor.fetchone()
-        conn.close()
-        if row:
+        modifier = emissions_factor_registry.get_fuel_type_emissions_modifier(fuel_type)
+        if modifier is not None:
             logger.debug(
-                f"databasesModel.get_fuel_type_emissions_modifier: Found modifier: {row[0]}"
+                f"databasesModel.get_fuel_type_emissions_modifier: Found modifier for {fuel_type}: {modifier}"
             )
-            return row[0]
+            return modifier
         else:
             logger.error(
                 f"databasesModel.get_fuel_type_emissions_modifier: No emissions modifier found for {fuel_type}"
@@ -496,44 +559,35 @@ class databasesModel(QObject):
         farming_technique=None,
         emissions_unit=None,
     ):
-        try:
-            logger.info("databasesModel.log_transaction: Logging new calculation")
-            logger.info(
-                f"databasesModel.log_transaction: User ID: {user_id}, Fuel Type: {fuel_type}, Fuel Used: {fuel_used} {fuel_unit}, "
-                f"Emissions: {emissions} {emissions_unit}, Temperature: {temperature}{temperature_type[:1]}°, Farming Technique: {farming_technique}"
+        """
+        Queues a calculation for the emissions table. Rows are written in batches
+        by emissions_write_buffer and calculation_logged is emitted once per batch
+        with the EmissionsSpan of every user, fuel type and unit it added rows to.
+        """
+        logger.info("databasesModel.log_transaction: Logging new calculation")
+        logger.info(
+            f"databasesModel.log_transaction: User ID: {user_id}, Fuel Type: {fuel_type}, Fuel Used: {fuel_used} {fuel_unit}, "
+            f"Emissions: {emissions} {emissions_unit}, Temperature: {temperature}{temperature_type[:1]}°, Farming Technique: {farming_technique}"
+        )
+        self.emissions_write_buffer.append(
+            (
+                user_id,
+                fuel_type,
+                fuel_used,
+                fuel_unit,
+                emissions,
+                emissions_unit,
+                temperature,
+                temperature_type,
+                farming_technique,
             )
-            db_path = os.path.join(databases_folder, "emissions.db")
+        )
 
-            # connect to the database
-            conn = sqlite3.connect(db_path)
-            cursor = conn.cursor()
-            cursor.execute(
-                """INSERT INTO emissions
-                (user_id, fuel_type, fuel_used, emissions, emissions_unit, temperature, farming_technique)
-                VALUES (?, ?, ?, ?, ?, ?, ?)""",
-                (
-                    user_id,
-                    fuel_type,
-                    f"{fuel_used} {fuel_unit}",
-                    f"{emissions:.2f}",
-                    f"{emissions_unit}",
-                    f"{temperature}°{temperature_type[:1]}",
-                    farming_technique,
-                ),
-            )
-            # Commit the transaction
-            conn.commit()
-            logger.debug(
-                "databasesModel.log_transaction: Transaction committed to database"
-            )
-            logger.debug("databasesModel.log_transaction: Database connection closed")
-            conn.close()
-            self.calculation_logged.emit()
-        except sqlite3.Error as e:
-            logger.error(f"databasesModel.log_transaction: Database error: {e}")
-            logger.error(e)
-        except ValueError as e:
-            logger.error(f"databasesModel.log_transaction: Value error: {e}")
+    def handle_emissions_flushed(self, row_count, spans):
+        logger.debug(
+            f"databasesModel.handle_emissions_flushed: {row_count} calculations committed to database"
+        )
+        self.calculation_logged.emit(spans)
 
     @staticmethod
     def get_emissions_history(
@@ -555,7 +609,7 @@ class databasesModel(QObject):
         )
         try:
             db_path = os.path.join(databases_folder, "emissions.db")
-            with sqlite3.connect(db_path) as conn:
+            with connection_pool.connection(db_path) as conn:
                 cursor = conn.cursor()
                 query = "SELECT * FROM emissions WHERE 1=1"
                 params = []
@@ -590,12 +644,163 @@ class databasesModel(QObject):
             )
             return []
 
+    @staticmethod
+    def get_emissions_time_series(
+        time_frame=None,
+        time_range=None,
+        user_id=None,
+        fuel_type=None,
+        emissions_unit=None,
+    ):
+        """
+        Get (epoch seconds, emissions in kilograms) pairs ordered by time, with the
+        same filters as get_emissions_history. SQLite converts the timestamps and
+        units, so the rows can be loaded into NumPy arrays without parsing. Without
+        an emissions_unit every row in a known unit is included.
+        :param time_range: Start and end in epoch seconds, the end is excluded.
+        :returns: Time series for filter parameters
+        """
+        logger.info(
+            f"databasesModel.get_emissions_time_series: Retrieving series with filters - time_frame: {time_frame}, user_id: {user_id}, fuel_type: {fuel_type}"
+        )
+        # The CASE and unit list are built from constants
+        query = f"""SELECT CAST(strftime('%s', timestamp) AS INTEGER),
+            {EMISSIONS_IN_KILOGRAMS} FROM emissions WHERE 1=1"""  # nosec B608
+        params = []
+        if time_frame is not None:
+            query += " AND timestamp BETWEEN datetime(?) AND datetime(?)"
+            params.extend(time_frame[:2])
+        if time_range is not None:
+            query += (
+                " AND timestamp >= datetime(?, 'unixepoch')"
+                " AND timestamp < datetime(?, 'unixepoch')"
+            )
+            params.extend(int(bound) for bound in time_range[:2])
+        if isinstance(user_id, str):
+            query += " AND user_id = ?"
+            params.append(user_id)
+        if isinstance(fuel_type, str):
+            query += " AND fuel_type = ?"
+            params.append(fuel_type)
+        if isinstance(emissions_unit, str):
+            query += " AND emissions_unit = ?"
+            params.append(emissions_unit)
+        else:
+            query += f" AND emissions_unit IN {KNOWN_EMISSIONS_UNITS}"
+        query += " ORDER BY timestamp, id"
+
+        try:
+            db_path = os.path.join(databases_folder, "emissions.db")
+            conn = connection_pool.get_connection(db_path)
+            results = conn.execute(query, params).fetchall()
+        except sqlite3.Error as e:
+            logger.error(
+                f"databasesModel.get_emissions_time_series: Error getting emissions series: {e}"
+            )
+            return []
+        logger.info(
+            f"databasesModel.get_emissions_time_series: Retrieved {len(results)} points"
+        )
+        return results
+
+    @staticmethod
+    def get_emissions_time_series_by_user(
+        time_frame=None,
+        time_range=None,
+        fuel_type=None,
+        emissions_unit=None,
+    ):
+        """
+        Get every user's (user id, epoch seconds, emissions in kilograms) rows in
+        one query, ordered by time.
+        :param time_range: Start and end in epoch seconds, the end is excluded.
+        :returns: Time series of all users for filter parameters
+        """
+        logger.info(
+            f"databasesModel.get_emissions_time_series_by_user: Retrieving series with filters - time_frame: {time_frame}, fuel_type: {fuel_type}"
+        )
+        # The CASE and unit list are built from constants
+        query = f"""SELECT user_id, CAST(strftime('%s', timestamp) AS INTEGER),
+            {EMISSIONS_IN_KILOGRAMS} FROM emissions
+            WHERE user_id IS NOT NULL"""  # nosec B608
+        params = []
+        if time_frame is not None:
+            query += " AND timestamp BETWEEN datetime(?) AND datetime(?)"
+            params.extend(time_frame[:2])
+        if time_range is not None:
+            query += (
+                " AND timestamp >= datetime(?, 'unixepoch')"
+                " AND timestamp < datetime(?, 'unixepoch')"
+            )
+            params.extend(int(bound) for bound in time_range[:2])
+        if isinstance(fuel_type, str):
+            query += " AND fuel_type = ?"
+            params.append(fuel_type)
+        if isinstance(emissions_unit, str):
+            query += " AND emissions_unit = ?"
+            params.append(emissions_unit)
+        else:
+            query += f" AND emissions_unit IN {KNOWN_EMISSIONS_UNITS}"
+        query += " ORDER BY timestamp, id"
+
+        try:
+            db_path = os.path.join(databases_folder, "emissions.db")
+            conn = connection_pool.get_connection(db_path)
+            results = conn.execute(query, params).fetchall()
+        except sqlite3.Error as e:
+            logger.error(
+                f"databasesModel.get_emissions_time_series_by_user: Error getting emissions series: {e}"
+            )
+            return []
+        logger.info(
+            f"databasesModel.get_emissions_time_series_by_user: Retrieved {len(results)} points"
+        )
+        return results
+
+    @staticmethod
+    def get_emissions_total(
+        time_frame,
+        user_id=None,
+        fuel_type=None,
+        emissions_unit=None,
+    ):
+        """
+        Get the total emissions and number of calculations in a time frame, read
+        from the hourly, daily and monthly rollups plus the raw rows of the partial
+        hours at either end. Emissions of every unit are summed in kilograms.
+        :param time_frame: Start and end of the time frame, the end is excluded.
+        :param emissions_unit: Only counts rows calculated in this unit.
+        :returns: (total emissions in kilograms, number of rows), (0.0, 0) on a
+        database error
+        """
+        logger.info(
+            f"databasesModel.get_emissions_total: Retrieving total with filters - time_frame: {time_frame}, user_id: {user_id}, fuel_type: {fuel_type}"
+        )
+        try:
+            db_path = os.path.join(databases_folder, "emissions.db")
+            conn = connection_pool.get_connection(db_path)
+            return range_total(
+                conn,
+                time_frame[0],
+                time_frame[1],
+                user_id=user_id if isinstance(user_id, str) else None,
+                fuel_type=fuel_type if isinstance(fuel_type, str) else None,
+                emissions_unit=(
+                    emissions_unit if isinstance(emissions_unit, str) else None
+                ),
+            )
+        except (sqlite3.Error, ValueError) as e:
+            logger.error(
+                f"databasesModel.get_emissions_total: Error getting emissions total: {e}"
+            )
+            return 0.0, 0
+
     @staticmethod
     def get_all_user_ids():
         """Get all unique user IDs from the database"""
         logger.info("databasesModel.get_all_user_ids: Retrieving all unique user IDs")
         db_path = os.path.join(databases_folder, "emissions.db")
-        with sqlite3.connect(db_path) as conn:
+        with connection_pool.connection(db_path) as conn:
             cursor = conn.cursor()
             cursor.execute("SELECT DISTINCT user_id FROM emissions")
             user_ids = [str(row[0]) for row in cursor.fetchall()]
@@ -612,15 +817,22 @@ class databasesModel(QObject):
             logger.info(
                 "databasesModel.database_initialization: Restarting emissions variables database"
             )
-            self.initialize_emissions_variables_database()
+            # Runs any pending schema migrations on existing databases
+            with startup_tracer.phase("initialize_emissions_database"):
+                self.initialize_emissions_database()
+            with startup_tracer.phase("initialize_emissions_variables_database"):
+                self.initialize_emissions_variables_database()
         else:
             self.setup_databases_folder()
             logger.info(
                 "databasesModel.database_initialization: Initializing all databases"
             )
-            self.initialize_emissions_database()
-            self.initialize_user_data_database()
-            self.initialize_emissions_variables_database()
+            with startup_tracer.phase("initialize_emissions_database"):
+                self.initialize_emissions_database()
+            with startup_tracer.phase("initialize_user_data_database"):
+                self.initialize_user_data_database()
+            with startup_tracer.phase("initialize_emissions_variables_database"):
+                self.initialize_emissions_variables_database()
 
         # Emit signal that databases are initialized
         self.databases_initialized.emit()
@@ -0,0 +1,38 @@
+import sqlite3
+from typing import List, NamedTuple
+
+
+class EmissionsSpan(NamedTuple):
+    """
+    Rows added for one user, fuel type and emissions unit, and the time they span
+    in epoch seconds (first and last row, both included).
+    """
+
+    user_id: int
+    fuel_type: str
+    emissions_unit: str
+    start: int
+    end: int
+
+
+def last_emissions_id(conn: sqlite3.Connection) -> int:
+    """The id of the newest row of the emissions table, 0 when it is empty."""
+    return conn.execute("SELECT IFNULL(MAX(id), 0) FROM emissions").fetchone()[0]
+
+
+def changed_spans(conn: sqlite3.Connection, after_id: int) -> List[EmissionsSpan]:
+    """
+    Summarizes the rows added after after_id per user, fuel type and emissions
+    unit. Reads only the new rows through the id primary key, timestamps are
+    converted by SQLite like the chart queries do.
+    """
+    rows = conn.execute(
+        """SELECT user_id, fuel_type, emissions_unit,
+        MIN(CAST(strftime('%s', timestamp) AS INTEGER)),
+        MAX(CAST(strftime('%s', timestamp) AS INTEGER))
+        FROM emissions WHERE id > ?
+        GROUP BY user_id, fuel_type, emissions_unit
+        HAVING MIN(strftime('%s', timestamp)) IS NOT NULL""",
+        (after_id,),
+    ).fetchall()
+    return [EmissionsSpan(*row) for row in rows]
@@ -0,0 +1,147 @@
+import logging
+import os
+import sqlite3
+import threading
+from types import MappingProxyType
+from typing import Dict, List, Mapping, Optional
+
+from data.connection_pool import connection_pool
+
+logger = logging.getLogger("data")
+
+
+class EmissionsFactorRegistry:
+    """
+    In-memory copy of the fuel_types and farming_techniques tables of emissions_variables.db.
+
+    Both tables are read once and every lookup after that is a dictionary read.
+    The registry only goes back to the database after invalidate() is called,
+    which happens whenever emissions_variables.db is rebuilt.
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._fuel_types: Optional[Dict[str, float]] = None
+        self._farming_techniques: Optional[Dict[str, dict]] = None
+        self._farming_technique_modifiers: Dict[str, float] = {}
+        self.hits = 0
+        self.misses = 0
+        self.reloads = 0
+
+    def invalidate(self) -> None:
+        """Drops the loaded factors so the next lookup reads the database again."""
+        with self._lock:
+            self._fuel_types = None
+            self._farming_techniques = None
+            self._farming_technique_modifiers = {}
+        logger.debug("EmissionsFactorRegistry.invalidate: Registry invalidated")
+
+    def replace_database(self, built_path: str) -> None:
+        """
+        Copies a fully built database over db_path, removes the built file and drops
+        the loaded factors. Lookups wait on the registry lock meanwhile. The copy goes
+        through SQLite's backup API in one transaction, so readers outside the lock,
+        such as the data validator, see either the old or the new tables and their
+        connections stay open.
+        """
+        with self._lock:
+            source = sqlite3.connect(built_path)
+            try:
+                with connection_pool.connection(self.db_path) as target:
+                    source.backup(target)
+            finally:
+                source.close()
+            for path in (built_path, f"{built_path}-wal", f"{built_path}-shm"):
+                if os.path.exists(path):
+                    os.remove(path)
+            self._fuel_types = None
+            self._farming_techniques = None
+            self._farming_technique_modifiers = {}
+        logger.debug(
+            f"EmissionsFactorRegistry.replace_database: Replaced {self.db_path}"
+        )
+
+    def _ensure_loaded(self) -> None:
+        # The counters are updated from pool threads, so they are only touched under the lock.
+        with self._lock:
+            if self._fuel_types is not None:
+                self.hits += 1
+                return
+            self.misses += 1
+            self._load()
+
+    def _load(self) -> None:
+        logger.info(
+            f"EmissionsFactorRegistry._load: Loading emissions factors from {self.db_path}"
+        )
+        try:
+            with connection_pool.connection(self.db_path) as conn:
+                cursor = conn.cursor()
+                cursor.execute("SELECT fuel_type, emissions_modifier FROM fuel_types")
+                fuel_types = dict(cursor.fetchall())
+                cursor.execute(
+                    "SELECT technique, emissions_modifier, description FROM farming_techniques"
+                )
+                farming_techniques = {
+                    row[0]: {
+                        "technique": row[0],
+                        "emissions_modifier": row[1],
+                        "description": row[2],
+                    }
+                    for row in cursor.fetchall()
+                }
+        except sqlite3.Error as e:
+            # Leave the registry unloaded so the next lookup retries.
+            logger.error(f"EmissionsFactorRegistry._load: Database error: {e}")
+            return
+
+        self._farming_techniques = farming_techniques
+        self._farming_technique_modifiers = {
+            technique: info["emissions_modifier"]
+            for technique, info in farming_techniques.items()
+        }
+        # Assigned last, a non-None _fuel_types marks the registry as loaded.
+        self._fuel_types = fuel_types
+        self.reloads += 1
+        logger.debug(
+            f"EmissionsFactorRegistry._load: Loaded {len(fuel_types)} fuel types and "
+            f"{len(farming_techniques)} farming techniques"
+        )
+
+    def fuel_types(self) -> List[str]:
+        self._ensure_loaded()
+        return list(self._fuel_types or {})
+
+    def farming_techniques(self) -> List[str]:
+        self._ensure_loaded()
+        return list(self._farming_techniques or {})
+
+    def fuel_type_emissions_modifiers(self) -> Mapping[str, float]:
+        """Read-only view of every fuel type's emissions modifier."""
+        self._ensure_loaded()
+        return MappingProxyType(self._fuel_types or {})
+
+    def farming_technique_emissions_modifiers(self) -> Mapping[str, float]:
+        """Read-only mapping of every farming technique's emissions modifier."""
+        self._ensure_loaded()
+        return MappingProxyType(self._farming_technique_modifiers)
+
+    def get_fuel_type_emissions_modifier(self, fuel_type: str) -> Optional[float]:
+        self._ensure_loaded()
+        return (self._fuel_types or {}).get(fuel_type)
+
+    def get_farming_technique(self, technique: Optional[str] = None) -> Optional[dict]:
+        """
+        Returns the stored row of a farming technique as a dictionary.
+        Without a technique the first technique in the table is returned.
+        """
+        self._ensure_loaded()
+        techniques = self._farming_techniques or {}
+        if technique is None:
+            return next(iter(techniques.values()), None)
+        return techniques.get(technique)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "reloads": self.reloads}
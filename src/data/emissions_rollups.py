@@ -0,0 +1,229 @@
+import logging
+import sqlite3
+from datetime import datetime, timedelta
+from typing import Callable, List, Optional, Tuple, Union
+
+from services.unit_conversions_service import UnitConversionsService
+
+logger = logging.getLogger("data")
+
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+# Rows keep the unit they were calculated in, totals and chart series are read in
+# kilograms
+EMISSIONS_UNITS = UnitConversionsService.EMISSIONS_UNITS
+KNOWN_EMISSIONS_UNITS = "(" + ", ".join(f"'{unit}'" for unit in EMISSIONS_UNITS) + ")"
+
+
+def in_kilograms(column: str) -> str:
+    """SQL converting column, in the row's emissions_unit, to kilograms."""
+    return (
+        f"{column} / CASE emissions_unit "
+        + " ".join(
+            f"WHEN '{unit}' THEN "
+            f"{UnitConversionsService.conversion_factor('Kilograms', unit)!r}"
+            for unit in EMISSIONS_UNITS
+        )
+        + " END"
+    )
+
+
+def _floor_hour(value: datetime) -> datetime:
+    return value.replace(minute=0, second=0, microsecond=0)
+
+
+def _floor_day(value: datetime) -> datetime:
+    return value.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def _floor_month(value: datetime) -> datetime:
+    return _floor_day(value).replace(day=1)
+
+
+def _next_hour(value: datetime) -> datetime:
+    return value + timedelta(hours=1)
+
+
+def _next_day(value: datetime) -> datetime:
+    return value + timedelta(days=1)
+
+
+def _next_month(value: datetime) -> datetime:
+    if value.month == 12:
+        return value.replace(year=value.year + 1, month=1)
+    return value.replace(month=value.month + 1)
+
+
+# (table, SQLite strftime format of the bucket start, floor, next bucket start),
+# coarsest first. Bucket keys are timestamps, so they compare like the raw column.
+ROLLUP_LEVELS: List[
+    Tuple[str, str, Callable[[datetime], datetime], Callable[[datetime], datetime]]
+] = [
+    ("emissions_rollup_monthly", "%Y-%m-01 00:00:00", _floor_month, _next_month),
+    ("emissions_rollup_daily", "%Y-%m-%d 00:00:00", _floor_day, _next_day),
+    ("emissions_rollup_hourly", "%Y-%m-%d %H:00:00", _floor_hour, _next_hour),
+]
+
+# Key columns are NOT NULL so rows with a NULL user, fuel or unit still upsert
+# into one bucket, they are stored as ''.
+ROLLUP_TABLE_SCHEMA = """CREATE TABLE IF NOT EXISTS {table}
+    (bucket TEXT NOT NULL, user_id INTEGER NOT NULL, fuel_type TEXT NOT NULL,
+    emissions_unit TEXT NOT NULL, total_emissions REAL NOT NULL,
+    row_count INTEGER NOT NULL,
+    PRIMARY KEY (bucket, user_id, fuel_type, emissions_unit)) WITHOUT ROWID"""
+
+_ROLLUP_ADD = """INSERT INTO {table}
+        (bucket, user_id, fuel_type, emissions_unit, total_emissions, row_count)
+        SELECT strftime('{bucket_format}', NEW.timestamp), IFNULL(NEW.user_id, ''),
+        IFNULL(NEW.fuel_type, ''), IFNULL(NEW.emissions_unit, ''),
+        IFNULL(NEW.emissions, 0), 1
+        WHERE strftime('{bucket_format}', NEW.timestamp) IS NOT NULL
+        ON CONFLICT (bucket, user_id, fuel_type, emissions_unit) DO UPDATE SET
+        total_emissions = total_emissions + excluded.total_emissions,
+        row_count = row_count + 1;"""
+
+_ROLLUP_SUBTRACT = """UPDATE {table} SET
+        total_emissions = total_emissions - IFNULL(OLD.emissions, 0),
+        row_count = row_count - 1
+        WHERE bucket = strftime('{bucket_format}', OLD.timestamp)
+        AND user_id = IFNULL(OLD.user_id, '') AND fuel_type = IFNULL(OLD.fuel_type, '')
+        AND emissions_unit = IFNULL(OLD.emissions_unit, '');"""
+
+ROLLUP_TRIGGERS = {
+    "insert": "CREATE TRIGGER IF NOT EXISTS {table}_insert AFTER INSERT ON emissions "
+    "BEGIN " + _ROLLUP_ADD + " END",
+    "delete": "CREATE TRIGGER IF NOT EXISTS {table}_delete AFTER DELETE ON emissions "
+    "BEGIN " + _ROLLUP_SUBTRACT + " END",
+    "update": "CREATE TRIGGER IF NOT EXISTS {table}_update AFTER UPDATE OF "
+    "user_id, fuel_type, emissions, emissions_unit, timestamp ON emissions "
+    "BEGIN " + _ROLLUP_SUBTRACT + " " + _ROLLUP_ADD + " END",
+}
+
+_ROLLUP_BACKFILL = """INSERT INTO {table}
+    (bucket, user_id, fuel_type, emissions_unit, total_emissions, row_count)
+    SELECT strftime('{bucket_format}', timestamp) AS bucket, IFNULL(user_id, ''),
+    IFNULL(fuel_type, ''), IFNULL(emissions_unit, ''), TOTAL(emissions), COUNT(*)
+    FROM emissions WHERE strftime('{bucket_format}', timestamp) IS NOT NULL
+    GROUP BY 1, 2, 3, 4"""
+
+
+def create_rollup_tables(conn: sqlite3.Connection) -> None:
+    """
+    Creates the hourly, daily and monthly rollup tables, fills them from the
+    existing rows and adds the triggers that keep them up to date on every insert,
+    update and delete of the emissions table.
+    """
+    for table, bucket_format, _, _ in ROLLUP_LEVELS:
+        # Table names and formats are the constants in ROLLUP_LEVELS
+        names = {"table": table, "bucket_format": bucket_format}
+        conn.execute(ROLLUP_TABLE_SCHEMA.format(**names))
+        # Filled before the triggers exist so no row is counted twice
+        conn.execute(_ROLLUP_BACKFILL.format(**names))  # nosec B608
+        for trigger in ROLLUP_TRIGGERS.values():
+            conn.execute(trigger.format(**names))  # nosec B608
+
+
+def _to_datetime(value: Union[str, datetime]) -> datetime:
+    if isinstance(value, datetime):
+        return value.replace(tzinfo=None, microsecond=0)
+    return datetime.fromisoformat(str(value).strip())
+
+
+def plan_range(
+    start: Union[str, datetime], end: Union[str, datetime]
+) -> List[Tuple[Optional[str], datetime, datetime]]:
+    """
+    Splits [start, end) into whole rollup buckets, as coarse as possible, and the
+    raw rows before the first and after the last whole hour.
+    :return: (table or None for raw rows, start, end) parts in time order.
+    """
+    parts: List[Tuple[Optional[str], datetime, datetime]] = []
+
+    def split(part_start: datetime, part_end: datetime, level: int) -> None:
+        if part_start >= part_end:
+            return
+        if level == len(ROLLUP_LEVELS):
+            parts.append((None, part_start, part_end))
+            return
+        table, _, floor, next_bucket = ROLLUP_LEVELS[level]
+        first = floor(part_start)
+        if first < part_start:
+            first = next_bucket(first)
+        last = floor(part_end)
+        if first >= last:
+            split(part_start, part_end, level + 1)
+            return
+        split(part_start, first, level + 1)
+        parts.append((table, first, last))
+        split(last, part_end, level + 1)
+
+    split(_to_datetime(start), _to_datetime(end), 0)
+    return parts
+
+
+def range_total(
+    conn: sqlite3.Connection,
+    start: Union[str, datetime],
+    end: Union[str, datetime],
+    user_id=None,
+    fuel_type=None,
+    emissions_unit=None,
+) -> Tuple[float, int]:
+    """
+    Sums emissions in [start, end) from the rollup tables, reading raw rows only
+    for the partial hours at either end. Every unit is converted to kilograms,
+    rows in an unknown unit are left out.
+    :return: (total emissions in kilograms, number of rows)
+    """
+    filters = f" AND emissions_unit IN {KNOWN_EMISSIONS_UNITS}"
+    filter_params: List = []
+    for column, value in (
+        ("user_id", user_id),
+        ("fuel_type", fuel_type),
+        ("emissions_unit", emissions_unit),
+    ):
+        if value is not None:
+            filters += f" AND {column} = ?"
+            filter_params.append(value)
+
+    selects = []
+    params: List = []
+    for table, part_start, part_end in plan_range(start, end):
+        if table is None:
+            # Compared through datetime() like the triggers bucket rows, so imported
+            # timestamps such as "2025-01-01T10:30:00" are counted. The raw column
+            # is first narrowed to the surrounding days, a day either side for
+            # timestamps with a UTC offset, so the timestamp indexes still apply.
+            selects.append(
+                f"SELECT TOTAL({in_kilograms('emissions')}) AS total, "
+                "COUNT(*) AS row_count FROM emissions "
+                "WHERE timestamp >= ? AND timestamp < ? "
+                "AND datetime(timestamp) >= ? AND datetime(timestamp) < ?" + filters
+            )
+            params += [
+                (part_start.date() - timedelta(days=1)).isoformat(),
+                (part_end.date() + timedelta(days=2)).isoformat(),
+            ]
+        else:
+            selects.append(
+                f"SELECT TOTAL({in_kilograms('total_emissions')}) AS total, "
+                "TOTAL(row_count) AS row_count "
+                f"FROM {table} "
+                "WHERE bucket >= ? AND bucket < ?" + filters
+            )
+        params += [
+            part_start.strftime(TIMESTAMP_FORMAT),
+            part_end.strftime(TIMESTAMP_FORMAT),
+            *filter_params,
+        ]
+    if not selects:
+        return 0.0, 0
+
+    # Tables and columns are constants, values are bound parameters
+    query = (
+        "SELECT TOTAL(total), TOTAL(row_count) FROM ("  # nosec B608
+        + " UNION ALL ".join(selects)
+        + ")"
+    )
+    total, row_count = conn.execute(query, params).fetchone()
+    return total, int(row_count)
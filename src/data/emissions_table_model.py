@@ -0,0 +1,242 @@
+import bisect
+import logging
+import sqlite3
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from PySide6.QtCore import QAbstractTableModel, QModelIndex, Qt
+
+from data.connection_pool import connection_pool
+
+logger = logging.getLogger("data")
+
+TABLE_COLUMNS = (
+    "user_id",
+    "fuel_type",
+    "fuel_used",
+    "fuel_unit",
+    "emissions",
+    "emissions_unit",
+    "temperature",
+    "temperature_unit",
+    "farming_technique",
+    "timestamp",
+)
+
+# Columns with an index from EMISSIONS_SORT_INDEXES, sorting by any other column
+# would scan the whole table for every page.
+SORTABLE_COLUMNS = ("fuel_used", "emissions", "timestamp")
+
+PAGE_SIZE = 256
+MAX_CACHED_PAGES = 32
+# Pages loaded on either side of the visible rows by prefetch.
+PREFETCH_PAGES = 1
+
+SELECT_COLUMNS = "id, " + ", ".join(TABLE_COLUMNS)
+
+
+class EmissionsTableModel(QAbstractTableModel):
+    """
+    Read-only, virtualized model of the emissions table for the General tab.
+
+    rowCount comes from COUNT(*) and rows are read PAGE_SIZE at a time when the
+    view asks for them. At most max_pages pages are kept, least recently used
+    first out. The sort key of the last row of every loaded page is recorded, so
+    later pages are read with keyset pagination (WHERE (column, id) > key)
+    starting from the nearest recorded page instead of an OFFSET from the top.
+    Sorting is done by SQLite through ORDER BY.
+    """
+
+    def __init__(
+        self,
+        db_path: str,
+        page_size: int = PAGE_SIZE,
+        max_pages: int = MAX_CACHED_PAGES,
+        parent=None,
+    ):
+        super().__init__(parent)
+        self.db_path = db_path
+        self.page_size = page_size
+        self.max_pages = max_pages
+        self.sort_column: Optional[str] = None  # None sorts by id
+        self.descending = False
+        self._pages: "OrderedDict[int, List[tuple]]" = OrderedDict()
+        # page -> sort key of its last row, and the recorded pages in order
+        self._boundaries: Dict[int, Tuple] = {}
+        self._boundary_pages: List[int] = []
+        self._row_count = 0
+        self._max_id = 0
+        self._load_row_count()
+
+    def _load_row_count(self) -> None:
+        try:
+            conn = connection_pool.get_connection(self.db_path)
+            count, max_id = conn.execute(
+                "SELECT COUNT(*), MAX(id) FROM emissions"
+            ).fetchone()
+        except sqlite3.Error as e:
+            logger.error(f"EmissionsTableModel._load_row_count: Database error: {e}")
+            count, max_id = 0, None
+        self._row_count = count
+        self._max_id = max_id or 0
+
+    def rowCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else self._row_count
+
+    def columnCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(TABLE_COLUMNS)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or role != Qt.DisplayRole:
+            return None
+        page_number, offset = divmod(index.row(), self.page_size)
+        page = self._page(page_number)
+        if offset >= len(page):
+            return None
+        return page[offset][index.column() + 1]
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole:
+            return None
+        if orientation == Qt.Horizontal:
+            return TABLE_COLUMNS[section]
+        return section + 1
+
+    def sort(self, column: int, order=Qt.AscendingOrder) -> None:
+        """
+        Sorts by one of SORTABLE_COLUMNS through ORDER BY, any other column
+        restores id order.
+        """
+        sort_column = TABLE_COLUMNS[column] if column >= 0 else None
+        sortable = sort_column in SORTABLE_COLUMNS
+        self.beginResetModel()
+        self.sort_column = sort_column if sortable else None
+        self.descending = sortable and order == Qt.DescendingOrder
+        self._clear_pages()
+        self.endResetModel()
+        logger.debug(
+            f"EmissionsTableModel.sort: Sorted by {self.sort_column or 'id'}"
+            f"{' descending' if self.descending else ''}"
+        )
+
+    def _clear_pages(self) -> None:
+        self._pages.clear()
+        self._boundaries.clear()
+        self._boundary_pages.clear()
+
+    def _sort_key(self, row: tuple) -> Tuple:
+        if self.sort_column is None:
+            return (row[0],)
+        return (row[TABLE_COLUMNS.index(self.sort_column) + 1], row[0])
+
+    def _page_query(self, after_key: Optional[Tuple]) -> Tuple[str, tuple]:
+        direction = "DESC" if self.descending else "ASC"
+        comparison = "<" if self.descending else ">"
+        column = self.sort_column
+        if column is None:
+            order_by = f"id {direction}"
+            where = f"WHERE id {comparison} ?" if after_key else ""
+        else:
+            # NULLs first in both directions, so no NULL comes after a recorded key
+            order_by = f"{column} {direction} NULLS FIRST, id {direction}"
+            where = f"WHERE ({column}, id) {comparison} (?, ?)" if after_key else ""
+        # column is always one of TABLE_COLUMNS, values are bound parameters
+        query = (
+            f"SELECT {SELECT_COLUMNS} FROM emissions {where} "  # nosec B608
+            f"ORDER BY {order_by} LIMIT ? OFFSET ?"
+        )
+        return query, after_key or ()
+
+    def _fetch_page(self, page_number: int) -> List[tuple]:
+        # Start after the nearest recorded page before this one, if there is one
+        position = bisect.bisect_left(self._boundary_pages, page_number)
+        if position:
+            start_page = self._boundary_pages[position - 1]
+            after_key = self._boundaries[start_page]
+            skip = (page_number - start_page - 1) * self.page_size
+        else:
+            after_key = None
+            skip = page_number * self.page_size
+        query, parameters = self._page_query(after_key)
+        conn = connection_pool.get_connection(self.db_path)
+        return conn.execute(query, (*parameters, self.page_size, skip)).fetchall()
+
+    def _record_boundary(self, page_number: int, rows: List[tuple]) -> None:
+        key = self._sort_key(rows[-1])
+        # NULL keys cannot be compared against, those pages are reached by OFFSET
+        if len(rows) < self.page_size or key[0] is None:
+            return
+        if page_number not in self._boundaries:
+            bisect.insort(self._boundary_pages, page_number)
+        self._boundaries[page_number] = key
+
+    def _page(self, page_number: int) -> List[tuple]:
+        page = self._pages.get(page_number)
+        if page is not None:
+            self._pages.move_to_end(page_number)
+            return page
+        try:
+            page = self._fetch_page(page_number)
+        except sqlite3.Error as e:
+            logger.error(f"EmissionsTableModel._page: Database error: {e}")
+            return []
+        if page:
+            self._record_boundary(page_number, page)
+        self._pages[page_number] = page
+        while len(self._pages) > self.max_pages:
+            self._pages.popitem(last=False)
+        return page
+
+    def prefetch(self, first_row: int, last_row: int) -> None:
+        """Loads the pages holding first_row to last_row and PREFETCH_PAGES around them."""
+        if self._row_count == 0:
+            return
+        last_page = (self._row_count - 1) // self.page_size
+        first = max(first_row // self.page_size - PREFETCH_PAGES, 0)
+        last = min(last_row // self.page_size + PREFETCH_PAGES, last_page)
+        # Bounded by the cache size so prefetching never evicts the visible pages
+        for page_number in range(first, min(last, first + self.max_pages - 1) + 1):
+            self._page(page_number)
+
+    def refresh(self) -> int:
+        """
+        Adds rows inserted since the model was loaded.
+        In id order the rows are appended and the cached pages kept, in any other
+        order the model is reset.
+        :return: The number of rows added.
+        """
+        try:
+            conn = connection_pool.get_connection(self.db_path)
+            added, max_id = conn.execute(
+                "SELECT COUNT(*), MAX(id) FROM emissions WHERE id > ?",
+                (self._max_id,),
+            ).fetchone()
+        except sqlite3.Error as e:
+            logger.error(f"EmissionsTableModel.refresh: Database error: {e}")
+            return 0
+        if not added:
+            return 0
+        self._max_id = max_id
+
+        if self.sort_column is None and not self.descending:
+            # Only the last, partially filled page changes
+            last_page = (self._row_count - 1) // self.page_size
+            self._pages.pop(last_page, None)
+            self.beginInsertRows(
+                QModelIndex(), self._row_count, self._row_count + added - 1
+            )
+            self._row_count += added
+            self.endInsertRows()
+        else:
+            self.beginResetModel()
+            self._clear_pages()
+            self._row_count += added
+            self.endResetModel()
+        return added
+
+    def reload(self) -> None:
+        """Drops every cached page and counts the rows again."""
+        self.beginResetModel()
+        self._clear_pages()
+        self._load_row_count()
+        self.endResetModel()
@@ -2,14 +2,33 @@ import csv
 import json
 import logging
 import os
-import sqlite3
+from typing import Iterable, Iterator
 
 from PySide6.QtCore import QObject, Signal
 
+from data.connection_pool import connection_pool
 from data.database_model import databases_folder
 
 logger = logging.getLogger("data")
 
+EXPORT_COLUMNS = (
+    "user_id",
+    "fuel_type",
+    "fuel_used",
+    "fuel_unit",
+    "emissions",
+    "emissions_unit",
+    "temperature",
+    "temperature_unit",
+    "farming_technique",
+    "timestamp",
+)
+
+# Rows read from the cursor per fetchmany call.
+EXPORT_FETCH_SIZE = 5000
+# Rows per Parquet row group / Arrow record batch.
+ROW_GROUP_SIZE = 64 * 1024
+
 
 class ExportManager(QObject):
 
@@ -26,61 +45,152 @@ class ExportManager(QObject):
             "emissions_variables.json",
         )
         self.controller = None
+        self.row_group_size = ROW_GROUP_SIZE
 
     def set_controller(self, controller):
         self.controller = controller
 
-    def fetch_data(self):
-        conn = sqlite3.connect(self.db_path)
+    def count_rows(self) -> int:
+        conn = connection_pool.get_connection(self.db_path)
+        return conn.execute("SELECT COUNT(*) FROM emissions").fetchone()[0]
+
+    def fetch_data(self) -> Iterator[tuple]:
+        """
+        Yields the emissions table row by row, reading EXPORT_FETCH_SIZE rows from
+        the cursor at a time so the table is never held in memory.
+        """
+        conn = connection_pool.get_connection(self.db_path)
         cursor = conn.cursor()
 
         cursor.execute(
-            "SELECT user_id, fuel_type, fuel_used, emissions, temperature, farming_technique, timestamp FROM emissions"
+            """SELECT user_id, fuel_type, fuel_used, fuel_unit, emissions, emissions_unit,
+            temperature, temperature_unit, farming_technique, timestamp FROM emissions
+            ORDER BY id"""
         )
-        data = cursor.fetchall()
-        conn.close()
-        return data
+        try:
+            while rows := cursor.fetchmany(EXPORT_FETCH_SIZE):
+                yield from rows
+        finally:
+            cursor.close()
 
-    def export_to_json(self, output_path):
-        data = self.fetch_data()
-
-        # Convert data to a list of dictionaries
-        data_dicts = [
-            {
-                "user_id": row[0],
-                "fuel_type": row[1],
-                "fuel_used": row[2],
-                "emissions": row[3],
-                "temperature": row[4],
-                "farming_technique": row[5],
-                "timestamp": row[6],
-            }
-            for row in data
-        ]
-
-        # Write data to JSON file
-        with open(output_path, "w") as f:
-            json.dump(data_dicts, f, indent=2)
-        logger.info(f"Data exported to {output_path}")
+    def track_progress(self, rows: Iterable[tuple]) -> Iterator[tuple]:
+        """Passes rows through, reporting progress every EXPORT_FETCH_SIZE rows."""
+        if not self.controller:
+            yield from rows
+            return
+        total = self.count_rows() or 1
+        last_percentage = -1
+        for written, row in enumerate(rows, start=1):
+            yield row
+            if written % EXPORT_FETCH_SIZE == 0:
+                percentage = min(99, written * 100 // total)
+                if percentage != last_percentage:
+                    last_percentage = percentage
+                    self.controller.update_progress(
+                        percentage, f"Exporting data... {written} entries"
+                    )
+
+    def finish_export(self, output_path, written: int) -> None:
+        logger.info(
+            f"ExportManager.finish_export: Exported {written} entries to {output_path}"
+        )
+        if self.controller:
+            self.controller.update_progress(100, "Export complete")
         self.export_completed.emit()
 
-    def export_to_csv(self, output_path):
-        data = self.fetch_data()
+    @staticmethod
+    def remove_partial_export(output_path) -> None:
+        """Removes a file whose export stopped on a row that could not be written."""
+        logger.error(
+            f"ExportManager.remove_partial_export: Export to {output_path} stopped, removing the file"
+        )
+        try:
+            os.remove(output_path)
+        except OSError as e:
+            logger.warning(
+                f"ExportManager.remove_partial_export: Could not remove {output_path}: {e}"
+            )
+
+    def export_to_json(self, output_path):
+        written = 0
+        # Elements are written as they are read, one object per line of the array
+        with open(output_path, "w", encoding="utf-8") as f:
+            f.write("[")
+            for row in self.track_progress(self.fetch_data()):
+                f.write(",\n  " if written else "\n  ")
+                f.write(json.dumps(dict(zip(EXPORT_COLUMNS, row))))
+                written += 1
+            f.write("\n]\n" if written else "]\n")
+        self.finish_export(output_path, written)
+
+    def export_to_jsonl(self, output_path):
+        written = 0
+        with open(output_path, "w", encoding="utf-8") as f:
+            for row in self.track_progress(self.fetch_data()):
+                f.write(json.dumps(dict(zip(EXPORT_COLUMNS, row))))
+                f.write("\n")
+                written += 1
+        self.finish_export(output_path, written)
 
-        # Write data to CSV file
-        with open(output_path, "w", newline="") as f:
+    def export_to_csv(self, output_path):
+        written = 0
+        with open(output_path, "w", encoding="utf-8", newline="") as f:
             writer = csv.writer(f)
-            writer.writerow(
-                [
-                    "user_id",
-                    "fuel_type",
-                    "fuel_used",
-                    "emissions",
-                    "temperature",
-                    "farming_technique",
-                    "timestamp",
-                ]
-            )
-            writer.writerows(data)
-        logger.info(f"Data exported to {output_path}")
-        self.export_completed.emit()
+            writer.writerow(EXPORT_COLUMNS)
+            for row in self.track_progress(self.fetch_data()):
+                writer.writerow(row)
+                written += 1
+        self.finish_export(output_path, written)
+
+    def export_to_parquet(self, output_path):
+        """
+        Writes a Parquet file with typed columns, compressed with COMPRESSION and
+        one row group per row_group_size rows.
+        """
+        import pyarrow.parquet as pq
+
+        from data.columnar_format import (
+            COMPRESSION,
+            EMISSIONS_SCHEMA,
+            iter_record_batches,
+        )
+
+        written = 0
+        try:
+            with pq.ParquetWriter(
+                output_path, EMISSIONS_SCHEMA, compression=COMPRESSION
+            ) as writer:
+                for batch in iter_record_batches(
+                    self.track_progress(self.fetch_data()), self.row_group_size
+                ):
+                    writer.write_batch(batch, row_group_size=self.row_group_size)
+                    written += batch.num_rows
+        except BaseException:
+            self.remove_partial_export(output_path)
+            raise
+        self.finish_export(output_path, written)
+
+    def export_to_arrow(self, output_path):
+        """Writes an Arrow IPC (Feather v2) file with one record batch per row_group_size rows."""
+        import pyarrow as pa
+
+        from data.columnar_format import (
+            COMPRESSION,
+            IPC_SCHEMA,
+            decode_dictionaries,
+            iter_record_batches,
+        )
+
+        written = 0
+        options = pa.ipc.IpcWriteOptions(compression=COMPRESSION)
+        try:
+            with pa.ipc.new_file(output_path, IPC_SCHEMA, options=options) as writer:
+                for batch in iter_record_batches(
+                    self.track_progress(self.fetch_data()), self.row_group_size
+                ):
+                    writer.write_batch(decode_dictionaries(batch))
+                    written += batch.num_rows
+        except BaseException:
+            self.remove_partial_export(output_path)
+            raise
+        self.finish_export(output_path, written)
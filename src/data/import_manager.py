@@ -1,25 +1,149 @@
+import codecs
 import csv
+import io
 import json
 import logging
 import os
 import sqlite3
-from typing import List
+from itertools import islice
+from typing import IO, Callable, Iterable, Iterator, List, Optional
 
-import chardet
 from PySide6.QtCore import QObject, Signal
 
+from data.connection_pool import connection_pool
 from data.database_model import databases_folder
+from data.emissions_changes import changed_spans, last_emissions_id
+from data.schema_migrations import TEMPERATURE_UNIT_NAMES, split_measurement
 
 logger = logging.getLogger("data")
 
+REQUIRED_KEYS = frozenset(
+    {
+        "user_id",
+        "fuel_type",
+        "fuel_used",
+        "emissions",
+        "emissions_unit",
+        "temperature",
+        "farming_technique",
+        "timestamp",
+    }
+)
+
+# Rows inserted per transaction, and bytes read per step while streaming a file.
+IMPORT_CHUNK_SIZE = 5000
+READ_SIZE = 1024 * 1024
+
+# Bytes checked for a BOM and UTF-8 validity, and the most bytes given to chardet.
+ENCODING_SAMPLE_SIZE = 64 * 1024
+DETECTION_SAMPLE_LIMIT = 256 * 1024
+
+# UTF-32 marks start with the UTF-16 ones, so they are checked first.
+BYTE_ORDER_MARKS = (
+    (codecs.BOM_UTF8, "utf-8-sig"),
+    (codecs.BOM_UTF32_LE, "utf-32"),
+    (codecs.BOM_UTF32_BE, "utf-32"),
+    (codecs.BOM_UTF16_LE, "utf-16"),
+    (codecs.BOM_UTF16_BE, "utf-16"),
+)
+
+
+def iter_json_array(file: IO[bytes], read_size: int = READ_SIZE) -> Iterator:
+    """
+    Yields the elements of the top-level JSON array in a binary file one at a time,
+    so only the element being parsed and one read buffer are held in memory.
+    """
+    decoder = json.JSONDecoder()
+    text_decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    buffer = ""
+    position = 0
+    eof = False
+
+    def read_more() -> bool:
+        nonlocal buffer, position, eof
+        if eof:
+            return False
+        chunk = file.read(read_size)
+        eof = not chunk
+        buffer = buffer[position:] + text_decoder.decode(chunk, final=eof)
+        position = 0
+        return True
+
+    def next_character() -> str:
+        # Skips whitespace and returns the next character, or "" at the end of the file
+        nonlocal position
+        while True:
+            while position < len(buffer) and buffer[position].isspace():
+                position += 1
+            if position < len(buffer):
+                return buffer[position]
+            if not read_more():
+                return ""
+
+    if next_character() != "[":
+        raise ValueError("JSON file must contain an array of entries")
+    position += 1
+    if next_character() == "]":
+        return
+
+    while True:
+        next_character()
+        try:
+            element, end = decoder.raw_decode(buffer, position)
+        except json.JSONDecodeError:
+            if read_more():
+                continue
+            raise ValueError("JSON file ends in the middle of an entry")
+        # Numbers can be cut off by a read ("12" of "12.5"), so a value only counts
+        # once the delimiter after it has been read.
+        delimiter_position = end
+        while delimiter_position < len(buffer) and buffer[delimiter_position].isspace():
+            delimiter_position += 1
+        if (
+            delimiter_position == len(buffer) or buffer[delimiter_position] not in ",]"
+        ) and read_more():
+            continue
+        position = end
+        yield element
+
+        delimiter = next_character()
+        position += 1
+        if delimiter == "]":
+            return
+        if delimiter != ",":
+            raise ValueError(f"Expected ',' or ']' in JSON array, found {delimiter!r}")
+
+
+class ImportStopped(ValueError):
+    """
+    Raised when an entry cannot be imported. The committed chunks before it stay in
+    the database, importing again with start_entry=next_entry picks up after them.
+    """
+
+    def __init__(self, message: str, inserted: int, entry_number: int, next_entry: int):
+        super().__init__(message)
+        self.inserted = inserted
+        self.entry_number = entry_number
+        self.next_entry = next_entry
+
+
+def chunked(iterable: Iterable, size: int) -> Iterator[list]:
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
 
 class ImportManager(QObject):
 
-    import_completed = Signal()
+    import_completed = Signal(list)  # EmissionsSpans of the imported rows
+    # EmissionsSpans of the rows committed before an import stopped, empty if they
+    # could not be read
+    import_stopped = Signal(list)
 
-    def __init__(self):
+    def __init__(self, chunk_size: int = IMPORT_CHUNK_SIZE):
         super().__init__()
         self.controller = None
+        self.chunk_size = chunk_size
         logger.debug("ImportManager.__init__: Initialized.")
 
     def set_controller(self, controller):
@@ -31,14 +155,179 @@ class ImportManager(QObject):
             f"ImportManager.insert_data: Inserting {len(data)} records into database"
         )
         db_path = os.path.join(databases_folder, "emissions.db")
-        conn = sqlite3.connect(db_path)
-        cursor = conn.cursor()
-        cursor.executemany("INSERT INTO emissions VALUES (?,?,?,?,?,?,?,?)", data)
-        conn.commit()
-        conn.close()
+        with connection_pool.connection(db_path) as conn:
+            conn.executemany(
+                """INSERT INTO emissions
+                (user_id, fuel_type, fuel_used, fuel_unit, emissions, emissions_unit,
+                temperature, temperature_unit, farming_technique, timestamp)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                data,
+            )
         logger.debug("ImportManager.insert_data: Database insertion completed")
 
-    def import_from_json(self, input_path: str) -> None:
+    @staticmethod
+    def last_inserted_id() -> int:
+        db_path = os.path.join(databases_folder, "emissions.db")
+        with connection_pool.connection(db_path) as conn:
+            return last_emissions_id(conn)
+
+    @staticmethod
+    def imported_spans(after_id: int) -> list:
+        """The EmissionsSpans of the rows added after after_id."""
+        db_path = os.path.join(databases_folder, "emissions.db")
+        with connection_pool.connection(db_path) as conn:
+            return changed_spans(conn, after_id)
+
+    def finish_import(self, after_id: int) -> None:
+        """
+        Reports the import as complete and emits import_completed with the
+        EmissionsSpans of the rows added after after_id.
+        """
+        spans = self.imported_spans(after_id)
+        self.report_progress(100, "Import complete")
+        self.import_completed.emit(spans)
+
+    def stop_import(self, after_id: int) -> None:
+        """Emits import_stopped for the rows committed before an import stopped."""
+        try:
+            spans = self.imported_spans(after_id)
+        except sqlite3.Error as e:
+            logger.error(
+                f"ImportManager.stop_import: Could not read imported rows: {e}"
+            )
+            spans = []
+        self.import_stopped.emit(spans)
+
+    @staticmethod
+    def entry_to_record(entry: dict) -> tuple:
+        """
+        Converts an imported entry into a row for insert_data.
+        Values may carry their unit ("12 Liters", "20°C"), explicit fuel_unit and
+        temperature_unit keys take precedence over the parsed units.
+        """
+        fuel_used, fuel_unit = split_measurement(entry["fuel_used"])
+        emissions, _ = split_measurement(entry["emissions"])
+        temperature, temperature_unit = split_measurement(entry["temperature"])
+        if fuel_used is None or emissions is None or temperature is None:
+            raise ValueError(f"Invalid numeric value in entry: {entry}")
+        fuel_unit = entry.get("fuel_unit") or fuel_unit
+        temperature_unit = entry.get("temperature_unit") or temperature_unit
+        return (
+            int(entry["user_id"]),
+            entry["fuel_type"],
+            fuel_used,
+            fuel_unit,
+            emissions,
+            entry["emissions_unit"],
+            temperature,
+            TEMPERATURE_UNIT_NAMES.get(temperature_unit, temperature_unit),
+            entry["farming_technique"],
+            entry["timestamp"],
+        )
+
+    @staticmethod
+    def validate_entry(entry: dict, entry_number: int) -> dict:
+        """Raises ValueError if entry lacks a required key or value."""
+        missing_keys = REQUIRED_KEYS - entry.keys()
+        if len(missing_keys) > 0:
+            logger.error(
+                f"ImportManager.validate_entry: Missing required keys in entry {entry_number}: {missing_keys}"
+            )
+            raise ValueError(
+                f"Missing required keys: {missing_keys} (entry {entry_number})"
+            )
+        for key in REQUIRED_KEYS:
+            if entry[key] is None or entry[key] == "":
+                logger.error(
+                    f"ImportManager.validate_entry: Missing value for key in entry {entry_number}: {key}"
+                )
+                raise ValueError(f"Missing value for key: {key} (entry {entry_number})")
+        return entry
+
+    def to_records(
+        self, entries: Iterable[dict], first_entry: int = 1
+    ) -> Iterator[tuple]:
+        """:param first_entry: The number of the first entry, for error messages."""
+        for entry_number, entry in enumerate(entries, start=first_entry):
+            if not isinstance(entry, dict):
+                raise ValueError(f"Entry {entry_number} is not an object: {entry!r}")
+            yield self.entry_to_record(self.validate_entry(entry, entry_number))
+
+    def report_progress(self, percentage: int, message: str) -> None:
+        if self.controller:
+            self.controller.update_progress(percentage, message)
+
+    @staticmethod
+    def file_progress(file: IO[bytes]) -> Callable[[int], float]:
+        """Progress as the share of file consumed so far."""
+        total_size = os.fstat(file.fileno()).st_size or 1
+        return lambda inserted: file.tell() / total_size
+
+    def insert_in_chunks(
+        self,
+        records: Iterable[tuple],
+        progress: Callable[[int], float],
+        after_id: int,
+        start_entry: int = 1,
+    ) -> int:
+        """
+        Inserts records chunk_size rows per transaction while they are read,
+        reporting progress(rows inserted so far) as a fraction of the import.
+        Chunks already committed are kept if a later row fails validation, and
+        import_stopped is emitted for them before ImportStopped is raised.
+        :param after_id: The last emissions id before the import.
+        :param start_entry: The number of the first record in the file.
+        :return: The number of rows inserted.
+        :raises ImportStopped: With the rows committed and the entry that failed.
+        """
+        inserted = 0
+        read = 0
+        inserting = False
+        last_percentage = -1
+
+        def counted(records):
+            nonlocal read
+            for record in records:
+                read += 1
+                yield record
+
+        try:
+            for chunk in chunked(counted(records), self.chunk_size):
+                inserting = True
+                self.insert_data(chunk)
+                inserting = False
+                inserted += len(chunk)
+                percentage = min(99, int(progress(inserted) * 100))
+                if percentage != last_percentage:
+                    last_percentage = percentage
+                    self.report_progress(
+                        percentage, f"Importing data... {inserted} entries"
+                    )
+        except Exception as e:
+            if isinstance(e, UnicodeDecodeError) and not inserted:
+                # Nothing was committed, another encoding can still be tried
+                raise
+            # A failed insert rolls back its whole chunk, which starts after inserted
+            entry_number = start_entry + (inserted if inserting else read)
+            next_entry = start_entry + inserted
+            logger.error(
+                f"ImportManager.insert_in_chunks: Import stopped at entry {entry_number} after {inserted} entries: {e}"
+            )
+            if inserted:
+                self.stop_import(after_id)
+                imported = f"Entries {start_entry} to {next_entry - 1} were imported"
+            else:
+                imported = "No entries were imported"
+            raise ImportStopped(
+                f"Import stopped at entry {entry_number}: {e}. {imported}",
+                inserted,
+                entry_number,
+                next_entry,
+            ) from e
+        return inserted
+
+    def import_from_json(self, input_path: str, start_entry: int = 1) -> None:
+        """:param start_entry: Entries before it are skipped, e.g. after ImportStopped."""
         logger.info(
             f"ImportManager.import_from_json: Importing data from JSON file: {input_path}"
         )
@@ -47,92 +336,99 @@ class ImportManager(QObject):
             logger.error("ImportManager.import_from_json: Input path is not set")
             raise ValueError("Input path is not set")
 
-        with open(input_path, "r") as f:
-            data_dicts = json.load(f)
+        after_id = self.last_inserted_id()
+        with open(input_path, "rb") as f:
+            entries = islice(iter_json_array(f), start_entry - 1, None)
+            inserted = self.insert_in_chunks(
+                self.to_records(entries, start_entry),
+                self.file_progress(f),
+                after_id,
+                start_entry,
+            )
 
-        logger.debug(
-            f"ImportManager.import_from_json: Loaded {len(data_dicts)} entries from JSON"
+        logger.info(
+            f"ImportManager.import_from_json: Imported {inserted} entries from {input_path}"
         )
-        required_keys = {
-            "user_id",
-            "fuel_type",
-            "fuel_used",
-            "emissions",
-            "emissions_unit",
-            "temperature",
-            "farming_technique",
-            "timestamp",
-        }
-        for entry in data_dicts:
-            # Checks for missing keys by subtracting required
-            # keys and entry.keys, then
-            # assigns the difference of those 2 values to missing keys.
-            missing_keys = required_keys - entry.keys()
-            if len(missing_keys) > 0:
-                logger.error(
-                    f"ImportManager.import_from_json: Missing required keys: {missing_keys}"
-                )
-                raise ValueError(f"Missing required keys: {missing_keys}")
-            for key in required_keys:
-                if key not in entry or entry[key] is None or entry[key] == "":
-                    logger.error(
-                        f"ImportManager.import_from_json: Missing value for key: {key}"
-                    )
-                    raise ValueError(f"Missing value for key: {key}")
-
-        # Convert data to a list of tuples
-        data = [
-            (
-                int(entry["user_id"]),
-                entry["fuel_type"],
-                float(entry["fuel_used"]),
-                float(entry["emissions"]),
-                entry["emissions_unit"],
-                float(entry["temperature"]),
-                entry["farming_technique"],
-                entry["timestamp"],
-            )
-            for entry in data_dicts
-        ]
+        self.finish_import(after_id)
 
-        self.insert_data(data)
+    def import_from_jsonl(self, input_path: str, start_entry: int = 1) -> None:
+        """:param start_entry: Lines before it are skipped, e.g. after ImportStopped."""
         logger.info(
-            f"ImportManager.import_from_json: Data imported successfully from {input_path}"
+            f"ImportManager.import_from_jsonl: Importing data from JSON Lines file: {input_path}"
         )
-        self.import_completed.emit()
+        after_id = self.last_inserted_id()
+        with open(input_path, "rb") as f:
+            lines = islice((line for line in f if line.strip()), start_entry - 1, None)
+            inserted = self.insert_in_chunks(
+                self.to_records(map(json.loads, lines), start_entry),
+                self.file_progress(f),
+                after_id,
+                start_entry,
+            )
 
-    def import_from_csv(self, input_path: str) -> None:
         logger.info(
-            f"ImportManager.import_from_csv: Importing data from CSV file: {input_path}"
+            f"ImportManager.import_from_jsonl: Imported {inserted} entries from {input_path}"
         )
-        # Add input path
-        input_path = os.path.abspath(input_path)
+        self.finish_import(after_id)
 
-        if input_path is None:
-            logger.error("ImportManager.import_from_csv: Input path is not set")
-            raise ValueError("Input path is not set")
+    @staticmethod
+    def detect_encoding(input_path: str) -> dict:
+        """
+        Detects the encoding of a file from a sample instead of the whole file.
+        A byte order mark decides immediately. Otherwise a prefix of
+        ENCODING_SAMPLE_SIZE bytes that decodes as UTF-8 is taken as UTF-8 (ASCII
+        included), and only other prefixes are fed to chardet, at most
+        DETECTION_SAMPLE_LIMIT bytes and stopping once it is confident.
+        :return: {"encoding": ..., "confidence": ...} in chardet's format.
+        """
+        with open(input_path, "rb") as file:
+            sample = file.read(ENCODING_SAMPLE_SIZE)
+            for bom, encoding in BYTE_ORDER_MARKS:
+                if sample.startswith(bom):
+                    return {"encoding": encoding, "confidence": 1.0}
+
+            try:
+                # final=False so a character cut off at the end of the sample is fine
+                codecs.getincrementaldecoder("utf-8")().decode(sample, final=False)
+                return {"encoding": "utf-8", "confidence": 1.0}
+            except UnicodeDecodeError:
+                pass
+
+            from chardet.universaldetector import UniversalDetector
 
+            detector = UniversalDetector()
+            detector.feed(sample)
+            fed = len(sample)
+            while not detector.done and fed < DETECTION_SAMPLE_LIMIT:
+                chunk = file.read(
+                    min(ENCODING_SAMPLE_SIZE, DETECTION_SAMPLE_LIMIT - fed)
+                )
+                if not chunk:
+                    break
+                detector.feed(chunk)
+                fed += len(chunk)
+        return detector.close()
+
+    def encodings_to_try(self, input_path: str) -> List[str]:
         # Initialize encoding to None before detection attempt
         encoding = None
 
         # Detect the file encoding
         try:
-            with open(input_path, "rb") as file:
-                raw_data = file.read()
-                detected = chardet.detect(raw_data)
-                encoding = detected["encoding"]
-                confidence = detected["confidence"]
-                logger.info(
-                    f"ImportManager.import_from_csv: Detected encoding: {encoding} with confidence: {confidence:.2%}"
-                )
+            detected = self.detect_encoding(input_path)
+            encoding = detected["encoding"]
+            confidence = detected["confidence"]
+            logger.info(
+                f"ImportManager.encodings_to_try: Detected encoding: {encoding} with confidence: {confidence:.2%}"
+            )
 
-                if confidence < 0.6:
-                    logger.warning(
-                        f"ImportManager.import_from_csv: Low confidence in encoding detection: {confidence:.2%}"
-                    )
+            if confidence < 0.6:
+                logger.warning(
+                    f"ImportManager.encodings_to_try: Low confidence in encoding detection: {confidence:.2%}"
+                )
         except Exception as e:
             logger.error(
-                f"ImportManager.import_from_csv: Error detecting file encoding: {str(e)}"
+                f"ImportManager.encodings_to_try: Error detecting file encoding: {str(e)}"
             )
             encoding = None
 
@@ -142,65 +438,55 @@ class ImportManager(QObject):
             for enc in [encoding, "utf-8", "utf-16", "iso-8859-1"]
             if enc is not None
         ]
+        return encodings_to_try
 
+    def import_from_csv(
+        self, input_path: str, encoding: Optional[str] = None, start_entry: int = 1
+    ) -> None:
+        """
+        :param encoding: Encoding pinned by the user, skips detection and fallbacks.
+        :param start_entry: Rows before it are skipped, e.g. after ImportStopped.
+        """
+        logger.info(
+            f"ImportManager.import_from_csv: Importing data from CSV file: {input_path}"
+        )
+        if input_path is None:
+            logger.error("ImportManager.import_from_csv: Input path is not set")
+            raise ValueError("Input path is not set")
+        input_path = os.path.abspath(input_path)
+
+        if encoding:
+            try:
+                codecs.lookup(encoding)
+            except LookupError:
+                raise ValueError(f"Unknown encoding: {encoding}")
+            logger.info(
+                f"ImportManager.import_from_csv: Using pinned encoding: {encoding}"
+            )
+            encodings_to_try = [encoding]
+        else:
+            encodings_to_try = self.encodings_to_try(input_path)
+
+        after_id = self.last_inserted_id()
         for enc in encodings_to_try:
+            # The encoding is checked while rows are read. A decode error before the
+            # first chunk is committed tries the next encoding, a later one stops the
+            # import with ImportStopped and keeps the committed chunks.
             try:  # Tries to read with detected encoding, fall back to common encodings if it fails
-                with open(input_path, mode="r", encoding=enc, newline="") as csv_file:
-                    reader = csv.DictReader(csv_file)
-                    data_dicts = [row for row in reader]
-                    logger.info(
-                        f"ImportManager.import_from_csv: Successfully read file with encoding: {enc}"
-                    )
-                    logger.debug(
-                        f"ImportManager.import_from_csv: Loaded {len(data_dicts)} entries from CSV"
-                    )
-
-                    required_keys = {
-                        "user_id",
-                        "fuel_type",
-                        "fuel_used",
-                        "emissions",
-                        "emissions_unit",
-                        "temperature",
-                        "farming_technique",
-                        "timestamp",
-                    }
-
-                    for row in data_dicts:
-                        missing_keys = required_keys - row.keys()
-                        if len(missing_keys) > 0:
-                            logger.error(
-                                f"ImportManager.import_from_csv: Missing required keys: {missing_keys}"
-                            )
-                            raise ValueError(f"Missing required keys: {missing_keys}")
-                        for key in required_keys:
-                            if key not in row or row[key] is None or row[key] == "":
-                                logger.error(
-                                    f"ImportManager.import_from_csv: Missing value for key: {key}"
-                                )
-                                raise ValueError(f"Missing value for key: {key}")
-
-                    # Convert data to a list of tuples
-                    data = [
-                        (
-                            int(row["user_id"]),
-                            row["fuel_type"],
-                            row["fuel_used"],
-                            row["emissions"],
-                            row["emissions_unit"],
-                            row["temperature"],
-                            row["farming_technique"],
-                            row["timestamp"],
-                        )
-                        for row in data_dicts
-                    ]
-
-                    self.insert_data(data)
-                    logger.info(
-                        f"ImportManager.import_from_csv: Data imported successfully from {input_path}"
+                with open(input_path, "rb") as raw_file:
+                    csv_file = io.TextIOWrapper(raw_file, encoding=enc, newline="")
+                    rows = islice(csv.DictReader(csv_file), start_entry - 1, None)
+                    inserted = self.insert_in_chunks(
+                        self.to_records(rows, start_entry),
+                        self.file_progress(raw_file),
+                        after_id,
+                        start_entry,
                     )
-                    self.import_completed.emit()
-                    return
+                logger.info(
+                    f"ImportManager.import_from_csv: Imported {inserted} entries from {input_path} with encoding: {enc}"
+                )
+                self.finish_import(after_id)
+                return
 
             except UnicodeDecodeError:
                 logger.warning(
@@ -211,3 +497,66 @@ class ImportManager(QObject):
         raise ValueError(
             f"Could not read file with any of the attempted encodings: {encodings_to_try}"
         )
+
+    def import_from_parquet(self, input_path: str, start_entry: int = 1) -> None:
+        """
+        Imports a Parquet file written by ExportManager.export_to_parquet.
+        :param start_entry: Rows before it are skipped, e.g. after ImportStopped.
+        """
+        import pyarrow.parquet as pq
+
+        from data.columnar_format import iter_rows
+
+        logger.info(
+            f"ImportManager.import_from_parquet: Importing data from Parquet file: {input_path}"
+        )
+        parquet_file = pq.ParquetFile(input_path)
+        total_rows = parquet_file.metadata.num_rows or 1
+        records = iter_rows(
+            parquet_file.iter_batches(batch_size=self.chunk_size),
+            self.chunk_size,
+            skip=start_entry - 1,
+        )
+        after_id = self.last_inserted_id()
+        inserted = self.insert_in_chunks(
+            records,
+            lambda done: (start_entry - 1 + done) / total_rows,
+            after_id,
+            start_entry,
+        )
+        logger.info(
+            f"ImportManager.import_from_parquet: Imported {inserted} entries from {input_path}"
+        )
+        self.finish_import(after_id)
+
+    def import_from_arrow(self, input_path: str, start_entry: int = 1) -> None:
+        """
+        Imports an Arrow IPC file written by ExportManager.export_to_arrow.
+        :param start_entry: Rows before it are skipped, e.g. after ImportStopped.
+        """
+        import pyarrow as pa
+
+        from data.columnar_format import iter_rows
+
+        logger.info(
+            f"ImportManager.import_from_arrow: Importing data from Arrow file: {input_path}"
+        )
+        after_id = self.last_inserted_id()
+        with pa.memory_map(input_path) as source:
+            reader = pa.ipc.open_file(source)
+            total_rows = reader.count_rows()
+            # Batches are decompressed one at a time as they are read
+            batches = (
+                reader.get_batch(index) for index in range(reader.num_record_batches)
+            )
+            records = iter_rows(batches, self.chunk_size, skip=start_entry - 1)
+            inserted = self.insert_in_chunks(
+                records,
+                lambda done: (start_entry - 1 + done) / (total_rows or 1),
+                after_id,
+                start_entry,
+            )
+        logger.info(
+            f"ImportManager.import_from_arrow: Imported {inserted} entries from {input_path}"
+        )
+        self.finish_import(after_id)
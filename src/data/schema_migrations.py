@@ -0,0 +1,181 @@
+import logging
+import re
+import sqlite3
+from typing import Callable, List, Optional, Tuple
+
+from data.emissions_rollups import create_rollup_tables
+
+logger = logging.getLogger("data")
+
+# Columns keep their original positions so code reading rows by index
+# (SELECT * in get_emissions_history) is unaffected, new columns are appended.
+EMISSIONS_TABLE_SCHEMA = """CREATE TABLE IF NOT EXISTS emissions
+    (user_id INTEGER, fuel_type TEXT, fuel_used REAL,
+    emissions REAL, emissions_unit TEXT, temperature REAL, farming_technique TEXT, timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+    fuel_unit TEXT, temperature_unit TEXT, id INTEGER PRIMARY KEY,
+    FOREIGN KEY(user_id) REFERENCES users(username))"""
+
+EMISSIONS_INDEXES = (
+    "CREATE INDEX IF NOT EXISTS idx_emissions_user_timestamp ON emissions (user_id, timestamp)",
+    "CREATE INDEX IF NOT EXISTS idx_emissions_fuel_unit_timestamp ON emissions (fuel_type, emissions_unit, timestamp)",
+)
+
+EMISSIONS_SORT_INDEXES = (
+    "CREATE INDEX IF NOT EXISTS idx_emissions_fuel_used ON emissions (fuel_used)",
+    "CREATE INDEX IF NOT EXISTS idx_emissions_emissions ON emissions (emissions)",
+    "CREATE INDEX IF NOT EXISTS idx_emissions_timestamp ON emissions (timestamp)",
+)
+
+TEMPERATURE_UNIT_NAMES = {"C": "Celsius", "F": "Fahrenheit", "K": "Kelvin"}
+
+_MEASUREMENT_PATTERN = re.compile(
+    r"^\s*([-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?)\s*°?\s*(.*?)\s*$"
+)
+
+MIGRATION_BATCH_SIZE = 10_000
+
+
+def split_measurement(value) -> Tuple[Optional[float], Optional[str]]:
+    """
+    Splits a stored measurement such as "12 Liters" or "20°C" into its number and unit.
+    Plain numbers are returned without a unit, unparseable values as (None, None).
+    """
+    if value is None:
+        return None, None
+    if isinstance(value, (int, float)):
+        return float(value), None
+    match = _MEASUREMENT_PATTERN.match(str(value))
+    if not match:
+        logger.warning(f"split_measurement: Could not parse measurement: {value!r}")
+        return None, None
+    number, unit = match.groups()
+    return float(number), unit or None
+
+
+def _legacy_row_to_typed(row) -> tuple:
+    (
+        user_id,
+        fuel_type,
+        fuel_used,
+        emissions,
+        emissions_unit,
+        temperature,
+        farming_technique,
+        timestamp,
+    ) = row
+    fuel_used, fuel_unit = split_measurement(fuel_used)
+    emissions, _ = split_measurement(emissions)
+    temperature, temperature_unit = split_measurement(temperature)
+    temperature_unit = TEMPERATURE_UNIT_NAMES.get(temperature_unit, temperature_unit)
+    return (
+        user_id,
+        fuel_type,
+        fuel_used,
+        fuel_unit,
+        emissions,
+        emissions_unit,
+        temperature,
+        temperature_unit,
+        farming_technique,
+        timestamp,
+    )
+
+
+def _migrate_to_typed_emissions_table(conn: sqlite3.Connection) -> None:
+    """
+    Version 1: adds the id primary key, numeric value/unit column pairs and the
+    indexes used by get_emissions_history. Existing rows are converted in place.
+    """
+    legacy_exists = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'emissions'"
+    ).fetchone()
+    if legacy_exists:
+        conn.execute("ALTER TABLE emissions RENAME TO emissions_legacy")
+    conn.execute(EMISSIONS_TABLE_SCHEMA)
+
+    if legacy_exists:
+        legacy_cursor = conn.execute(
+            """SELECT user_id, fuel_type, fuel_used, emissions, emissions_unit,
+            temperature, farming_technique, timestamp FROM emissions_legacy ORDER BY rowid"""
+        )
+        migrated = 0
+        while True:
+            rows = legacy_cursor.fetchmany(MIGRATION_BATCH_SIZE)
+            if not rows:
+                break
+            conn.executemany(
+                """INSERT INTO emissions
+                (user_id, fuel_type, fuel_used, fuel_unit, emissions, emissions_unit,
+                temperature, temperature_unit, farming_technique, timestamp)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                [_legacy_row_to_typed(row) for row in rows],
+            )
+            migrated += len(rows)
+        conn.execute("DROP TABLE emissions_legacy")
+        logger.info(
+            f"_migrate_to_typed_emissions_table: Converted {migrated} existing rows"
+        )
+
+    for statement in EMISSIONS_INDEXES:
+        conn.execute(statement)
+
+
+def _add_table_sort_indexes(conn: sqlite3.Connection) -> None:
+    """
+    Version 2: indexes the columns the General tab table sorts by. Every index
+    ends in the rowid, so it also serves ORDER BY column, id.
+    """
+    for statement in EMISSIONS_SORT_INDEXES:
+        conn.execute(statement)
+
+
+def _add_emissions_rollups(conn: sqlite3.Connection) -> None:
+    """
+    Version 3: hourly, daily and monthly emission totals per user, fuel type and
+    unit, kept up to date by triggers on the emissions table.
+    """
+    create_rollup_tables(conn)
+
+
+# Index i upgrades a database from version i to version i + 1.
+EMISSIONS_MIGRATIONS: List[Callable[[sqlite3.Connection], None]] = [
+    _migrate_to_typed_emissions_table,
+    _add_table_sort_indexes,
+    _add_emissions_rollups,
+]
+
+EMISSIONS_SCHEMA_VERSION = len(EMISSIONS_MIGRATIONS)
+
+
+def migrate_emissions_database(conn: sqlite3.Connection) -> int:
+    """
+    Brings emissions.db up to EMISSIONS_SCHEMA_VERSION. The version is tracked in
+    PRAGMA user_version and each migration runs in its own transaction.
+    :return: The schema version of the database after migrating.
+    """
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+    if version > EMISSIONS_SCHEMA_VERSION:
+        logger.warning(
+            f"migrate_emissions_database: Database schema version {version} is newer than "
+            f"supported version {EMISSIONS_SCHEMA_VERSION}"
+        )
+        return version
+
+    for target_version in range(version + 1, EMISSIONS_SCHEMA_VERSION + 1):
+        migration = EMISSIONS_MIGRATIONS[target_version - 1]
+        logger.info(
+            f"migrate_emissions_database: Migrating emissions database to version {target_version}"
+        )
+        conn.commit()  # DDL must not join an implicitly opened transaction
+        conn.execute("BEGIN")
+        try:
+            migration(conn)
+            conn.execute(f"PRAGMA user_version = {target_version}")
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            logger.error(
+                f"migrate_emissions_database: Migration to version {target_version} failed, rolled back"
+            )
+            raise
+    return EMISSIONS_SCHEMA_VERSION
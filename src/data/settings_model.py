@@ -13,6 +13,7 @@ logger = logging.getLogger("data")
 
 class SettingsModel(QObject):
     theme_changed = Signal(bool)  # True if light mode, False if dark mode.
+    emissions_modifiers_path_changed = Signal(str)
 
     def __init__(self):
         super().__init__()
@@ -21,23 +22,26 @@ class SettingsModel(QObject):
             application_path, "resources", "config", "settings.json"
         )
         self.settings_file_path.parent.mkdir(exist_ok=True)
-        self.default_settings = (
-            {  # TODO: Change these from string literals to actual json.
-                "API Keys": {
-                    "OpenWeatherMap API Key": "",
-                    "IP Geolocation API Key": "",
-                },
-                "Paths": {"emissions_modifiers_path": ""},
-                "Preferences": {
-                    "Temperature Measurement Unit": "Celsius",
-                    "Calculation Unit of Measurement": "Grams",
-                    "Language": "English",
-                    "Theme": "Light",
-                    "Use Temperature": True,
-                    "Fetch Local Temperatures On Startup": True,
-                },
-            }
-        )
+        self.default_settings = {  # TODO: Change these from string literals to actual json.
+            "API Keys": {
+                "OpenWeatherMap API Key": "",
+                "IP Geolocation API Key": "",
+            },
+            "Paths": {"emissions_modifiers_path": ""},
+            "Preferences": {
+                "Temperature Measurement Unit": "Celsius",
+                "Calculation Unit of Measurement": "Grams",
+                "Language": "English",
+                "Theme": "Light",
+                "Use Temperature": True,
+                "Fetch Local Temperatures On Startup": True,
+                # Empty detects the encoding of imported CSV files.
+                "Import Encoding": "",
+                # How long a looked up location and temperature are reused for.
+                "Location Cache Minutes": 1440,
+                "Temperature Cache Minutes": 30,
+            },
+        }
         logger.debug(
             f"SettingsModel.__init__: Initializing with settings path: {self.settings_file_path}"
         )
@@ -115,11 +119,19 @@ class SettingsModel(QObject):
         :return: Nothing
         """
         logger.debug(f"SettingsModel.update_settings: Updating settings with: {kwargs}")
+        previous_modifiers_path = self.get_setting("Paths", "emissions_modifiers_path")
         for category, settings in kwargs.items():
             if category in self.settings and isinstance(settings, dict):
                 self.settings[category].update(settings)
         self._save_settings()
 
+        modifiers_path = self.get_setting("Paths", "emissions_modifiers_path")
+        if modifiers_path != previous_modifiers_path:
+            logger.debug(
+                f"SettingsModel.update_settings: emissions_modifiers_path_changed emitting: {modifiers_path}"
+            )
+            self.emissions_modifiers_path_changed.emit(modifiers_path)
+
     def update_theme(self, **kwargs):
         """
         Updates theme,
@@ -0,0 +1,190 @@
+import logging
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+from typing import List
+
+from PySide6.QtCore import QObject, QTimer, Signal, Slot
+
+from data.connection_pool import connection_pool
+from data.emissions_changes import changed_spans, last_emissions_id
+
+logger = logging.getLogger("data")
+
+EMISSIONS_INSERT = """INSERT INTO emissions
+    (user_id, fuel_type, fuel_used, fuel_unit, emissions, emissions_unit,
+    temperature, temperature_unit, farming_technique, timestamp)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"""
+
+# Same format as SQLite's CURRENT_TIMESTAMP, which the column defaults to.
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+class WriteBehindBuffer(QObject):
+    """
+    Buffers rows for the emissions table and writes them in one transaction.
+
+    A flush happens flush_interval_ms after the first buffered row, as soon as
+    max_rows rows are waiting, or when flush() is called. flush_final() writes the
+    rows left once the calculation executor has shut down and closes the buffer.
+    Rows are timestamped when they are added, so the stored time does not depend
+    on when the buffer is flushed. A failed write is retried by the flush timer,
+    waiting twice as long after each failure, up to max_retries times in a row,
+    then the waiting rows are dropped and reported through write_failed so they
+    cannot block later rows. flush_final() retries in place instead, rows it cannot
+    write and rows added after it are dropped and reported the same way.
+    """
+
+    flushed = Signal(int, list)  # number of rows written, their EmissionsSpans
+    write_failed = Signal(int, str)  # number of rows dropped, error message
+    _flush_requested = Signal()
+    _retry_requested = Signal(int)  # milliseconds until the retry
+
+    def __init__(
+        self,
+        db_path: str,
+        flush_interval_ms: int = 250,
+        max_rows: int = 500,
+        max_retries: int = 5,
+    ):
+        super().__init__()
+        self.db_path = db_path
+        self.flush_interval_ms = flush_interval_ms
+        self.max_rows = max_rows
+        self.max_retries = max_retries
+        # Guarded by _lock, append runs in the calculation worker thread
+        self._failed_flushes = 0
+        self._closed = False
+        self._lock = threading.Lock()
+        self._rows: List[tuple] = []
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(flush_interval_ms)
+        self._timer.timeout.connect(self.flush)
+        # Routed through a signal so the timer is started from the buffer's thread
+        self._flush_requested.connect(self._start_timer)
+        self._retry_requested.connect(self._schedule_retry)
+
+    @property
+    def pending_rows(self) -> int:
+        with self._lock:
+            return len(self._rows)
+
+    def append(self, row: tuple) -> None:
+        """
+        Buffers a row in EMISSIONS_INSERT column order without its timestamp.
+        """
+        timestamp = datetime.now(timezone.utc).strftime(TIMESTAMP_FORMAT)
+        with self._lock:
+            closed = self._closed
+            if not closed:
+                self._rows.append((*row, timestamp))
+                pending = len(self._rows)
+                # While a failed write waits for its retry, the retry timer flushes
+                flush_now = pending >= self.max_rows and not self._failed_flushes
+        if closed:
+            logger.error(
+                f"WriteBehindBuffer.append: Buffer is closed, dropping row {row}"
+            )
+            self.write_failed.emit(1, "The application was closing")
+        elif flush_now:
+            self.flush()
+        elif pending == 1:
+            self._flush_requested.emit()
+
+    @Slot()
+    def _start_timer(self) -> None:
+        if not self._timer.isActive():
+            self._timer.start(self.flush_interval_ms)
+
+    @Slot(int)
+    def _schedule_retry(self, delay_ms: int) -> None:
+        self._timer.start(delay_ms)
+
+    def _write(self, rows: List[tuple]) -> list:
+        """
+        Inserts rows in one transaction.
+        :return: The EmissionsSpans of the rows.
+        """
+        with connection_pool.connection(self.db_path) as conn:
+            # Taken before MAX(id) is read, so rows another connection commits
+            # meanwhile are not reported as this batch's spans
+            conn.execute("BEGIN IMMEDIATE")
+            after_id = last_emissions_id(conn)
+            conn.executemany(EMISSIONS_INSERT, rows)
+            return changed_spans(conn, after_id)
+
+    def _drop(self, rows: List[tuple], error: str) -> None:
+        logger.error(
+            f"WriteBehindBuffer: Database error after {self.max_retries} retries, dropping {len(rows)} rows {rows}: {error}"
+        )
+        self.write_failed.emit(len(rows), error)
+
+    @Slot()
+    def flush(self) -> int:
+        """
+        Writes every buffered row in a single transaction.
+        :return: The number of rows written.
+        """
+        with self._lock:
+            rows, self._rows = self._rows, []
+        if not rows:
+            return 0
+        try:
+            spans = self._write(rows)
+        except sqlite3.Error as e:
+            with self._lock:
+                self._failed_flushes += 1
+                retry = self._failed_flushes <= self.max_retries
+                if retry:
+                    self._rows[:0] = rows
+                    delay_ms = self.flush_interval_ms * 2**self._failed_flushes
+                else:
+                    self._failed_flushes = 0
+            if not retry:
+                self._drop(rows, str(e))
+                return 0
+            logger.error(
+                f"WriteBehindBuffer.flush: Database error, retrying {len(rows)} rows in {delay_ms} ms: {e}"
+            )
+            self._retry_requested.emit(delay_ms)
+            return 0
+        with self._lock:
+            self._failed_flushes = 0
+        logger.debug(f"WriteBehindBuffer.flush: Wrote {len(rows)} rows")
+        self.flushed.emit(len(rows), spans)
+        return len(rows)
+
+    @Slot()
+    def flush_final(self) -> int:
+        """
+        Writes the buffered rows before the application closes, retrying in place
+        flush_interval_ms apart up to max_retries times as no timer runs any more.
+        Rows still not written are dropped, and the buffer is closed so rows added
+        later are dropped too. Both are reported through write_failed.
+        :return: The number of rows written.
+        """
+        self._timer.stop()
+        with self._lock:
+            self._closed = True
+            rows, self._rows = self._rows, []
+            self._failed_flushes = 0
+        if not rows:
+            return 0
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                time.sleep(self.flush_interval_ms / 1000)
+            try:
+                spans = self._write(rows)
+            except sqlite3.Error as e:
+                error = str(e)
+                logger.error(
+                    f"WriteBehindBuffer.flush_final: Database error writing {len(rows)} rows: {e}"
+                )
+                continue
+            logger.debug(f"WriteBehindBuffer.flush_final: Wrote {len(rows)} rows")
+            self.flushed.emit(len(rows), spans)
+            return len(rows)
+        self._drop(rows, error)
+        return 0
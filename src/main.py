@@ -1,8 +1,12 @@
+# Imported first so the startup trace also covers the imports below
+from utils.startup_tracer import startup_tracer  # isort: skip
+
 import logging.config
 import os
 import sys
 from datetime import datetime
 
+from PySide6.QtCore import QTimer
 from PySide6.QtWidgets import QApplication
 
 from ui.main_window import MainWindowWidget
@@ -38,7 +42,9 @@ def main():
     and then running the main window.
     """
     logger.info("Starting application")
-    app = QApplication([])
+    startup_tracer.mark("imports done")
+    with startup_tracer.phase("QApplication"):
+        app = QApplication([])
 
     # Set a reasonable number of threads in the global thread pool
     # Default is typically number of cores, but we can adjust if needed
@@ -46,6 +52,9 @@ def main():
 
     # Create and show the main window
     MainWindowWidget()
+    # Runs once the event loop has shown the window, the report itself waits for
+    # the threaded startup work
+    QTimer.singleShot(0, startup_tracer.finish)
 
     # Run the application event loop
     sys.exit(app.exec())
@@ -0,0 +1,114 @@
+import json
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger("services")
+
+
+class LookupCache:
+    """
+    Results of slow lookups (geolocation, weather) kept in a JSON file by key.
+
+    A result younger than its TTL is returned without calling fetch. An older one
+    is returned as well, stale-while-revalidate, while fetch runs again in a
+    background thread, so only a key that was never fetched waits for the network.
+    A fetch that fails or returns None keeps the stored result.
+    """
+
+    def __init__(self, path: str, clock: Callable[[], float] = time.time):
+        self.path = path
+        self.clock = clock
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._revalidating = set()
+        self._entries: Dict[str, dict] = self._load()
+
+    def _load(self) -> Dict[str, dict]:
+        try:
+            with open(self.path, "r", encoding="utf-8") as file:
+                entries = json.load(file)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            logger.warning(f"LookupCache._load: Ignoring unreadable cache file: {e}")
+            return {}
+        return entries if isinstance(entries, dict) else {}
+
+    def _save(self) -> None:
+        """Writes the entries to a temporary file and swaps it in."""
+        temporary_path = f"{self.path}.tmp"
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            with open(temporary_path, "w", encoding="utf-8") as file:
+                json.dump(self._entries, file)
+            os.replace(temporary_path, self.path)
+        except OSError as e:
+            logger.error(f"LookupCache._save: Could not write {self.path}: {e}")
+
+    def get(
+        self,
+        key: str,
+        ttl: float,
+        fetch: Callable[[], Any],
+        on_revalidated: Optional[Callable[[Any], None]] = None,
+    ) -> Any:
+        """
+        Returns the result stored for key, calling fetch only when there is none.
+        :param ttl: Seconds a result is fresh for.
+        :param fetch: Looks the result up, it must be JSON serializable.
+        :param on_revalidated: Called from the background thread with the new
+        result after a stale one was returned.
+        :raises: Whatever fetch raises when nothing is stored for key.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+            elif self.clock() - entry["stored_at"] < ttl:
+                self.hits += 1
+                return entry["value"]
+            else:
+                self.stale_hits += 1
+                self._revalidate(key, fetch, on_revalidated)
+                return entry["value"]
+
+        logger.debug(f"LookupCache.get: No result stored for {key}, fetching")
+        return self._fetch(key, fetch)
+
+    def _fetch(self, key: str, fetch: Callable[[], Any]) -> Any:
+        value = fetch()
+        if value is not None:
+            with self._lock:
+                self._entries[key] = {"value": value, "stored_at": self.clock()}
+                self._save()
+        return value
+
+    def _revalidate(self, key, fetch, on_revalidated) -> None:
+        """Fetches key again in a daemon thread, once at a time per key."""
+        if key in self._revalidating:
+            return
+        self._revalidating.add(key)
+
+        def run():
+            try:
+                value = self._fetch(key, fetch)
+                if value is not None and on_revalidated is not None:
+                    on_revalidated(value)
+            except Exception as e:
+                logger.warning(f"LookupCache: Keeping stale {key}, refresh failed: {e}")
+            finally:
+                with self._lock:
+                    self._revalidating.discard(key)
+
+        # A daemon thread, a slow lookup must not hold up closing the application
+        threading.Thread(target=run, name=f"revalidate {key}", daemon=True).start()
+        logger.debug(f"LookupCache.get: Returned stale {key}, revalidating")
+
+    def stats(self) -> Dict[str, int]:
+        """Hit, stale hit and miss counts since the cache was created."""
+        return {"hits": self.hits, "stale_hits": self.stale_hits, "misses": self.misses}
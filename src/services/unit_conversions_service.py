@@ -1,71 +1,103 @@
 import logging
+from functools import lru_cache
+from typing import Dict, Tuple
 
 logger = logging.getLogger("services")
 
+# Every unit's dimension and its size in the dimension's base unit: kilograms for
+# mass, liters for volume and megajoules for energy.
+UNIT_FACTORS: Dict[str, Tuple[str, float]] = {
+    "Milligrams": ("mass", 1e-6),
+    "Grams": ("mass", 1e-3),
+    "Kilograms": ("mass", 1.0),
+    "Metric Tons": ("mass", 1000.0),
+    "Liters": ("volume", 1.0),
+    "Cubic Meters": ("volume", 1000.0),
+    "Cubic Feet": ("volume", 28.3168),
+    "Megajoules": ("energy", 1.0),
+    "Kilowatt Hours": ("energy", 3.6),
+    "Therms": ("energy", 105.5056),
+    "British Thermal Units": ("energy", 0.001055056),
+}
+
 
 class UnitConversionsService:
     """
     A service class for converting between different units of measurement.
+
+    Conversions multiply by one factor per unit pair, taken from UNIT_FACTORS and
+    memoized, so a scalar and a NumPy array of any size convert the same way.
     """
 
-    # use this for fuels measured in mass
+    # Units emissions are calculated and stored in
+    EMISSIONS_UNITS = ("Milligrams", "Grams", "Kilograms", "Metric Tons")
+
     @staticmethod
-    def convert_mass_to_mass(fuel_value, from_unit):
+    def dimension(unit):
         """
-        Converts measurements between different units.
+        :return: "mass", "volume" or "energy".
+        :raises KeyError: If the unit is unknown.
         """
+        return UNIT_FACTORS[unit][0]
 
-        # Define conversion formulas to convert from unit to Kilograms
-        from_unit_conversion_formulas = {
-            "Milligrams": lambda x: x / 1_000_000,
-            "Grams": lambda x: x / 1000,
-            "Kilograms": lambda x: x,
-            "Metric Tons": lambda x: x * 1000,
-        }
+    @staticmethod
+    @lru_cache(maxsize=None)
+    def conversion_factor(from_unit, to_unit):
+        """
+        The factor that converts values in from_unit to to_unit.
+        :raises KeyError: If either unit is unknown.
+        :raises ValueError: If the units measure different dimensions.
+        """
+        from_dimension, from_size = UNIT_FACTORS[from_unit]
+        to_dimension, to_size = UNIT_FACTORS[to_unit]
+        if from_dimension != to_dimension:
+            raise ValueError(
+                f"Cannot convert {from_unit} ({from_dimension}) to {to_unit} ({to_dimension})"
+            )
+        # Dividing keeps exact factors exact, 1 kilogram is 1 / 1e-6 milligrams
+        factor = from_size / to_size
+        logger.debug(f"UnitConversionsService: 1 {from_unit} is {factor} {to_unit}")
+        return factor
 
-        converted_value = from_unit_conversion_formulas[from_unit](fuel_value)
-        # Convert the fuel_value to liters
-        logger.debug(f"Converting {fuel_value} {from_unit} to {converted_value} liters")
-        return converted_value
+    @staticmethod
+    def convert(values, from_unit, to_unit):
+        """
+        Converts values from from_unit to to_unit with one multiplication, values
+        may be a number or a NumPy array.
+        """
+        return values * UnitConversionsService.conversion_factor(from_unit, to_unit)
+
+    # use this for fuels measured in mass
+    @staticmethod
+    def convert_mass_to_mass(fuel_value, from_unit):
+        """
+        Converts a mass to kilograms.
+        """
+        return UnitConversionsService.convert(fuel_value, from_unit, "Kilograms")
 
     # use this for fuels measured in volume (natural gas, gasoline, etc.)
     @staticmethod
     def convert_volume_to_volume(fuel_value, from_unit):
         """
-        Converts measurements between different units.
+        Converts a volume to liters.
         """
-
-        # Define conversion formulas to convert from unit to liters
-        from_unit_conversion_formulas = {
-            "Cubic Meters": lambda x: x * 1000,
-            "Liters": lambda x: x,
-            "Cubic Feet": lambda x: x * 28.3168,
-        }
-
-        # Convert the fuel_value to liters
-        logger.debug(f"Converting {fuel_value} {from_unit} to liters")
-        converted_value = from_unit_conversion_formulas[from_unit](fuel_value)
-        return converted_value
+        return UnitConversionsService.convert(fuel_value, from_unit, "Liters")
 
     @staticmethod
     def convert_calculation_result_to_desired_unit(
         calculation_result, calculation_unit
     ):
         """
-        Converts the result of the calculation to the desired unit.
+        Converts the result of the calculation, in kilograms, to the desired unit.
         """
-        # Define conversion formulas to convert from Kilogram to desired unit
-        from_unit_conversion_formulas = {
-            "Milligrams": lambda x: x * 1_000_000,
-            "Grams": lambda x: x * 1000,
-            "Kilograms": lambda x: x,
-            "Metric Tons": lambda x: x / 1000,
-        }
-
-        converted_emissions_result = from_unit_conversion_formulas[calculation_unit](
-            calculation_result
-        )
-        logger.debug(
-            f"Converting {calculation_result} Kilograms to {converted_emissions_result} {calculation_unit}"
+        return UnitConversionsService.convert(
+            calculation_result, "Kilograms", calculation_unit
         )
-        return converted_emissions_result
+
+    @staticmethod
+    def scale_kilograms_to_unit(kilograms, emissions_unit):
+        """
+        Converts emissions in kilograms to emissions_unit with one multiplication,
+        so kilograms may be a NumPy array.
+        """
+        return UnitConversionsService.convert(kilograms, "Kilograms", emissions_unit)
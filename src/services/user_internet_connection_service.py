@@ -1,11 +1,12 @@
 import logging
 
-import requests
-
 logger = logging.getLogger("services")
 
 
 def user_internet_connection_check():
+    # Imported here so startup does not wait for requests
+    import requests
+
     logger.info("Testing internet connection")
     try:
         response = requests.get("https://www.google.com/", timeout=5)
@@ -1,7 +1,5 @@
 import logging
 
-import ipinfo
-
 logger = logging.getLogger("services")
 
 
@@ -13,6 +11,9 @@ class UserLocationService:
         self.access_token = access_token
 
     def get_user_location(self) -> tuple[float, float] | None:
+        # Imported here, ipinfo pulls in aiohttp and is slow to import
+        import ipinfo
+
         logger.info("Getting user location")
         handler = ipinfo.getHandler(self.access_token)
         try:
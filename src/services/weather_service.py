@@ -1,7 +1,5 @@
 import logging
 
-import requests
-
 # EDIT THIS FILE IF YOU NEED TO ALTER THE WEATHER SERVICE
 
 # Weather Service object that has a get_weather method
@@ -16,6 +14,9 @@ class WeatherService:
     def get_weather_data(
         self, latitude=None, longitude=None
     ) -> tuple[float, float, float] | None:
+        # Imported here so startup does not wait for requests
+        import requests
+
         logger.info("Fetching weather data")
         url = f"https://api.openweathermap.org/data/2.5/weather?lat={latitude}&lon={longitude}&appid={self.api_key}"
         try:
@@ -1,15 +1,19 @@
 import logging
 import os
+import sqlite3
 from dataclasses import dataclass, field
 from typing import Dict, List, Optional, Tuple
 
 from PySide6.QtCore import QObject, Qt, QTimer, Signal
-from PySide6.QtSql import QSqlDatabase, QSqlTableModel
 from PySide6.QtWidgets import QApplication, QFileDialog, QStyle, QTableView, QWidget
 
 from data.database_model import databases_folder
-from data.export_manager import ExportManager
-from data.import_manager import ImportManager
+from data.emissions_table_model import (
+    SORTABLE_COLUMNS,
+    TABLE_COLUMNS,
+    EmissionsTableModel,
+)
+from services.lookup_cache import LookupCache
 from services.user_internet_connection_service import user_internet_connection_check
 from services.user_location_service import UserLocationService
 from services.weather_service import WeatherService
@@ -19,10 +23,41 @@ from utils.gui_utilities import connect_threaded
 
 logger = logging.getLogger("ui")
 
+# Minutes a looked up location and temperature are reused for, unless set in the
+# Preferences.
+DEFAULT_LOCATION_CACHE_MINUTES = 24 * 60
+DEFAULT_TEMPERATURE_CACHE_MINUTES = 30
+
+DATA_FILE_FILTERS = (
+    "CSV Files (*.csv);;JSON Files (*.json);;JSON Lines Files (*.jsonl);;"
+    "Parquet Files (*.parquet);;Arrow IPC Files (*.arrow *.feather)"
+)
+DATA_FILE_EXTENSIONS = {
+    "csv": "csv",
+    "json": "json",
+    "jsonl": "jsonl",
+    "parquet": "parquet",
+    "arrow": "arrow",
+    "feather": "arrow",
+}
+# Checked in order, "json lines" before "json".
+DATA_FILE_FILTER_TYPES = (
+    ("json lines", "jsonl"),
+    ("json", "json"),
+    ("csv", "csv"),
+    ("parquet", "parquet"),
+    ("arrow", "arrow"),
+)
+
+# Rows measured per column by resizeColumnsToContents on the database table.
+COLUMN_SIZE_SAMPLE_ROWS = 200
+
 
 class GeneralTabController(QObject):
     calculation_requested = Signal(int, str, float, float, str, str)
     combobox_information = Signal(dict)
+    import_requested = Signal(str, str)
+    export_requested = Signal(str, str)
 
     def __init__(
         self,
@@ -35,6 +70,8 @@ class GeneralTabController(QObject):
         self.view: "GeneralTabView" = view
         self.application_controller = application_controller
         self.settingsWidget = None
+        # Set once combobox_information was emitted, for tabs built after that
+        self.comboboxes_initialized = False
         self.__connect_signals()
 
     def __connect_signals(self) -> None:
@@ -52,6 +89,12 @@ class GeneralTabController(QObject):
             self.handle_real_time_temperatures_check_box_changed
         )
         self.view.importPushButton.clicked.connect(self.handle_import_button_clicked)
+        # Imports stream large files, so they run off the GUI thread.
+        connect_threaded(self, "import_requested", self.handle_import_requested)
+        connect_threaded(self, "export_requested", self.handle_export_requested)
+        import_manager = self.model.application_model.import_manager
+        import_manager.import_completed.connect(self.handle_database_widget_update)
+        import_manager.import_stopped.connect(self.handle_database_widget_update)
         self.view.exportPushButton.clicked.connect(self.handle_export_button_clicked)
         self.view.settingsPushButton.clicked.connect(
             self.handle_settings_button_clicked
@@ -78,10 +121,13 @@ class GeneralTabController(QObject):
             "initialization",
             self.handle_real_time_temperatures_api_call,
         )
-        connect_threaded(
-            self.application_controller,
-            "application_closed",
-            self.handle_application_close,
+        calculation_executor = self.model.application_model.calculation_executor
+        calculation_executor.calculation_rejected.connect(
+            self.handle_calculation_rejected
+        )
+        calculation_executor.calculation_failed.connect(self.handle_calculation_failed)
+        self.model.databases_model.emissions_write_buffer.write_failed.connect(
+            self.handle_calculation_save_failed
         )
 
     def handle_progress_update(self, percentage: int, message: str) -> None:
@@ -111,53 +157,94 @@ class GeneralTabController(QObject):
         )
         input_path, file_type = self.view.get_import_file_path()
         if file_type:
-            logger.debug(f"GeneralTabWidget: importing {file_type} file")
+            self.import_requested.emit(input_path, file_type)
+
+    def handle_import_requested(self, input_path: str, file_type: str) -> None:
+        logger.debug(f"GeneralTabWidget: importing {file_type} file")
+        import_manager = self.model.application_model.import_manager
+        try:
             if file_type == "json":
-                import_manager = ImportManager()
                 import_manager.import_from_json(input_path)
-                self.view.update_database_table()
+            elif file_type == "jsonl":
+                import_manager.import_from_jsonl(input_path)
+            elif file_type == "parquet":
+                import_manager.import_from_parquet(input_path)
+            elif file_type == "arrow":
+                import_manager.import_from_arrow(input_path)
             elif file_type == "csv":
-                import_manager = ImportManager()
-                import_manager.import_from_csv(input_path)
-                self.view.update_database_table()
+                import_manager.import_from_csv(
+                    input_path,
+                    encoding=self.model.settings_model.get_setting(
+                        "Preferences", "Import Encoding"
+                    ),
+                )
             else:
                 logger.error("GeneralTabWidget: Unsupported file type")
+        except (OSError, ValueError, sqlite3.Error) as e:
+            # sqlite3.Error is raised before the first chunk, later ones stop the
+            # import with ImportStopped
+            logger.error(f"GeneralTabWidget: import of {input_path} failed: {e}")
+            self.application_controller.update_progress(0, f"Import failed: {e}")
 
     def handle_export_button_clicked(self) -> None:
         logger.debug(
             "GeneralTabController.handle_export_button_clicked: Export button clicked"
         )
-        output_path, selected_filter = self.view.get_export_file_path()
+        output_path, file_type = self.view.get_export_file_path()
         if output_path:
-            logger.debug(f"GeneralTabWidget: exporting {selected_filter} file")
-            if selected_filter == "json":
-                export_manager = ExportManager()
-                export_manager.export_to_json(output_path)
-            elif selected_filter == "csv":
-                export_manager = ExportManager()
-                export_manager.export_to_csv(output_path)
-            else:
-                logger.error("GeneralTabWidget: Unsupported file type")
+            self.export_requested.emit(output_path, file_type)
+
+    def handle_export_requested(self, output_path: str, file_type: str) -> None:
+        logger.debug(f"GeneralTabWidget: exporting {file_type} file")
+        export_manager = self.model.application_model.export_manager
+        exporters = {
+            "json": export_manager.export_to_json,
+            "jsonl": export_manager.export_to_jsonl,
+            "csv": export_manager.export_to_csv,
+            "parquet": export_manager.export_to_parquet,
+            "arrow": export_manager.export_to_arrow,
+        }
+        if file_type not in exporters:
+            logger.error("GeneralTabWidget: Unsupported file type")
+            return
+        reported_errors = (ValueError, sqlite3.Error)
+        if file_type in ("parquet", "arrow"):
+            # Imported here so pyarrow stays unloaded unless a columnar export runs
+            import pyarrow as pa
+
+            reported_errors += (pa.ArrowException,)
+        try:
+            exporters[file_type](output_path)
+        except OSError as e:
+            logger.error(f"GeneralTabWidget: export to {output_path} failed: {e}")
+            self.application_controller.update_progress(0, "Export failed")
+        except reported_errors as e:
+            logger.error(f"GeneralTabWidget: export to {output_path} failed: {e}")
+            self.application_controller.update_progress(0, f"Export failed: {e}")
 
     def handle_initialization_of_database_widget(self) -> None:
         self.model.load_database_table_content()
         self.view.load_database_table()
 
+    def get_combobox_information(self) -> dict:
+        """The combobox values sent with combobox_information."""
+        combobox_data = self.model.combobox_data
+        return {
+            "fuel_types": combobox_data.fuel_types,
+            "farming_techniques": combobox_data.farming_techniques,
+            "fuel_type_units": combobox_data.fuel_type_units,
+            "calculation_units": combobox_data.calculation_units,
+            "temperature_types": combobox_data.temperature_types,
+        }
+
     def handle_comboboxes_initialization(self) -> None:
         logger.debug(
             "GeneralTabController.handle_comboboxes_initialization: Initializing comboboxes"
         )
         combobox_data = self.model.combobox_data
 
-        self.combobox_information.emit(
-            {
-                "fuel_types": combobox_data.fuel_types,
-                "farming_techniques": combobox_data.farming_techniques,
-                "fuel_type_units": combobox_data.fuel_type_units,
-                "calculation_units": combobox_data.calculation_units,
-                "temperature_types": combobox_data.temperature_types,
-            }
-        )
+        self.comboboxes_initialized = True
+        self.combobox_information.emit(self.get_combobox_information())
         logger.debug(
             "GeneralTabController.handle_comboboxes_initialization: Emitted combobox_information"
         )
@@ -183,20 +270,32 @@ class GeneralTabController(QObject):
             farming_technique,
             calculation_unit,
         ) = self.view.get_calculation_info(self.model.real_time_temp_data)
-        self.model.calculation_model.calculate_emissions(  # ? We could probably change this to a signal.
-            user_id,
-            fuel_type,
-            fuel_unit,
-            amount_of_fuel_used,
+        self.model.application_model.calculation_executor.submit(
+            user_id=user_id,
+            fuel_type=fuel_type,
+            fuel_unit=fuel_unit,
+            fuel_used=amount_of_fuel_used,
             temperature=temperature_value,
             temperature_type=temperature_type,
             farming_technique=farming_technique,
             calculation_unit=calculation_unit,
         )
 
-    def handle_application_close(self) -> None:
-        logger.debug("GeneralTabWidget: closing database connection")
-        self.view.close_database_on_application_close()
+    def handle_calculation_rejected(self, reason: str) -> None:
+        logger.warning(f"GeneralTabWidget: calculation rejected: {reason}")
+        self.application_controller.update_progress(
+            0, f"Calculation not started: {reason}"
+        )
+
+    def handle_calculation_failed(self, job_id: int, message: str) -> None:
+        logger.error(f"GeneralTabWidget: calculation {job_id} failed: {message}")
+        self.application_controller.update_progress(0, f"Calculation failed: {message}")
+
+    def handle_calculation_save_failed(self, row_count: int, message: str) -> None:
+        logger.error(f"GeneralTabWidget: {row_count} calculations not saved: {message}")
+        self.application_controller.update_progress(
+            0, f"{row_count} calculations could not be saved: {message}"
+        )
 
     def handle_database_widget_update(self) -> None:
         logger.debug("GeneralTabWidget: updating database view")
@@ -233,16 +332,8 @@ class GeneralTabController(QObject):
             self.settingsWidget.view.setWindowFlags(Qt.Dialog)
             self.settingsWidget.view.setWindowModality(Qt.WindowModal)
 
-            combobox_data = self.model.combobox_data
-            combobox_information = {
-                "fuel_types": combobox_data.fuel_types,
-                "farming_techniques": combobox_data.farming_techniques,
-                "fuel_type_units": combobox_data.fuel_type_units,
-                "calculation_units": combobox_data.calculation_units,
-                "temperature_types": combobox_data.temperature_types,
-            }
             self.settingsWidget.controller.handle_initialization_of_settings(
-                combobox_information
+                self.get_combobox_information()
             )
 
         # Position dialog centered on parent
@@ -309,6 +400,9 @@ class GeneralTabModel:
         self.settings_model = self.application_model.settings_model
         self.real_time_temp_data = None
         self.combobox_data = self.ComboBoxData()
+        self.lookup_cache = LookupCache(
+            os.path.join(databases_folder, "lookup_cache.json")
+        )
 
     def populate_combobox_dataclass(self):
         try:
@@ -325,6 +419,11 @@ class GeneralTabModel:
         pass
 
     def load_real_time_temperature_data(self) -> None:
+        """
+        Loads the temperature at the user's location. The location and the
+        temperature come from the lookup cache, so only a first launch, or one
+        after clearing the cache, waits for the network.
+        """
         ipinfo_user_key = self.settings_model.get_api_key("IP Geolocation API Key")
         open_weather_map_user_key = self.settings_model.get_api_key(
             "OpenWeatherMap API Key"
@@ -333,16 +432,48 @@ class GeneralTabModel:
         if open_weather_map_user_key is None:
             raise ValueError("User does not have necessary API keys set.")
 
-        if user_internet_connection_check():
-            latitude, longitude = UserLocationService(
-                ipinfo_user_key
-            ).get_user_location()
-            temperature_data = WeatherService(
-                open_weather_map_user_key
-            ).get_weather_data(latitude, longitude)
-            self.real_time_temp_data = temperature_data
-        else:
-            raise ConnectionError("Unable to find internet connection.")
+        def fetch_location():
+            if not user_internet_connection_check():
+                raise ConnectionError("Unable to find internet connection.")
+            location = UserLocationService(ipinfo_user_key).get_user_location()
+            # ipinfo returns the coordinates as strings, (None, None) if unknown
+            if location is None or None in location:
+                raise ConnectionError("Unable to find user location.")
+            try:
+                return [float(coordinate) for coordinate in location]
+            except (TypeError, ValueError):
+                raise ConnectionError(f"Invalid user location: {location}")
+
+        latitude, longitude = self.lookup_cache.get(
+            "location",
+            self._cache_minutes(
+                "Location Cache Minutes", DEFAULT_LOCATION_CACHE_MINUTES
+            )
+            * 60,
+            fetch_location,
+        )
+        # Rounded to about a kilometer, the temperature is the same nearby
+        self.real_time_temp_data = self.lookup_cache.get(
+            f"temperature {latitude:.2f},{longitude:.2f}",
+            self._cache_minutes(
+                "Temperature Cache Minutes", DEFAULT_TEMPERATURE_CACHE_MINUTES
+            )
+            * 60,
+            lambda: WeatherService(open_weather_map_user_key).get_weather_data(
+                latitude, longitude
+            ),
+            on_revalidated=self._set_real_time_temp_data,
+        )
+        logger.debug(
+            f"GeneralTabModel.load_real_time_temperature_data: Lookup cache {self.lookup_cache.stats()}"
+        )
+
+    def _set_real_time_temp_data(self, temperature_data) -> None:
+        self.real_time_temp_data = temperature_data
+
+    def _cache_minutes(self, setting_name, default):
+        minutes = self.settings_model.get_setting("Preferences", setting_name)
+        return default if minutes is None else minutes
 
 
 class GeneralTabView(QWidget, Ui_GeneralWidget):
@@ -351,8 +482,7 @@ class GeneralTabView(QWidget, Ui_GeneralWidget):
         super().__init__()
         self.setupUi(self)
         self.database_loaded: bool = False
-        self.db_connection = None
-        self.sql_widget_model = None
+        self.emissions_table_model: Optional[EmissionsTableModel] = None
 
     def update_progress_status(self, percentage: int, message: str) -> None:
         self.progressBar.setValue(percentage)
@@ -367,51 +497,48 @@ class GeneralTabView(QWidget, Ui_GeneralWidget):
     def load_database_table(self) -> None:
         if not self.database_loaded:
             logger.info("Loading database table")
-            # Set up database connection
-            self.db_connection = QSqlDatabase.addDatabase("QSQLITE")
             db_path = os.path.join(databases_folder, "emissions.db")
-            self.db_connection.setDatabaseName(db_path)
-
-            if not self.db_connection.open():
-                logger.error(
-                    f"Failed to open database: {self.db_connection.lastError().text()}"
-                )
-                return
-
-            # Create and configure the model
-            self.sql_widget_model = QSqlTableModel(self, self.db_connection)
-            self.sql_widget_model.setTable("emissions")
-
-            # Check if select() succeeded
-            if not self.sql_widget_model.select():
-                logger.error(
-                    f"Failed to select data: {self.sql_widget_model.lastError().text()}"
-                )
-                return
-
-            if hasattr(self, "sqlTableView"):
-                self.sqlTableView.setEditTriggers(QTableView.NoEditTriggers)
-                # Explicitly set the model after select() has completed
-                self.sqlTableView.setModel(self.sql_widget_model)
-
-                # Make sure columns are visible
-                self.sqlTableView.horizontalHeader().setVisible(True)
-                self.sqlTableView.resizeColumnsToContents()
-
-                # Check row count for debugging
-                row_count = self.sql_widget_model.rowCount()
-                logger.info(f"Loaded {row_count} rows from emissions table")
+            self.emissions_table_model = EmissionsTableModel(db_path, parent=self)
+
+            self.sqlTableView.setEditTriggers(QTableView.NoEditTriggers)
+            self.sqlTableView.setModel(self.emissions_table_model)
+            self.sqlTableView.horizontalHeader().setVisible(True)
+            # No sort indicator, the table starts in id order
+            self.sqlTableView.horizontalHeader().setSortIndicator(-1, Qt.AscendingOrder)
+            self.sqlTableView.setSortingEnabled(True)
+            self.sqlTableView.horizontalHeader().sortIndicatorChanged.connect(
+                self.handle_database_table_sort
+            )
+            self.sqlTableView.verticalScrollBar().valueChanged.connect(
+                self.prefetch_visible_rows
+            )
+            self.resize_database_table_columns()
 
-            else:
-                logger.error("sqlTableView not found in UI")
+            row_count = self.emissions_table_model.rowCount()
+            logger.info(f"Loaded {row_count} rows from emissions table")
             self.database_loaded = True
         else:
             logger.debug("Database already loaded, skipping")
 
-    def close_database_on_application_close(self) -> None:
-        logger.info("closing database connection.")
-        if self.db_connection and self.db_connection.isOpen():
-            self.db_connection.close()
+    def handle_database_table_sort(self, section: int, order: Qt.SortOrder) -> None:
+        # The model only sorts by indexed columns, clear the indicator for others
+        if section >= 0 and TABLE_COLUMNS[section] not in SORTABLE_COLUMNS:
+            self.sqlTableView.horizontalHeader().setSortIndicator(-1, order)
+
+    def prefetch_visible_rows(self) -> None:
+        viewport_height = self.sqlTableView.viewport().height()
+        first_row = max(self.sqlTableView.rowAt(0), 0)
+        last_row = self.sqlTableView.rowAt(viewport_height - 1)
+        if last_row < 0:
+            last_row = self.emissions_table_model.rowCount() - 1
+        self.emissions_table_model.prefetch(first_row, last_row)
+
+    def resize_database_table_columns(self) -> None:
+        # Size columns from a sample of rows instead of reading every row
+        self.sqlTableView.horizontalHeader().setResizeContentsPrecision(
+            COLUMN_SIZE_SAMPLE_ROWS
+        )
+        self.sqlTableView.resizeColumnsToContents()
 
     def initialize_combobox_values(
         self,
@@ -470,11 +597,14 @@ class GeneralTabView(QWidget, Ui_GeneralWidget):
         )
 
     def update_database_table(self) -> None:
-        if self.sql_widget_model:
-            self.sql_widget_model.select()
-            self.sqlTableView.resizeColumnsToContents()
+        if self.emissions_table_model:
+            was_empty = self.emissions_table_model.rowCount() == 0
+            added_rows = self.emissions_table_model.refresh()
+            # Columns are sized once, unless the table was empty when it was loaded
+            if was_empty and added_rows:
+                self.resize_database_table_columns()
 
-            logger.info(f"Table updated with {self.sql_widget_model.rowCount()} rows")
+            logger.info(f"Table updated with {added_rows} new rows")
 
     def fuel_unit_suffix_update(self, fuel_unit: str) -> None:
         fuel_unit_suffixes: Dict[str, str] = {
@@ -491,40 +621,40 @@ class GeneralTabView(QWidget, Ui_GeneralWidget):
             self,
             "Select file",
             os.path.expanduser("~"),
-            "CSV Files (*.csv);;JSON Files (*.json)",
+            DATA_FILE_FILTERS,
         )
 
         if not input_path:
             return None, None
 
-        if input_path.lower().endswith(".json") or "json" in selected_filter.lower():
-            file_type = "json"
-        elif input_path.lower().endswith(".csv") or "csv" in selected_filter.lower():
-            file_type = "csv"
-        else:
-            file_type = None
+        return input_path, self.data_file_type(input_path, selected_filter)
 
-        return input_path, file_type
+    @staticmethod
+    def data_file_type(path: str, selected_filter: str) -> Optional[str]:
+        """
+        Maps a chosen file to "csv", "json", "jsonl", "parquet" or "arrow",
+        by its extension first and by the selected dialog filter otherwise.
+        """
+        extension = os.path.splitext(path)[1].lower().lstrip(".")
+        if extension in DATA_FILE_EXTENSIONS:
+            return DATA_FILE_EXTENSIONS[extension]
+        for filter_name, file_type in DATA_FILE_FILTER_TYPES:
+            if filter_name in selected_filter.lower():
+                return file_type
+        return None
 
     def get_export_file_path(self) -> Tuple[Optional[str], Optional[str]]:
         output_path, selected_filter = QFileDialog.getSaveFileName(
             self,
             "Select file",
             os.path.expanduser("~"),
-            "CSV Files (*.csv);;JSON Files (*.json)",
+            DATA_FILE_FILTERS,
         )
 
         if not output_path:
             return None, None
 
-        if output_path.lower().endswith(".json") or "json" in selected_filter.lower():
-            file_type = "json"
-        elif output_path.lower().endswith(".csv") or "csv" in selected_filter.lower():
-            file_type = "csv"
-        else:
-            file_type = None
-
-        return output_path, file_type
+        return output_path, self.data_file_type(output_path, selected_filter)
 
     def apply_user_preferences(self, user_preferences: List):
         (
@@ -1,15 +1,21 @@
 import logging
 
-import pandas as pd
+import numpy as np
 from pyqtgraph import DateAxisItem, mkPen
 from PySide6.QtCore import QObject
 from PySide6.QtGui import QFont
 from PySide6.QtWidgets import QWidget
 
+from services.unit_conversions_service import UnitConversionsService
 from ui.generated_python_ui.ui_visualizationTabWidget import Ui_visualizationTab
+from utils.downsampling import MinMaxPyramid
+from utils.series_cache import SeriesCache
 
 logger = logging.getLogger("ui")
 
+# Points drawn per horizontal pixel of the chart, a min and a max.
+POINTS_PER_PIXEL = 2
+
 
 class VisualizationTabController(QObject):
 
@@ -45,11 +51,10 @@ class VisualizationTabController(QObject):
 
         # Connect UI signals
         self.__connect_signals()
+        self.__apply_application_state()
 
     def __connect_signals(self):
-        self.model.databases_model.calculation_logged.connect(
-            self._handle_pending_update
-        )
+        self.model.databases_model.calculation_logged.connect(self._handle_rows_added)
         self.application_controller.tab_changed.connect(self._handle_tab_changed)
 
         self.application_controller.view.GeneralTabWidget.controller.combobox_information.connect(
@@ -60,9 +65,9 @@ class VisualizationTabController(QObject):
             self.view.set_background_for_plot
         )
 
-        self.application_controller.model.import_manager.import_completed.connect(
-            self._handle_pending_update
-        )
+        import_manager = self.application_controller.model.import_manager
+        import_manager.import_completed.connect(self._handle_rows_added)
+        import_manager.import_stopped.connect(self._handle_import_stopped)
 
         # NOTE: Please keep the order of these signals because they rely on the sequence in which they are connected.
         # and I'm not gonna lie I really don't know why but IT WILL GET FIXED.. I promise.
@@ -84,6 +89,22 @@ class VisualizationTabController(QObject):
             self._handle_time_changed
         )
 
+    def __apply_application_state(self):
+        """
+        Applies the theme and combobox values set up before this tab was built,
+        the signals carrying them were emitted during startup.
+        """
+        theme = self.model.settings_model.get_setting("Preferences", "Theme")
+        self.view.set_background_for_plot(theme == "Light")
+
+        general_controller = (
+            self.application_controller.view.GeneralTabWidget.controller
+        )
+        if general_controller.comboboxes_initialized:
+            self._handle_initialization_of_settings_comboboxes(
+                general_controller.get_combobox_information()
+            )
+
     def _handle_translate_widget(self):
         self.view.apply_translation()
 
@@ -156,10 +177,7 @@ class VisualizationTabController(QObject):
 
         try:
             # Get data for this user with caching
-            data = self._get_emissions_data(user_id=self.user_id)
-
-            # Transform to pandas DataFrame for plotting
-            data_frame = self._transform_data_to_dataframe(data)
+            data_frame = self._get_emissions_data(user_id=self.user_id)
 
             # Get existing color or use a new one
             color = self.view.color_cache.get(self.user_id)
@@ -175,13 +193,9 @@ class VisualizationTabController(QObject):
     def _plot_multiple_users_data(self):
         """Plot emissions data for all users."""
         logger.debug("Visualization Tab Controller: no user id selected")
-        user_ids = self.model.databases_model.get_all_user_ids()
-
-        for user_id in user_ids:
-            # Check if we need to update this user's data based on filter changes
-            data = self._get_emissions_data(user_id=user_id)
-            data_frame = self._transform_data_to_dataframe(data)
+        data_frames = self._get_all_users_emissions_data()
 
+        for user_id, data_frame in data_frames.items():
             # Use existing color if available
             color = self.view.color_cache.get(user_id, None)
             if not color:
@@ -204,78 +218,68 @@ class VisualizationTabController(QObject):
             self.view.show_plot(user_id)
 
     def _get_emissions_data(self, user_id):
-        """Get emission data with caching"""
-        # Ensure user_id is a string for consistent cache keys
-        cache_key = (user_id, self.fuel_type, self.emissions_unit)
-        # Check if we have cached data
-        if cache_key in self.model.data_cache:
-            logger.debug(f"Visualization Tab Controller: Cache hit for user {user_id}")
-            return self.model.data_cache[cache_key]
-
-        logger.debug(
-            f"Visualization Tab Controller: Cache miss for user {user_id}, fetching data"
+        """Get emission data, only fetching the parts of the time range not cached"""
+        import pandas as pd
+
+        columns = self.model.get_series((user_id, self.fuel_type), *self._time_range())
+        return pd.DataFrame(
+            {
+                "time": columns["time"],
+                "emissions": UnitConversionsService.scale_kilograms_to_unit(
+                    columns["emissions"], self.emissions_unit
+                ),
+            }
         )
 
-        # No cache hit, fetch from a database
-        date_time_format = "yyyy-MM-dd HH:mm:ss"
-
-        # Safely handle potentially None datetime values
-        start_time_str = (
-            self.start_time.toString(date_time_format) if self.start_time else ""
+    def _get_all_users_emissions_data(self):
+        """Get every user's emission data, one query per uncached part of the range"""
+        columns = self.model.get_series((None, self.fuel_type), *self._time_range())
+        return self._split_data_by_user(
+            {
+                **columns,
+                "emissions": UnitConversionsService.scale_kilograms_to_unit(
+                    columns["emissions"], self.emissions_unit
+                ),
+            }
         )
-        end_time_str = self.end_time.toString(date_time_format) if self.end_time else ""
-
-        data = self.model.databases_model.get_emissions_history(
-            time_frame=[start_time_str, end_time_str],
-            emissions_unit=self.emissions_unit,
-            fuel_type=self.fuel_type,
-            user_id=user_id,
-        )
-
-        # Cache the result
-        self.model.data_cache[cache_key] = data
-
-        # Update the cached time range
-        if not hasattr(self.model, "cached_time_range"):
-            self.model.cached_time_range = (self.start_time, self.end_time)
-        else:
-            # Expand the cached range if needed
-            current_start, current_end = self.model.cached_time_range
-            new_start = (
-                min(self.start_time, current_start)
-                if self.start_time and current_start
-                else (self.start_time or current_start)
-            )
-            new_end = (
-                max(self.end_time, current_end)
-                if self.end_time and current_end
-                else (self.end_time or current_end)
-            )
-            self.model.cached_time_range = (new_start, new_end)
 
-        return data
-
-    @staticmethod
-    def _transform_data_to_dataframe(data_points):
+    def _time_range(self):
         """
-        Transform raw emission data into a pandas DataFrame for plotting.
-        :param data_points: X and Y data points. (Emissions over Time)
-        :return: nothing
+        The selected time frame in epoch seconds as a half-open range, the end
+        second is included.
         """
+        return self.start_time.toSecsSinceEpoch(), self.end_time.toSecsSinceEpoch() + 1
 
-        emissions = []
-        timestamps = []
-
-        for data_point in data_points:
-            # convert time to int
-            timestamp_str = data_point[7]
-            timestamp_dt = pd.to_datetime(timestamp_str)
-            timestamp_num = timestamp_dt.timestamp()
-
-            emissions.append(data_point[3])
-            timestamps.append(timestamp_num)
-
-        return pd.DataFrame({"time": timestamps, "emissions": emissions})
+    @staticmethod
+    def _split_data_by_user(columns):
+        """
+        Split time ordered user_id, time and emissions columns into one DataFrame
+        per user.
+        :param columns: Columns of all users' points.
+        :return: Dict of user id (as a string) to DataFrame
+        """
+        import pandas as pd
+
+        if not len(columns["user_id"]):
+            return {}
+        # A stable sort by user keeps every user's points in time order
+        order = np.argsort(columns["user_id"], kind="stable")
+        user_ids = columns["user_id"][order]
+        times = columns["time"][order]
+        emissions = columns["emissions"][order]
+
+        # Every change of user id starts a new series
+        starts = np.flatnonzero(user_ids[1:] != user_ids[:-1]) + 1
+        return {
+            str(user_id): pd.DataFrame(
+                {"time": user_times, "emissions": user_emissions}
+            )
+            for user_id, user_times, user_emissions in zip(
+                user_ids[np.r_[0, starts]],
+                np.split(times, starts),
+                np.split(emissions, starts),
+            )
+        }
 
     def _handle_tab_changed(self, index):
         """
@@ -286,11 +290,27 @@ class VisualizationTabController(QObject):
         ):  # this is the position of the visualization tab on the stacked widget
             self._handle_update_plot()
 
-    def _handle_pending_update(self):
+    def _handle_rows_added(self, spans):
         """
-        Handles changing update state for plot
+        Adds logged or imported rows to the cached series they belong to and marks
+        the plot for an update if any of them gained points.
+        :param spans: EmissionsSpans of the added rows
         """
-        logger.debug("Visualization Tab Controller: Pending update.")
+        if self.model.add_rows(spans):
+            logger.debug("Visualization Tab Controller: Pending update.")
+            self.update_pending = True
+
+    def _handle_import_stopped(self, spans):
+        """
+        Drops the cached series of the fuel types an import stopped in, or every
+        series if the rows it committed are not known.
+        :param spans: EmissionsSpans of the rows committed before the import stopped
+        """
+        fuel_types = {span.fuel_type for span in spans}
+        if not fuel_types:
+            self.model.invalidate_data_cache()
+        for fuel_type in fuel_types:
+            self.model.invalidate_data_cache(fuel_type=fuel_type)
         self.update_pending = True
 
     def _handle_initialization_of_settings_comboboxes(self, combobox_information):
@@ -333,11 +353,10 @@ class VisualizationTabController(QObject):
             prev_emissions_unit != self.emissions_unit
             or prev_fuel_type != self.fuel_type
         ):
+            # Series are cached in kilograms for every unit, so a new unit is
+            # scaled from the cache without a query
             logger.debug("Visualization Tab Controller: Units or fuel type changed")
             self.view.clear_plots()
-            self.model.invalidate_data_cache(
-                emissions_unit=prev_emissions_unit, fuel_type=prev_fuel_type
-            )
             self.update_pending = True
             self._handle_update_plot()
 
@@ -346,8 +365,7 @@ class VisualizationTabController(QObject):
         Handles visualization updates when the time range changes.
         This method tracks previous time values and should update the visualization
         based on the new time range selection.
-        It works with the start_time and end_time
-        properties to determine if and how to refresh the data.
+        Only the edges of the range that are not cached yet are fetched.
         """
         prev_start_time = self.start_time
         prev_end_time = self.end_time
@@ -365,17 +383,10 @@ class VisualizationTabController(QObject):
                 start_timestamp = self.start_time.toSecsSinceEpoch()  # type: ignore
                 end_timestamp = self.end_time.toSecsSinceEpoch()  # type: ignore
 
-                if self._check_if_timerange_needs_reload():
-                    logger.debug(
-                        "Visualization Tab Controller: Loading new time range data"
-                    )
-                    self.model.invalidate_timerange_cache()
-                    self.update_pending = True
-                    self._handle_update_plot()
-                else:
-                    logger.debug(
-                        "Visualization Tab Controller: Adjusting time view only"
-                    )
+                # The series cache only fetches the parts of the range not cached
+                logger.debug("Visualization Tab Controller: Loading time range data")
+                self.update_pending = True
+                self._handle_update_plot()
 
                 # Update the chart's visible range
                 self.view.chartPlotWidget.setXRange(start_timestamp, end_timestamp)
@@ -405,39 +416,6 @@ class VisualizationTabController(QObject):
             else:
                 self.view.show_all_plots()
 
-    def _check_if_timerange_needs_reload(self):
-        """
-        Determines if the new time range requires loading new data.
-        Returns True if new data needs to be loaded, False if current data is enough.
-        """
-        # If we don't have valid times, we need to reload
-        if self.start_time is None or self.end_time is None:
-            logger.debug("Time range reload check: Missing start or end time")
-            return True
-
-        # If we don't have a cached time range, we need to reload
-        if not hasattr(self.model, "cached_time_range"):
-            logger.debug("Time range reload check: No cached time range")
-            return True
-
-        cached_start, cached_end = self.model.cached_time_range
-
-        # If cached values are None, we need to reload
-        if cached_start is None or cached_end is None:
-            logger.debug("Time range reload check: Cached range has None values")
-            return True
-
-        # If new range extends beyond cached range in either direction, reload
-        if self.start_time < cached_start or self.end_time > cached_end:
-            logger.debug(
-                "Time range reload check: New range extends beyond cached range"
-            )
-            return True
-
-        # Otherwise, we're zooming in or moving within the cached range
-        logger.debug("Time range reload check: Using existing cached data")
-        return False
-
     def _is_valid_time_range(self):
         """
         Validates that both start_time and end_time are set and properly ordered.
@@ -463,52 +441,98 @@ class VisualizationTabModel:
         self.application_model = application_model
         self.databases_model = self.application_model.databases_model
         self.settings_model = self.application_model.settings_model
-        self.data_cache = {}
+        self.series_cache = SeriesCache(self.fetch_series)
 
-    def invalidate_data_cache(self, user_id=None, fuel_type=None, emissions_unit=None):
+    @staticmethod
+    def series_key(user_id, fuel_type):
         """
-        Invalidate specific cache entries based on parameters.
-        If no parameters are provided, invalidates all cache entries.
+        The cache key of a series. User ids typed in the view and user ids read
+        from the database both become ints, an empty user id means all users.
         """
-        # If no parameters are provided, invalidate all cache entries
-        if user_id is None and fuel_type is None and emissions_unit is None:
-            self.data_cache.clear()
-            logger.debug("Visualization Tab Model: All data cache invalidated.")
-            return
-
-        # If parameters are provided, invalidate specific cache entries
-        keys_to_remove = []
-        for key in self.data_cache:
-            cached_user_id, cached_fuel_type, cached_emissions_unit = key
-            if (
-                (user_id and cached_user_id == user_id)
-                or (fuel_type and cached_fuel_type == fuel_type)
-                or (emissions_unit and cached_emissions_unit == emissions_unit)
-            ):
-                keys_to_remove.append(key)
+        user_id = str(user_id).strip() if user_id is not None else ""
+        if not user_id:
+            return None, fuel_type
+        try:
+            return int(user_id), fuel_type
+        except ValueError:
+            return user_id, fuel_type
 
-        for key in keys_to_remove:
-            del self.data_cache[key]
+    def get_series(self, key, start, end):
+        """
+        Columns of a series in [start, end) epoch seconds, from the cache where
+        possible.
+        :param key: (user_id, fuel_type), user_id None for all users
+        """
+        return self.series_cache.get(self.series_key(*key), start, end)
 
-        logger.debug(
-            f"Visualization Tab Model: {len(keys_to_remove)} cache entries invalidated."
+    def fetch_series(self, key, start, end):
+        """
+        Fetches the columns of a series in [start, end) from the database, with
+        emissions of every unit in kilograms.
+        """
+        user_id, fuel_type = key
+        if user_id is None:
+            rows = self.databases_model.get_emissions_time_series_by_user(
+                time_range=(start, end), fuel_type=fuel_type
+            )
+            user_ids, times, emissions = zip(*rows) if rows else ((), (), ())
+            return {
+                "user_id": np.asarray(user_ids, dtype=np.int64),
+                "time": np.asarray(times, dtype=np.float64),
+                "emissions": np.asarray(emissions, dtype=np.float64),
+            }
+
+        rows = self.databases_model.get_emissions_time_series(
+            time_range=(start, end), user_id=str(user_id), fuel_type=fuel_type
         )
+        values = np.array(rows, dtype=np.float64).reshape(-1, 2)
+        return {"time": values[:, 0].copy(), "emissions": values[:, 1].copy()}
 
-    def invalidate_timerange_cache(self):
+    def add_rows(self, spans):
         """
-        Invalidate the cache due to time range changes.
+        Refetches the cached parts of the time spans rows were added to, for the
+        user's series and the all users series of their fuel type.
+        :param spans: EmissionsSpans of the added rows
+        :return: True if a cached series gained points.
         """
+        ranges = {}
+        for span in spans:
+            for key in (
+                self.series_key(span.user_id, span.fuel_type),
+                (None, span.fuel_type),
+            ):
+                if key in self.series_cache:
+                    # Spans include their last second, cached ranges are half-open
+                    start, end = ranges.get(key, (span.start, span.end + 1))
+                    ranges[key] = (min(start, span.start), max(end, span.end + 1))
 
-        self.data_cache.clear()
-
-        logger.debug("Visualization Tab Model: Time range cache invalidated")
+        added = 0
+        for key, (start, end) in ranges.items():
+            added += self.series_cache.refresh(key, start, end)
+        logger.debug(f"Visualization Tab Model: {added} new points added to cache.")
+        return added > 0
 
-    def update_cached_time_range(self, start_time, end_time):
+    def invalidate_data_cache(self, user_id=None, fuel_type=None):
         """
-        Update the record of what time range is currently cached.
+        Invalidate specific cache entries based on parameters.
+        If no parameters are provided, invalidates all cache entries.
         """
+        # If no parameters are provided, invalidate all cache entries
+        if user_id is None and fuel_type is None:
+            self.series_cache.invalidate()
+            logger.debug("Visualization Tab Model: All data cache invalidated.")
+            return
+
+        user_id = self.series_key(user_id, fuel_type)[0]
 
-        self.cached_time_range = (start_time, end_time)
+        def matches(key):
+            cached_user_id, cached_fuel_type = key
+            return (user_id is not None and cached_user_id == user_id) or (
+                fuel_type and cached_fuel_type == fuel_type
+            )
+
+        removed = self.series_cache.invalidate(matches)
+        logger.debug(f"Visualization Tab Model: {removed} cache entries invalidated.")
 
 
 class VisualizationTabView(QWidget, Ui_visualizationTab):
@@ -517,6 +541,11 @@ class VisualizationTabView(QWidget, Ui_visualizationTab):
         self.setupUi(self)
         self.plot_items = {}
         self.color_cache = {}
+        self.plot_series = {}
+
+        self.chartPlotWidget.getViewBox().sigXRangeChanged.connect(
+            self.update_level_of_detail
+        )
 
     def set_background_for_plot(self, is_light_mode: bool):
         if is_light_mode:
@@ -568,10 +597,14 @@ class VisualizationTabView(QWidget, Ui_visualizationTab):
             left_axis.setPen(axis_pen)
 
     def update_plot(self, data, color, user_id):
+        series = MinMaxPyramid(data.time.to_numpy(), data.emissions.to_numpy())
+        self.plot_series[str(user_id)] = series
+        x, y = self._visible_points(series)
+
         # Check if we already have a plot for this user
         if user_id in self.plot_items:
             # Update existing plot data
-            self.plot_items[user_id].setData(data.time, data.emissions)
+            self.plot_items[user_id].setData(x, y)
             return
 
         if not color:
@@ -580,8 +613,8 @@ class VisualizationTabView(QWidget, Ui_visualizationTab):
             )  # Default color if wasn't specified
 
         plot_item = self.chartPlotWidget.plot(
-            data.time,
-            data.emissions,
+            x,
+            y,
             name=f"User ID: {user_id}",
             pen=color,
         )
@@ -590,6 +623,28 @@ class VisualizationTabView(QWidget, Ui_visualizationTab):
         self.plot_items[str(user_id)] = plot_item
         self.color_cache[str(user_id)] = color
 
+    def _visible_points(self, series):
+        """
+        Points of series to draw for the current x range, about POINTS_PER_PIXEL per
+        pixel. Half a view width on either side is included so panning does not
+        show gaps before the next update.
+        """
+        view_box = self.chartPlotWidget.getViewBox()
+        max_points = POINTS_PER_PIXEL * max(int(view_box.width()), 500)
+        # While auto ranging the whole series is in view
+        if view_box.autoRangeEnabled()[0]:
+            return series.select(-np.inf, np.inf, max_points)
+        x_min, x_max = view_box.viewRange()[0]
+        margin = (x_max - x_min) / 2
+        return series.select(x_min - margin, x_max + margin, 2 * max_points)
+
+    def update_level_of_detail(self):
+        """Swaps in the resolution of every visible plot that fits the new x range."""
+        for user_id, plot_item in self.plot_items.items():
+            series = self.plot_series.get(user_id)
+            if series is not None and plot_item.isVisible():
+                plot_item.setData(*self._visible_points(series))
+
     def hide_all_plots(self):
         """
         Hide all plots without removing them
@@ -604,11 +659,16 @@ class VisualizationTabView(QWidget, Ui_visualizationTab):
         """
         if user_id in self.plot_items:
             self.plot_items[user_id].setVisible(True)
+            # Hidden plots are not updated when the x range changes
+            series = self.plot_series.get(user_id)
+            if series is not None:
+                self.plot_items[user_id].setData(*self._visible_points(series))
 
     def show_all_plots(self):
         """Show all plots"""
         for plot_item in self.plot_items.values():
             plot_item.setVisible(True)
+        self.update_level_of_detail()
 
     def clear_plots(self):
         """
@@ -617,6 +677,7 @@ class VisualizationTabView(QWidget, Ui_visualizationTab):
         for plot_item in self.plot_items.values():
             self.chartPlotWidget.removeItem(plot_item)
         self.plot_items.clear()
+        self.plot_series.clear()
         # Keep color_cache for consistent colors between sessions
 
     def update_plot_units(self, unit):
@@ -1,24 +1,49 @@
+import importlib
 import logging
 import os
 import sys
+from functools import lru_cache
 
-from PySide6.QtCore import QObject, QTranslator, Signal
+from PySide6.QtCore import QObject, QResource, QTranslator, Signal
 from PySide6.QtGui import QIcon
-from PySide6.QtWidgets import QApplication, QMainWindow, QWidget
+from PySide6.QtWidgets import QApplication, QMainWindow, QVBoxLayout, QWidget
 
+from core.calculation_executor import CalculationExecutor
 from core.emissions_calculator import calculationModel
 from data.database_model import application_path, databasesModel
 from data.export_manager import ExportManager
 from data.import_manager import ImportManager
 from data.settings_model import SettingsModel
-from ui.FeedbackTabWidget import FeedbackTabWidget
 from ui.GeneralTabWidget import GeneralTabWidget
 from ui.generated_python_ui.ui_main_window import Ui_MainWindow
-from ui.HelpTabWidget import HelpTabWidget
-from ui.VisualizationTabWidget import VisualizationTabWidget
+from utils.startup_tracer import startup_tracer
 
 logger = logging.getLogger("ui")
 
+# Tabs built the first time they are shown, by stacked widget index: the attribute
+# and class name, and its module. Their modules (pandas, pyqtgraph) are imported
+# then too, so only the General tab is built before the window appears.
+LAZY_TABS = {
+    1: ("VisualizationTabWidget", "ui.VisualizationTabWidget"),
+    3: ("HelpTabWidget", "ui.HelpTabWidget"),
+    4: ("FeedbackTabWidget", "ui.FeedbackTabWidget"),
+}
+
+ICONS_RESOURCE_PATH = os.path.join(
+    application_path, "resources", "GUI_files", "icons.rcc"
+)
+
+
+@lru_cache(maxsize=None)
+def register_icons() -> bool:
+    """Maps the icon bundle into :/icons once, returns whether it is available."""
+    registered = QResource.registerResource(ICONS_RESOURCE_PATH)
+    if registered:
+        logger.debug(f"register_icons: Registered {ICONS_RESOURCE_PATH}")
+    else:
+        logger.error(f"register_icons: Could not register {ICONS_RESOURCE_PATH}")
+    return registered
+
 
 # Controller: controls data for the MainWindow
 class MainWindowController(QObject):
@@ -44,8 +69,8 @@ class MainWindowController(QObject):
         self.view.main_window_closed.connect(self.handle_main_window_closed)
         self.view.stackedWidget.currentChanged.connect(self.handle_tab_changed)
 
-        # calculation model signals
-        self.model.calculation_model.calculation_result.connect(
+        # calculation model signals, log_transaction only appends to a locked buffer
+        self.model.calculation_executor.deliver_results_to(
             self.model.databases_model.log_transaction
         )
         self.model.settings_model.theme_changed.connect(self.handle_theme_changed)
@@ -181,37 +206,16 @@ class MainWindowController(QObject):
                 "GeneralTabWidget view missing or lacks retranslateUi method"
             )
 
-        if hasattr(self.view, "VisualizationTabWidget") and hasattr(
-            self.view.VisualizationTabWidget.view, "retranslateUi"
-        ):
-            logger.debug("Calling retranslateUi on VisualizationTabWidget")
-            self.view.VisualizationTabWidget.view.retranslateUi(
-                self.view.VisualizationTabWidget.view
-            )
-        else:
-            logger.warning(
-                "VisualizationTabWidget view missing or lacks retranslateUi method"
-            )
-
-        if hasattr(self.view, "HelpTabWidget") and hasattr(
-            self.view.HelpTabWidget.view, "retranslateUi"
-        ):
-            logger.debug("Calling retranslateUi on HelpTabWidget")
-            self.view.HelpTabWidget.view.retranslateUi(self.view.HelpTabWidget.view)
-        else:
-            logger.warning("HelpTabWidget view missing or lacks retranslateUi method")
-
-        if hasattr(self.view, "FeedbackTabWidget") and hasattr(
-            self.view.FeedbackTabWidget.view, "retranslateUi"
-        ):
-            logger.debug("Calling retranslateUi on FeedbackTabWidget")
-            self.view.FeedbackTabWidget.view.retranslateUi(
-                self.view.FeedbackTabWidget.view
-            )
-        else:
-            logger.warning(
-                "FeedbackTabWidget view missing or lacks retranslateUi method"
-            )
+        for attribute, _ in LAZY_TABS.values():
+            tab = getattr(self.view, attribute, None)
+            if tab is None:
+                # Not built yet, setupUi translates it once it is
+                continue
+            if hasattr(tab.view, "retranslateUi"):
+                logger.debug(f"Calling retranslateUi on {attribute}")
+                tab.view.retranslateUi(tab.view)
+            else:
+                logger.warning(f"{attribute} view lacks retranslateUi method")
 
         if hasattr(self.view, "GeneralTabWidget") and hasattr(
             self.view.GeneralTabWidget.controller, "settingsWidget"
@@ -242,12 +246,16 @@ class AppModel(QObject):
         super().__init__()
         self.databases_model = databasesModel()
         self.calculation_model = calculationModel()
+        self.calculation_executor = CalculationExecutor(self.calculation_model)
         self.settings_model = SettingsModel()
         self.import_manager = ImportManager()
         self.export_manager = ExportManager()
 
     def setup_models(self, main_window_controller):
         logger.debug("Main Window Model: Setting up models in AppModel")
+        # Connected first so running calculations stop before databases close
+        self.calculation_executor.set_controller(main_window_controller)
+
         main_window_controller.update_progress(30, "Setting up database models...")
         self.databases_model.set_controller(main_window_controller)
 
@@ -270,6 +278,7 @@ class MainWindowView(QMainWindow, Ui_MainWindow):
 
     def __init__(self) -> None:
         super().__init__()
+        register_icons()
         self.setupUi(self)
         self.setup_icon()
 
@@ -297,40 +306,65 @@ class MainWindowView(QMainWindow, Ui_MainWindow):
         # ui elements are defined in UI and referenced in code through
         # a pythonic way of object names with dot-attributes.
         # self.stackedWidget was named that in Qt Designer.
+        self.application_model = model
+        self.application_controller = controller
 
-        # Reference objects directly by their object name
+        # Reference objects directly by their object name, the other tabs are set
+        # as attributes by build_tab
         self.GeneralTabWidget = GeneralTabWidget(model, controller)
-        self.VisualizationTabWidget = VisualizationTabWidget(model, controller)
-        self.HelpTabWidget = HelpTabWidget(model, controller)
-        self.FeedbackTabWidget = FeedbackTabWidget(model, controller)
 
         self.stackedWidget.insertWidget(0, self.GeneralTabWidget.view)
-        self.stackedWidget.insertWidget(1, self.VisualizationTabWidget.view)
+        self.stackedWidget.insertWidget(1, self._lazy_tab_page())
         self.stackedWidget.insertWidget(2, QWidget())  # TODO: AI CHAT
-        self.stackedWidget.insertWidget(3, self.HelpTabWidget.view)
-        self.stackedWidget.insertWidget(4, self.FeedbackTabWidget.view)
+        self.stackedWidget.insertWidget(3, self._lazy_tab_page())
+        self.stackedWidget.insertWidget(4, self._lazy_tab_page())
 
         # set default to the general widget
         self.stackedWidget.setCurrentWidget(self.GeneralTabWidget.view)
+        # Connected before MainWindowController's handler, so a tab is built
+        # before tab_changed is emitted for it
+        self.stackedWidget.currentChanged.connect(self.build_tab)
 
         self.menuGeneral.addAction("General").triggered.connect(
             lambda: self.stackedWidget.setCurrentWidget(self.GeneralTabWidget.view)
         )
         self.menuVisualization.addAction("Visualization").triggered.connect(
-            lambda: self.stackedWidget.setCurrentWidget(
-                self.VisualizationTabWidget.view
-            )
+            lambda: self.stackedWidget.setCurrentIndex(1)
         )
         self.menuAI_chat.addAction("AI Chat").triggered.connect(
             lambda: self.stackedWidget.setCurrentWidget(QWidget())
         )
         self.menuHelp.addAction("Help").triggered.connect(
-            lambda: self.stackedWidget.setCurrentWidget(self.HelpTabWidget.view)
+            lambda: self.stackedWidget.setCurrentIndex(3)
         )
         self.menuFeedback.addAction("Feedback").triggered.connect(
-            lambda: self.stackedWidget.setCurrentWidget(self.FeedbackTabWidget.view)
+            lambda: self.stackedWidget.setCurrentIndex(4)
         )
 
+    @staticmethod
+    def _lazy_tab_page():
+        """An empty page a lazy tab's view is added to when it is built."""
+        page = QWidget()
+        QVBoxLayout(page).setContentsMargins(0, 0, 0, 0)
+        return page
+
+    def build_tab(self, index):
+        """
+        Builds the lazy tab at a stacked widget index the first time it is shown.
+        :return: The tab widget, None if the index has no lazy tab.
+        """
+        if index not in LAZY_TABS:
+            return None
+        attribute, module_name = LAZY_TABS[index]
+        tab = getattr(self, attribute, None)
+        if tab is None:
+            logger.debug(f"MainWindowView.build_tab: Building {attribute}")
+            tab_class = getattr(importlib.import_module(module_name), attribute)
+            tab = tab_class(self.application_model, self.application_controller)
+            setattr(self, attribute, tab)
+            self.stackedWidget.widget(index).layout().addWidget(tab.view)
+        return tab
+
     def closeEvent(self, event):
         self.main_window_closed.emit()
         event.accept()
@@ -345,42 +379,51 @@ class MainWindowWidget(QMainWindow):
         # These comments are here so that I don't get stripped up lol.
 
         # Initialize all components
-        self.model = AppModel()
-        self.view = MainWindowView()
+        with startup_tracer.phase("AppModel"):
+            self.model = AppModel()
+        with startup_tracer.phase("MainWindowView"):
+            self.view = MainWindowView()
         self.controller = MainWindowController(self.model, self.view)
         # Step 1: Starting application
         self.controller.update_progress(0, "Starting application...")
 
         # Step 2: Setting up user interface
         self.controller.update_progress(15, "Setting up user interface...")
-        self.view.setup_tabs(self.model, self.controller)
+        with startup_tracer.phase("setup_tabs"):
+            self.view.setup_tabs(self.model, self.controller)
 
         # Step 3: Setting up backend models
         self.controller.update_progress(25, "Setting up backend models...")
 
         # Steps 4-6: Setting up models (database, calculation, settings)
-        self.model.setup_models(self.controller)
+        with startup_tracer.phase("setup_models"):
+            self.model.setup_models(self.controller)
 
         # Step 7: Connecting components
-        self.controller.connect_signals()
+        with startup_tracer.phase("connect_signals"):
+            self.controller.connect_signals()
 
         # Step 8: Applying theme
         self.controller.update_progress(85, "Applying theme...")
-        self.controller.initialize_theme()
+        with startup_tracer.phase("initialize_theme"):
+            self.controller.initialize_theme()
 
         # Step 8.5: Initialize language
         self.controller.update_progress(90, "Setting application language...")
-        self.controller.initialize_language()
+        with startup_tracer.phase("initialize_language"):
+            self.controller.initialize_language()
 
         # Step 9: Sending initialization signal
         self.controller.update_progress(95, "Sending initialization signal...")
-        self.controller.send_initialization_signal()
+        with startup_tracer.phase("send_initialization_signal"):
+            self.controller.send_initialization_signal()
 
         # Step 10: Ready - final step
         self.controller.update_progress(100, "Ready")
         self.controller.progress_complete.emit()
 
-        self.view.show()
+        with startup_tracer.phase("show"):
+            self.view.show()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,79 @@
+import logging
+from typing import List, Tuple
+
+import numpy as np
+
+logger = logging.getLogger("Utils")
+
+# Each level merges this many buckets of the level below it.
+LEVEL_FACTOR = 4
+# Levels are built until one has at most this many points.
+MIN_LEVEL_POINTS = 1024
+
+
+def _min_max_decimate(
+    x: np.ndarray, y: np.ndarray, bucket_size: int
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Keeps the minimum and the maximum of every bucket_size points, in time order,
+    so spikes survive decimation.
+    """
+    bucket_count = -(-len(y) // bucket_size)
+    padding = bucket_count * bucket_size - len(y)
+    # Padding repeats the last value, argmin/argmax return the first occurrence
+    buckets = np.pad(y, (0, padding), mode="edge").reshape(bucket_count, bucket_size)
+    offsets = np.arange(bucket_count) * bucket_size
+    min_index = offsets + buckets.argmin(axis=1)
+    max_index = offsets + buckets.argmax(axis=1)
+    index = np.column_stack(
+        (np.minimum(min_index, max_index), np.maximum(min_index, max_index))
+    ).ravel()
+    return x[index], y[index]
+
+
+class MinMaxPyramid:
+    """
+    Min-max decimated copies of a time series at decreasing resolutions.
+
+    Level 0 holds the points as given (sorted by x, NaNs dropped), every further
+    level keeps the minimum and maximum of every 2 * LEVEL_FACTOR points of the
+    level below it, a quarter of its size. select() returns the finest level that
+    fits a point budget for an x range, so a zoomed out chart draws a few thousand
+    points and a zoomed in chart draws the raw data.
+    """
+
+    def __init__(self, x, y):
+        x = np.asarray(x, dtype=np.float64)
+        y = np.asarray(y, dtype=np.float64)
+        valid = ~(np.isnan(x) | np.isnan(y))
+        x, y = x[valid], y[valid]
+        if len(x) > 1 and np.any(np.diff(x) < 0):
+            order = np.argsort(x, kind="stable")
+            x, y = x[order], y[order]
+
+        self.levels: List[Tuple[np.ndarray, np.ndarray]] = [(x, y)]
+        while len(self.levels[-1][0]) > MIN_LEVEL_POINTS:
+            # Above level 0 a bucket is LEVEL_FACTOR whole min/max pairs, so each
+            # level is the exact min-max decimation of the raw points
+            self.levels.append(_min_max_decimate(*self.levels[-1], 2 * LEVEL_FACTOR))
+        logger.debug(
+            f"MinMaxPyramid: Built {len(self.levels)} levels for {len(x)} points"
+        )
+
+    def __len__(self) -> int:
+        return len(self.levels[0][0])
+
+    def select(
+        self, x_min: float, x_max: float, max_points: int
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Returns the points between x_min and x_max from the finest level with at
+        most max_points of them there, or from the coarsest level. One point on
+        either side of the range is included so lines run to the edges.
+        """
+        for level_x, level_y in self.levels:
+            start = max(np.searchsorted(level_x, x_min, side="left") - 1, 0)
+            end = np.searchsorted(level_x, x_max, side="right") + 1
+            if end - start <= max_points:
+                break
+        return level_x[start:end], level_y[start:end]
@@ -84,18 +84,16 @@ def generate_test_data(num_records: int = 100) -> List[Dict[str, Any]]:
         else:  # Metric Tons
             emissions = round(fuel_used * random.uniform(0.0001, 0.01), 4)
 
-        # Format values with units as stored in database
-        fuel_used_formatted = f"{fuel_used} {fuel_unit}"
-        emissions_formatted = f"{emissions:.2f}"
-        temperature_formatted = f"{temperature}{temperature_type[0]}"
-
+        # Values and units are separate columns, as stored in the database
         record = {
             "user_id": user_id,
             "fuel_type": fuel_type,
-            "fuel_used": fuel_used_formatted,
-            "emissions": emissions_formatted,
+            "fuel_used": fuel_used,
+            "fuel_unit": fuel_unit,
+            "emissions": emissions,
             "emissions_unit": emissions_unit,
-            "temperature": temperature_formatted,
+            "temperature": temperature,
+            "temperature_unit": temperature_type,
             "farming_technique": farming_technique,
             "timestamp": timestamp,
         }
@@ -137,15 +135,15 @@ def save_to_csv(
     filepath = os.path.join(os.getcwd(), filename)
 
     # Create CSV header and rows
-    header = "user_id,fuel_type,fuel_used,emissions,emissions_unit,temperature,farming_technique,timestamp\n"
+    header = "user_id,fuel_type,fuel_used,fuel_unit,emissions,emissions_unit,temperature,temperature_unit,farming_technique,timestamp\n"
 
     with open(filepath, "w") as f:
         f.write(header)
         for record in data:
             row = (
-                f"{record['user_id']},{record['fuel_type']},{record['fuel_used']},"
+                f"{record['user_id']},{record['fuel_type']},{record['fuel_used']},{record['fuel_unit']},"
                 f"{record['emissions']},{record['emissions_unit']},{record['temperature']},"
-                f"{record['farming_technique']},{record['timestamp']}\n"
+                f"{record['temperature_unit']},{record['farming_technique']},{record['timestamp']}\n"
             )
             f.write(row)
 
@@ -3,6 +3,8 @@ import logging
 from PySide6.QtCore import QRunnable, QThreadPool, Slot
 from PySide6.QtWidgets import QWidget
 
+from utils.startup_tracer import startup_tracer
+
 logger = logging.getLogger("Utils")
 
 
@@ -37,8 +39,9 @@ def connect_threaded(widget: QWidget, signal: str, slot: callable) -> None:
     """
 
     def wrapper(*args, **kwargs):
-        # Create a worker and pass the slot function and its arguments
-        worker = Worker(slot, *args, **kwargs)
+        # Create a worker and pass the slot function and its arguments, slots
+        # started during startup are timed by the startup trace
+        worker = Worker(startup_tracer.traced(slot), *args, **kwargs)
 
         # Start the thread
         QThreadPool.globalInstance().start(worker)
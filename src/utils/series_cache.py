@@ -0,0 +1,180 @@
+import logging
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger("Utils")
+
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+Columns = Dict[str, np.ndarray]
+Interval = Tuple[float, float]
+
+
+class CachedSeries:
+    """
+    Columns of one series sorted by their "time" column, and the half-open time
+    intervals that have been fetched for it. Every point inside those intervals
+    is held, so the gaps between them are all that has to be fetched.
+    """
+
+    def __init__(self):
+        self.columns: Columns = {}
+        self.intervals: List[Interval] = []
+
+    @property
+    def nbytes(self) -> int:
+        return sum(column.nbytes for column in self.columns.values())
+
+    def missing(self, start: float, end: float) -> List[Interval]:
+        """Returns the parts of [start, end) that are not cached."""
+        gaps = []
+        position = start
+        for interval_start, interval_end in self.intervals:
+            if interval_end <= position:
+                continue
+            if interval_start >= end:
+                break
+            if interval_start > position:
+                gaps.append((position, interval_start))
+            position = max(position, interval_end)
+        if position < end:
+            gaps.append((position, end))
+        return gaps
+
+    def insert(self, columns: Columns, start: float, end: float) -> None:
+        """
+        Adds the points fetched for an uncached interval [start, end) and merges it
+        with the intervals it overlaps or touches.
+        """
+        if not self.columns:
+            self.columns = {
+                name: np.asarray(values) for name, values in columns.items()
+            }
+        elif len(columns["time"]):
+            # The interval was not cached, so its points go in one block
+            position = np.searchsorted(self.columns["time"], columns["time"][0])
+            self.columns = {
+                name: np.concatenate(
+                    (values[:position], columns[name], values[position:])
+                )
+                for name, values in self.columns.items()
+            }
+
+        merged = []
+        for interval_start, interval_end in sorted(self.intervals + [(start, end)]):
+            if merged and interval_start <= merged[-1][1]:
+                merged[-1] = (merged[-1][0], max(merged[-1][1], interval_end))
+            else:
+                merged.append((interval_start, interval_end))
+        self.intervals = merged
+
+    def covered(self, start: float, end: float) -> List[Interval]:
+        """Returns the parts of [start, end) that are cached."""
+        return [
+            (max(start, interval_start), min(end, interval_end))
+            for interval_start, interval_end in self.intervals
+            if interval_start < end and interval_end > start
+        ]
+
+    def replace(self, columns: Columns, start: float, end: float) -> None:
+        """
+        Replaces the points of a cached interval [start, end) with the points
+        fetched for it again.
+        """
+        times = self.columns["time"]
+        first = np.searchsorted(times, start, side="left")
+        last = np.searchsorted(times, end, side="left")
+        self.columns = {
+            name: np.concatenate((values[:first], columns[name], values[last:]))
+            for name, values in self.columns.items()
+        }
+
+    def slice(self, start: float, end: float) -> Columns:
+        times = self.columns["time"]
+        first = np.searchsorted(times, start, side="left")
+        last = np.searchsorted(times, end, side="left")
+        return {name: values[first:last] for name, values in self.columns.items()}
+
+
+class SeriesCache:
+    """
+    Least recently used cache of time series under a memory budget.
+
+    get() fetches only the parts of the requested range that are not cached yet,
+    through fetch(key, start, end), which returns the columns of the points in
+    [start, end) sorted by time. The least recently used series are evicted once
+    the cached columns take more than max_bytes.
+    """
+
+    def __init__(
+        self,
+        fetch: Callable[[Hashable, float, float], Columns],
+        max_bytes: int = DEFAULT_MAX_BYTES,
+    ):
+        self.fetch = fetch
+        self.max_bytes = max_bytes
+        self._series: "OrderedDict[Hashable, CachedSeries]" = OrderedDict()
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._series
+
+    @property
+    def nbytes(self) -> int:
+        return sum(series.nbytes for series in self._series.values())
+
+    def get(self, key: Hashable, start: float, end: float) -> Columns:
+        """Returns the columns of the points of a series in [start, end)."""
+        series = self._series.get(key)
+        if series is None:
+            series = self._series[key] = CachedSeries()
+        self._series.move_to_end(key)
+
+        gaps = series.missing(start, end)
+        for gap_start, gap_end in gaps:
+            series.insert(self.fetch(key, gap_start, gap_end), gap_start, gap_end)
+        if gaps:
+            logger.debug(f"SeriesCache.get: Fetched {len(gaps)} ranges for {key}")
+            self._evict()
+        return series.slice(start, end)
+
+    def refresh(self, key: Hashable, start: float, end: float) -> int:
+        """
+        Fetches the points of a series in [start, end) again where they are
+        cached, after rows were added there. Parts that are not cached are left
+        for get() to fetch.
+        :return: The number of points the series gained.
+        """
+        series = self._series.get(key)
+        if series is None:
+            return 0
+        size = len(series.columns.get("time", ()))
+        for part_start, part_end in series.covered(start, end):
+            series.replace(self.fetch(key, part_start, part_end), part_start, part_end)
+        added = len(series.columns.get("time", ())) - size
+        if added:
+            logger.debug(f"SeriesCache.refresh: Added {added} points to {key}")
+            self._evict()
+        return added
+
+    def series(self, key: Hashable) -> Optional[CachedSeries]:
+        return self._series.get(key)
+
+    def invalidate(self, predicate: Optional[Callable[[Hashable], bool]] = None) -> int:
+        """
+        Drops every series whose key matches predicate, or all of them.
+        :return: The number of series dropped.
+        """
+        keys = [key for key in self._series if predicate is None or predicate(key)]
+        for key in keys:
+            del self._series[key]
+        return len(keys)
+
+    def _evict(self) -> None:
+        total = self.nbytes
+        # The most recently used series stays even if it is over the budget alone
+        while total > self.max_bytes and len(self._series) > 1:
+            key, series = self._series.popitem(last=False)
+            total -= series.nbytes
+            logger.debug(f"SeriesCache._evict: Evicted {key}")
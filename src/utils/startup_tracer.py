@@ -0,0 +1,191 @@
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from functools import wraps
+from typing import Callable, List, NamedTuple, Optional
+
+logger = logging.getLogger("Utils")
+
+# Set to write a Chrome trace-event file (chrome://tracing, Perfetto) next to the
+# report.
+CHROME_TRACE_ENVIRONMENT_VARIABLE = "CARBON_CALCULATOR_CHROME_TRACE"
+
+
+class TraceEvent(NamedTuple):
+    name: str
+    category: str
+    start: float  # seconds since the tracer was created
+    duration: Optional[float]  # None for instant events
+    thread_id: int
+    thread_name: str
+
+
+class StartupTracer:
+    """
+    Records how long each phase of a launch takes, on the GUI thread and in the
+    worker threads started during startup.
+
+    Phases are recorded until finish() is called. The report is written once the
+    threaded phases started before then have completed, so it covers work like the
+    database initialization that outlives MainWindowWidget.__init__.
+    """
+
+    def __init__(self, clock: Callable[[], float] = time.perf_counter):
+        self.clock = clock
+        self.origin = clock()
+        self.started_at = datetime.now()
+        self.events: List[TraceEvent] = []
+        self.collecting = True
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._on_finished: Optional[Callable[[], None]] = None
+
+    def _record(self, name, category, start, duration) -> None:
+        thread = threading.current_thread()
+        event = TraceEvent(
+            name, category, start - self.origin, duration, thread.ident, thread.name
+        )
+        with self._lock:
+            self.events.append(event)
+
+    @contextmanager
+    def _timed(self, name, category):
+        start = self.clock()
+        try:
+            yield
+        finally:
+            self._record(name, category, start, self.clock() - start)
+
+    @contextmanager
+    def phase(self, name: str, category: str = "startup"):
+        """
+        Times the block as one phase. After finish() only phases inside threaded
+        phases that are still running are recorded.
+        """
+        if not self.collecting and not self._pending:
+            yield
+            return
+        with self._timed(name, category):
+            yield
+
+    def mark(self, name: str, category: str = "startup") -> None:
+        """Records an instant event."""
+        if self.collecting:
+            self._record(name, category, self.clock(), None)
+
+    def traced(self, fn: Callable, name: Optional[str] = None) -> Callable:
+        """
+        Wraps fn, which is about to be started in a worker thread, so its run is
+        recorded as a phase and the report waits for it.
+        """
+        if not self.collecting:
+            return fn
+        name = name or getattr(fn, "__qualname__", repr(fn))
+        with self._lock:
+            self._pending += 1
+
+        # Recorded even if finish() is called while it runs, the report waits for it
+        @wraps(fn)
+        def run(*args, **kwargs):
+            try:
+                with self._timed(name, "threaded"):
+                    return fn(*args, **kwargs)
+            finally:
+                self._threaded_phase_done()
+
+        return run
+
+    def _threaded_phase_done(self) -> None:
+        with self._lock:
+            self._pending -= 1
+            on_finished = self._on_finished if self._pending == 0 else None
+            if on_finished:
+                self._on_finished = None
+        if on_finished:
+            on_finished()
+
+    def finish(self, folder: str = "logs", chrome_trace: Optional[bool] = None):
+        """
+        Stops recording new phases and writes the report (and the Chrome trace)
+        to folder as soon as the threaded phases still running have completed.
+        :param chrome_trace: Defaults to whether CHROME_TRACE_ENVIRONMENT_VARIABLE
+        is set.
+        """
+        if chrome_trace is None:
+            chrome_trace = bool(os.environ.get(CHROME_TRACE_ENVIRONMENT_VARIABLE))
+        self.mark("finish")
+        self.collecting = False
+
+        def write():
+            self.write(folder, chrome_trace)
+
+        with self._lock:
+            if self._pending:
+                self._on_finished = write
+                return
+        write()
+
+    def report(self) -> str:
+        """The recorded events in start order, with offsets and durations in ms."""
+        lines = [
+            f"Startup trace of {self.started_at:%Y-%m-%d %H:%M:%S}",
+            f"{'start ms':>10} {'duration ms':>12}  phase [thread]",
+        ]
+        for event in sorted(self.events, key=lambda event: event.start):
+            duration = "" if event.duration is None else f"{event.duration * 1000:.1f}"
+            lines.append(
+                f"{event.start * 1000:>10.1f} {duration:>12}  "
+                f"{event.name} [{event.thread_name}]"
+            )
+        return "\n".join(lines) + "\n"
+
+    def chrome_trace(self) -> dict:
+        """The events in Chrome's trace-event format, times in microseconds."""
+        process_id = os.getpid()
+        trace_events = []
+        for event in self.events:
+            trace_event = {
+                "name": event.name,
+                "cat": event.category,
+                "ts": round(event.start * 1_000_000),
+                "pid": process_id,
+                "tid": event.thread_id,
+            }
+            if event.duration is None:
+                trace_event.update(ph="i", s="t")
+            else:
+                trace_event.update(ph="X", dur=round(event.duration * 1_000_000))
+            trace_events.append(trace_event)
+        return {"traceEvents": trace_events, "displayTimeUnit": "ms"}
+
+    def write(self, folder: str, chrome_trace: bool = False) -> List[str]:
+        """
+        Writes startup_<launch time>.txt and, with chrome_trace, a .json trace.
+        :return: The paths written.
+        """
+        os.makedirs(folder, exist_ok=True)
+        base_path = os.path.join(
+            folder, f"startup_{self.started_at.strftime('%Y%m%d_%H%M%S')}"
+        )
+        paths = [f"{base_path}.txt"]
+        try:
+            with open(paths[0], "w", encoding="utf-8") as file:
+                file.write(self.report())
+            if chrome_trace:
+                paths.append(f"{base_path}.json")
+                with open(paths[1], "w", encoding="utf-8") as file:
+                    json.dump(self.chrome_trace(), file)
+        except OSError as e:
+            logger.error(f"StartupTracer.write: Could not write startup trace: {e}")
+            return []
+        logger.info(f"StartupTracer.write: Startup trace written to {paths}")
+        return paths
+
+
+# Created when the module is first imported, which main.py does before anything
+# else, so offsets are measured from the start of the launch.
+startup_tracer = StartupTracer()
@@ -0,0 +1,201 @@
+import math
+
+import numpy as np
+import pytest
+
+from src.core.emissions_calculator import calculationModel
+
+FUEL_MODIFIERS = {"gasoline": 2.31, "diesel": 2.68}
+TECHNIQUE_MODIFIERS = {"conventional": 1.0, "organic": 0.7}
+
+
+class TestBatchEmissionsCalculator:
+    @pytest.fixture
+    def calculation_model(self, mocker) -> calculationModel:
+        mocker.patch(
+            "src.core.emissions_calculator.databasesModel.get_fuel_type_emissions_modifiers",
+            return_value=FUEL_MODIFIERS,
+        )
+        mocker.patch(
+            "src.core.emissions_calculator.databasesModel.get_farming_technique_emissions_modifiers",
+            return_value=TECHNIQUE_MODIFIERS,
+        )
+        return calculationModel()
+
+    # Matches the single-row temperature deviation formula for every scale
+    def test_batch_matches_temperature_deviation_formula(self, calculation_model):
+        # Arrange
+        data = {
+            "user_id": [1, 2, 3],
+            "fuel_type": ["gasoline", "diesel", "gasoline"],
+            "fuel_unit": ["Liters", "Cubic Meters", "Liters"],
+            "fuel_used": [10.0, 0.5, 4.0],
+            "temperature": [25.0, 78.0, 283.15],
+            "temperature_type": ["Celsius", "Fahrenheit", "Kelvin"],
+            "farming_technique": ["conventional", "organic", "organic"],
+        }
+        expected = []
+        for fuel, liters, temp, baseline, technique in [
+            ("gasoline", 10.0, 25.0, 20.0, "conventional"),
+            ("diesel", 500.0, 78.0, 68.0, "organic"),
+            ("gasoline", 4.0, 283.15, 293.15, "organic"),
+        ]:
+            temp_deviation = (temp - baseline) / baseline
+            expected.append(
+                liters
+                * FUEL_MODIFIERS[fuel]
+                * (1 + temp_deviation**2)
+                * TECHNIQUE_MODIFIERS[technique]
+                * 1000
+            )
+
+        # Act
+        result = calculation_model.calculate_emissions_batch(
+            data, calculation_unit="Grams"
+        )
+
+        # Assert
+        assert result.valid.all()
+        assert result.errors == {}
+        np.testing.assert_allclose(result.emissions, expected)
+
+    # Rows without temperature data use the standard emissions factor
+    def test_batch_without_temperature_uses_standard_factor(self, calculation_model):
+        # Arrange
+        data = {
+            "user_id": np.array([1, 1]),
+            "fuel_type": np.array(["diesel", "diesel"]),
+            "fuel_unit": np.array(["Liters", "Liters"]),
+            "fuel_used": np.array([10.0, 10.0]),
+            "temperature": np.array([np.nan, 40.0]),
+            "temperature_type": np.array(["Celsius", ""]),
+            "farming_technique": np.array(["conventional", "conventional"]),
+        }
+
+        # Act
+        result = calculation_model.calculate_emissions_batch(data)
+
+        # Assert
+        np.testing.assert_allclose(result.emissions, [26.8, 26.8])
+
+    # Invalid rows are reported per row and do not affect valid ones
+    def test_batch_reports_invalid_rows(self, calculation_model):
+        # Arrange
+        data = {
+            "user_id": [1, 2, 3, 4, 5],
+            "fuel_type": ["gasoline", "kerosene", "gasoline", "gasoline", "gasoline"],
+            "fuel_unit": ["Liters", "Liters", "Gallons", "Liters", "Liters"],
+            "fuel_used": [10.0, 10.0, 10.0, 10.0, 10.0],
+            "temperature": [20.0, 20.0, 20.0, -300.0, 20.0],
+            "temperature_type": ["Celsius"] * 5,
+            "farming_technique": ["conventional"] * 4 + ["biodynamic"],
+        }
+
+        # Act
+        result = calculation_model.calculate_emissions_batch(data)
+
+        # Assert
+        assert result.invalid_rows.tolist() == [1, 2, 3, 4]
+        assert result.errors[1] == "No emissions modifier found for fuel type: kerosene"
+        assert result.errors[2] == "Unsupported fuel unit: Gallons"
+        assert result.errors[3] == "-300.0 is not a valid temperature"
+        assert "biodynamic" in result.errors[4]
+        assert result.emissions[0] == pytest.approx(23.1)
+        assert all(math.isnan(value) for value in result.emissions[1:])
+
+    # Non-numeric values invalidate their own rows instead of the whole batch
+    def test_batch_reports_non_numeric_rows(self, calculation_model):
+        # Arrange
+        data = {
+            "user_id": [1, 2, 3, 4],
+            "fuel_type": ["gasoline"] * 4,
+            "fuel_unit": ["Liters"] * 4,
+            "fuel_used": [10.0, "ten", "10", 10.0],
+            "temperature": [20.0, 20.0, None, "warm"],
+            "temperature_type": ["Celsius"] * 4,
+            "farming_technique": ["conventional"] * 4,
+        }
+
+        # Act
+        result = calculation_model.calculate_emissions_batch(data)
+
+        # Assert
+        assert result.invalid_rows.tolist() == [1, 3]
+        assert result.errors[1] == "ten is not a valid amount of fuel"
+        assert result.errors[3] == "warm is not a valid temperature"
+        assert result.emissions[0] == pytest.approx(23.1)
+        assert result.emissions[2] == pytest.approx(23.1)
+
+    # Accepts a pandas DataFrame as input
+    def test_batch_accepts_dataframe(self, calculation_model):
+        # Arrange
+        pd = pytest.importorskip("pandas")
+        data = pd.DataFrame(
+            {
+                "user_id": [1],
+                "fuel_type": ["gasoline"],
+                "fuel_unit": ["Liters"],
+                "fuel_used": [1.0],
+                "farming_technique": ["organic"],
+            }
+        )
+
+        # Act
+        result = calculation_model.calculate_emissions_batch(
+            data, calculation_unit="Kilograms"
+        )
+
+        # Assert
+        assert result.emissions[0] == pytest.approx(2.31 * 0.7)
+
+    # The batch and calculate_emissions agree for every fuel unit, with and
+    # without temperature data
+    @pytest.mark.parametrize("fuel_unit", ["Liters", "Cubic Meters", "Cubic Feet"])
+    @pytest.mark.parametrize(
+        "temperature, temperature_type",
+        [(None, None), (25.0, "Celsius"), (78.0, "Fahrenheit"), (283.15, "Kelvin")],
+    )
+    def test_batch_matches_single_row(
+        self, calculation_model, mocker, fuel_unit, temperature, temperature_type
+    ):
+        # Arrange
+        mocker.patch(
+            "src.core.emissions_calculator.databasesModel.get_fuel_type_emissions_modifier",
+            side_effect=FUEL_MODIFIERS.get,
+        )
+        mocker.patch(
+            "src.core.emissions_calculator.databasesModel.get_farming_technique_info",
+            side_effect=lambda field, technique: TECHNIQUE_MODIFIERS[technique],
+        )
+        results = []
+        calculation_model.calculation_result.connect(
+            lambda *row: results.append(row[4])
+        )
+
+        # Act
+        calculation_model.calculate_emissions(
+            1,
+            "diesel",
+            fuel_unit,
+            2.0,
+            temperature,
+            temperature_type,
+            "organic",
+            "Grams",
+            progress_callback=lambda percentage, message: None,
+        )
+        batch = calculation_model.calculate_emissions_batch(
+            {
+                "user_id": [1],
+                "fuel_type": ["diesel"],
+                "fuel_unit": [fuel_unit],
+                "fuel_used": [2.0],
+                "temperature": [np.nan if temperature is None else temperature],
+                "temperature_type": [temperature_type or ""],
+                "farming_technique": ["organic"],
+            },
+            calculation_unit="Grams",
+        )
+
+        # Assert
+        assert results == [pytest.approx(batch.emissions[0])]
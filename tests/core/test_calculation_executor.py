@@ -0,0 +1,248 @@
+import threading
+import time
+
+import pytest
+from PySide6.QtCore import QCoreApplication, QObject, Signal
+
+from src.core.calculation_executor import CalculationExecutor
+from src.core.emissions_calculator import calculationModel
+
+
+class FakeCalculationModel(QObject):
+    calculation_result = Signal(int)
+
+    def __init__(self, progress_reports=1):
+        super().__init__()
+        self.progress_reports = progress_reports
+        self.release = threading.Event()
+        self.release.set()
+        self.started = threading.Event()
+        self.calls = []
+
+    def calculate_emissions(self, user_id, progress_callback):
+        self.started.set()
+        self.release.wait(5)
+        for step in range(self.progress_reports):
+            progress_callback(step, f"Step {step}")
+        progress_callback(100, "Calculation complete")
+        self.calls.append(user_id)
+        self.calculation_result.emit(user_id)
+
+
+def process_events(executor):
+    assert executor.wait_for_done(5000)
+    QCoreApplication.processEvents()
+
+
+class TestCalculationExecutor:
+    @pytest.fixture(autouse=True)
+    def app(self):
+        return QCoreApplication.instance() or QCoreApplication([])
+
+    @pytest.fixture
+    def controller(self, mocker):
+        return mocker.Mock()
+
+    def make_executor(self, model, controller, max_queue_depth=4):
+        executor = CalculationExecutor(model, max_queue_depth=max_queue_depth)
+        executor.set_controller(controller)
+        return executor
+
+    # Jobs run off the calling thread and many progress reports reach the GUI as few
+    def test_progress_updates_are_coalesced(self, controller, mocker):
+        # Arrange
+        model = FakeCalculationModel(progress_reports=500)
+        executor = self.make_executor(model, controller)
+        results = mocker.Mock()
+        model.calculation_result.connect(results)
+
+        # Act
+        executor.submit(user_id=7)
+        process_events(executor)
+
+        # Assert
+        results.assert_called_once_with(7)
+        assert controller.update_progress.call_count < 500
+        controller.update_progress.assert_called_with(100, "Calculation complete")
+
+    # Submissions beyond the queue depth are rejected
+    def test_queue_depth_is_bounded(self, controller, mocker):
+        # Arrange
+        model = FakeCalculationModel()
+        model.release.clear()
+        executor = self.make_executor(model, controller, max_queue_depth=2)
+        rejected = mocker.Mock()
+        executor.calculation_rejected.connect(rejected)
+
+        # Act
+        job_ids = [executor.submit(user_id=user_id) for user_id in range(3)]
+        model.release.set()
+        process_events(executor)
+
+        # Assert
+        assert job_ids[2] is None
+        rejected.assert_called_once()
+        assert model.calls == [0, 1]
+        assert executor.pending_jobs == 0
+
+    # A queued job is removed before it starts
+    def test_cancel_queued_job(self, controller):
+        # Arrange
+        model = FakeCalculationModel()
+        model.release.clear()
+        executor = self.make_executor(model, controller)
+        executor.submit(user_id=1)
+        model.started.wait(5)
+        queued_job = executor.submit(user_id=2)
+
+        # Act
+        cancelled = executor.cancel(queued_job)
+        model.release.set()
+        process_events(executor)
+
+        # Assert
+        assert cancelled
+        assert model.calls == [1]
+
+    # A running job stops at its next progress report without delivering a result
+    def test_cancel_running_job(self, controller, mocker):
+        # Arrange
+        model = FakeCalculationModel()
+        model.release.clear()
+        executor = self.make_executor(model, controller)
+        results = mocker.Mock()
+        model.calculation_result.connect(results)
+        job_id = executor.submit(user_id=1)
+        model.started.wait(5)
+
+        # Act
+        executor.cancel(job_id)
+        model.release.set()
+        process_events(executor)
+
+        # Assert
+        results.assert_not_called()
+        controller.update_progress.assert_called_with(0, "Calculation cancelled")
+        assert not executor.cancel(job_id)
+
+    # A job cancelled after emitting its result completes instead of reporting a cancel
+    def test_cancel_after_result_completes_job(self, controller, mocker):
+        # Arrange
+        class EmittingModel(FakeCalculationModel):
+            def calculate_emissions(self, user_id, progress_callback):
+                progress_callback(95, "Finalizing results...")
+                self.calculation_result.emit(user_id)
+                self.started.set()
+                self.release.wait(5)
+                progress_callback(100, "Calculation complete")
+
+        model = EmittingModel()
+        model.release.clear()
+        executor = self.make_executor(model, controller)
+        results = mocker.Mock()
+        model.calculation_result.connect(results)
+        job_id = executor.submit(user_id=1)
+        model.started.wait(5)
+
+        # Act
+        executor.cancel(job_id)
+        model.release.set()
+        process_events(executor)
+
+        # Assert
+        results.assert_called_once_with(1)
+        controller.update_progress.assert_called_with(100, "Calculation complete")
+
+    # Errors are reported through calculation_failed instead of escaping the thread
+    def test_failed_calculation_is_reported(self, controller, mocker):
+        # Arrange
+        model = FakeCalculationModel()
+        model.calculate_emissions = mocker.Mock(side_effect=ValueError("Bad input"))
+        executor = self.make_executor(model, controller)
+        failed = mocker.Mock()
+        executor.calculation_failed.connect(failed)
+
+        # Act
+        job_id = executor.submit(user_id=1)
+        process_events(executor)
+
+        # Assert
+        failed.assert_called_once_with(job_id, "Bad input")
+
+    def test_shutdown_rejects_new_jobs(self, controller):
+        # Arrange
+        model = FakeCalculationModel()
+        model.release.clear()
+        executor = self.make_executor(model, controller)
+        executor.submit(user_id=1)
+        model.started.wait(5)
+        threading.Timer(0.05, model.release.set).start()
+
+        # Act
+        started = time.monotonic()
+        executor.shutdown()
+
+        # Assert
+        assert time.monotonic() - started < 5
+        assert executor.submit(user_id=2) is None
+
+    # Closing while a calculation is saving its result still delivers the result
+    def test_shutdown_delivers_result_of_running_job(self, controller):
+        # Arrange
+        class FinishingModel(FakeCalculationModel):
+            # Past its last progress report, so it is not cancelled
+            def calculate_emissions(self, user_id, progress_callback):
+                progress_callback(100, "Calculation complete")
+                self.started.set()
+                self.release.wait(5)
+                self.calculation_result.emit(user_id)
+
+        model = FinishingModel()
+        model.release.clear()
+        executor = self.make_executor(model, controller)
+        logged = []
+        executor.deliver_results_to(logged.append)
+        executor.submit(user_id=1)
+        model.started.wait(5)
+        threading.Timer(0.05, model.release.set).start()
+
+        flushed = []
+        executor.shut_down.connect(
+            lambda finished: flushed.append((finished, list(logged)))
+        )
+
+        # Act
+        executor.shutdown()
+
+        # Assert
+        assert logged == [1]
+        assert flushed == [(True, [1])]
+
+    # calculate_emissions reports through the callback instead of the controller
+    def test_calculate_emissions_uses_progress_callback(self, mocker):
+        # Arrange
+        mocker.patch(
+            "src.core.emissions_calculator.databasesModel.get_fuel_type_emissions_modifier",
+            return_value=2.31,
+        )
+        mocker.patch(
+            "src.core.emissions_calculator.databasesModel.get_farming_technique_info",
+            return_value=1.0,
+        )
+        model = calculationModel()
+        model.main_window_controller = mocker.Mock()
+        progress = mocker.Mock()
+
+        # Act
+        model.calculate_emissions(
+            1,
+            "gasoline",
+            "Liters",
+            10.0,
+            calculation_unit="Kilograms",
+            progress_callback=progress,
+        )
+
+        # Assert
+        model.main_window_controller.update_progress.assert_not_called()
+        progress.assert_called_with(100, "Calculation complete")
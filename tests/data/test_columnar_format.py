@@ -0,0 +1,219 @@
+import json
+import sqlite3
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+from src.data.columnar_format import EMISSIONS_SCHEMA, record_batch_to_rows
+from src.data.export_manager import ExportManager
+from src.data.import_manager import ImportManager, connection_pool
+from src.data.schema_migrations import migrate_emissions_database
+
+ROWS = [
+    (
+        index,
+        "diesel" if index % 2 else "gasoline",
+        index + 0.5,
+        "Liters",
+        2.68,
+        "Kilograms",
+        20.0,
+        "Celsius",
+        "Conventional",
+        f"2025-01-{index + 1:02d} 10:00:00",
+    )
+    for index in range(7)
+]
+
+INSERT = """INSERT INTO emissions (user_id, fuel_type, fuel_used, fuel_unit,
+    emissions, emissions_unit, temperature, temperature_unit,
+    farming_technique, timestamp) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"""
+
+SELECT = """SELECT user_id, fuel_type, fuel_used, fuel_unit, emissions, emissions_unit,
+    temperature, temperature_unit, farming_technique, timestamp
+    FROM emissions ORDER BY id"""
+
+
+class TestColumnarExportImport:
+    @pytest.fixture
+    def db_path(self, tmp_path, mocker):
+        db_path = str(tmp_path / "emissions.db")
+        with sqlite3.connect(db_path) as conn:
+            migrate_emissions_database(conn)
+            conn.executemany(INSERT, ROWS)
+        mocker.patch("src.data.import_manager.databases_folder", str(tmp_path))
+        yield db_path
+        connection_pool.close_database(db_path)
+
+    @pytest.fixture
+    def export_manager(self, db_path):
+        export_manager = ExportManager()
+        export_manager.db_path = db_path
+        export_manager.row_group_size = 3
+        return export_manager
+
+    def clear_table(self, db_path):
+        with sqlite3.connect(db_path) as conn:
+            conn.execute("DELETE FROM emissions")
+
+    # Parquet files hold typed, compressed columns in row groups
+    def test_export_to_parquet_writes_typed_row_groups(self, export_manager, tmp_path):
+        # Arrange
+        output_file = str(tmp_path / "export.parquet")
+
+        # Act
+        export_manager.export_to_parquet(output_file)
+
+        # Assert
+        parquet_file = pq.ParquetFile(output_file)
+        schema = parquet_file.schema_arrow
+        assert parquet_file.metadata.num_rows == 7
+        assert parquet_file.metadata.num_row_groups == 3
+        assert parquet_file.metadata.row_group(0).column(0).compression == "ZSTD"
+        # Parquet has no seconds unit, second timestamps are stored as milliseconds
+        assert schema.field("timestamp").type == pa.timestamp("ms")
+        assert schema.field("emissions").type == pa.float64()
+        assert pa.types.is_dictionary(schema.field("fuel_unit").type)
+
+    @pytest.mark.parametrize(
+        "extension, export, import_",
+        [
+            ("parquet", "export_to_parquet", "import_from_parquet"),
+            ("arrow", "export_to_arrow", "import_from_arrow"),
+        ],
+    )
+    def test_round_trip_keeps_rows(
+        self, export_manager, db_path, tmp_path, extension, export, import_
+    ):
+        # Arrange
+        output_file = str(tmp_path / f"export.{extension}")
+        getattr(export_manager, export)(output_file)
+        self.clear_table(db_path)
+
+        # Act
+        getattr(ImportManager(chunk_size=2), import_)(output_file)
+
+        # Assert
+        with sqlite3.connect(db_path) as conn:
+            assert conn.execute(SELECT).fetchall() == ROWS
+
+    # Files produced elsewhere may omit the unit columns and order columns freely
+    # Rows before start_entry are skipped, also across record batches
+    def test_import_from_parquet_starts_at_entry(
+        self, export_manager, db_path, tmp_path
+    ):
+        # Arrange
+        output_file = str(tmp_path / "export.parquet")
+        export_manager.export_to_parquet(output_file)
+        self.clear_table(db_path)
+
+        # Act
+        ImportManager(chunk_size=2).import_from_parquet(output_file, start_entry=5)
+
+        # Assert
+        with sqlite3.connect(db_path) as conn:
+            assert conn.execute(SELECT).fetchall() == ROWS[4:]
+
+    # A timestamp that cannot be parsed stops the export instead of becoming null
+    @pytest.mark.parametrize(
+        "extension, export",
+        [("parquet", "export_to_parquet"), ("arrow", "export_to_arrow")],
+    )
+    def test_unparseable_timestamp_fails_export(
+        self, export_manager, db_path, tmp_path, extension, export
+    ):
+        # Arrange
+        with sqlite3.connect(db_path) as conn:
+            conn.execute("UPDATE emissions SET timestamp = 'last Tuesday' WHERE id = 5")
+        output_file = tmp_path / f"export.{extension}"
+
+        # Act & Assert
+        with pytest.raises(ValueError, match="'last Tuesday'"):
+            getattr(export_manager, export)(str(output_file))
+        assert not output_file.exists()
+
+    # A database error while rows are read also removes the partial file
+    @pytest.mark.parametrize(
+        "extension, export",
+        [("parquet", "export_to_parquet"), ("arrow", "export_to_arrow")],
+    )
+    def test_failed_fetch_removes_partial_export(
+        self, export_manager, tmp_path, mocker, extension, export
+    ):
+        # Arrange
+        def fetch_data():
+            yield ROWS[0]
+            raise sqlite3.OperationalError("disk I/O error")
+
+        mocker.patch.object(export_manager, "fetch_data", side_effect=fetch_data)
+        export_manager.row_group_size = 1
+        output_file = tmp_path / f"export.{extension}"
+
+        # Act & Assert
+        with pytest.raises(sqlite3.OperationalError, match="disk I/O error"):
+            getattr(export_manager, export)(str(output_file))
+        assert not output_file.exists()
+
+    def test_record_batch_to_rows_accepts_foreign_files(self):
+        # Arrange
+        batch = pa.RecordBatch.from_pydict(
+            {
+                "timestamp": ["2025-01-01 10:00:00"],
+                "user_id": [1.0],
+                "fuel_type": ["diesel"],
+                "fuel_used": [3],
+                "emissions": [8.04],
+                "emissions_unit": ["Kilograms"],
+                "temperature": [20],
+                "farming_technique": ["Organic"],
+                "extra": ["ignored"],
+            }
+        )
+
+        # Act
+        rows = record_batch_to_rows(batch)
+
+        # Assert
+        assert rows == [
+            (
+                1,
+                "diesel",
+                3.0,
+                None,
+                8.04,
+                "Kilograms",
+                20.0,
+                None,
+                "Organic",
+                "2025-01-01 10:00:00",
+            )
+        ]
+
+    def test_record_batch_to_rows_rejects_missing_values(self):
+        # Arrange
+        batch = pa.RecordBatch.from_pylist(
+            [dict(zip(EMISSIONS_SCHEMA.names, ROWS[0]), emissions=None)]
+        )
+
+        # Act & Assert
+        with pytest.raises(ValueError, match="Missing value for key: emissions"):
+            record_batch_to_rows(batch)
+
+    def test_import_from_jsonl(self, db_path, tmp_path):
+        # Arrange
+        self.clear_table(db_path)
+        input_file = tmp_path / "history.jsonl"
+        input_file.write_text(
+            "\n".join(
+                json.dumps(dict(zip(EMISSIONS_SCHEMA.names, row))) for row in ROWS
+            ),
+            encoding="utf-8",
+        )
+
+        # Act
+        ImportManager(chunk_size=2).import_from_jsonl(str(input_file))
+
+        # Assert
+        with sqlite3.connect(db_path) as conn:
+            assert conn.execute(SELECT).fetchall() == ROWS
@@ -0,0 +1,199 @@
+import sqlite3
+import threading
+
+import pytest
+from PySide6.QtCore import QRunnable, QThreadPool
+
+from src.data.connection_pool import ConnectionPool
+
+
+class TestConnectionPool:
+    @pytest.fixture
+    def pool(self):
+        pool = ConnectionPool(busy_timeout_ms=1000)
+        yield pool
+        pool.close_all()
+
+    @pytest.fixture
+    def db_path(self, tmp_path):
+        return str(tmp_path / "emissions.db")
+
+    # Connections are configured for WAL, NORMAL sync, mmap and a busy timeout
+    def test_connection_is_configured(self, pool, db_path):
+        # Act
+        conn = pool.get_connection(db_path)
+
+        # Assert
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        assert conn.execute("PRAGMA synchronous").fetchone()[0] == 1  # NORMAL
+        assert conn.execute("PRAGMA busy_timeout").fetchone()[0] == 1000
+        assert conn.execute("PRAGMA mmap_size").fetchone()[0] == pool.mmap_size
+
+    # The same thread reuses its connection, other threads get their own
+    def test_connections_are_per_thread(self, pool, db_path):
+        # Arrange
+        other_thread_connections = []
+
+        # Act
+        first = pool.get_connection(db_path)
+        second = pool.get_connection(db_path)
+        thread = threading.Thread(
+            target=lambda: other_thread_connections.append(pool.get_connection(db_path))
+        )
+        thread.start()
+        thread.join()
+
+        # Assert
+        assert first is second
+        assert other_thread_connections[0] is not first
+
+    # The connection context manager rolls back when the block raises
+    def test_connection_context_rolls_back_on_error(self, pool, db_path):
+        # Arrange
+        with pool.connection(db_path) as conn:
+            conn.execute("CREATE TABLE emissions (user_id INTEGER)")
+
+        # Act
+        with pytest.raises(ValueError):
+            with pool.connection(db_path) as conn:
+                conn.execute("INSERT INTO emissions VALUES (1)")
+                raise ValueError("Invalid row")
+
+        # Assert
+        count = pool.get_connection(db_path).execute("SELECT COUNT(*) FROM emissions")
+        assert count.fetchone()[0] == 0
+
+    # Readers are not blocked by an open write transaction
+    def test_reader_runs_while_writer_holds_transaction(self, pool, db_path):
+        # Arrange
+        with pool.connection(db_path) as conn:
+            conn.execute("CREATE TABLE emissions (user_id INTEGER)")
+            conn.execute("INSERT INTO emissions VALUES (1)")
+        writer = pool.get_connection(db_path)
+        writer.execute("INSERT INTO emissions VALUES (2)")  # opens a transaction
+        counts = []
+
+        # Act
+        thread = threading.Thread(
+            target=lambda: counts.append(
+                pool.get_connection(db_path)
+                .execute("SELECT COUNT(*) FROM emissions")
+                .fetchone()[0]
+            )
+        )
+        thread.start()
+        thread.join()
+        writer.commit()
+
+        # Assert
+        assert counts == [1]
+
+    # Closing a database makes every thread open a fresh connection
+    def test_close_database_reopens_connections(self, pool, db_path):
+        # Arrange
+        first = pool.get_connection(db_path)
+
+        # Act
+        pool.close_database(db_path)
+        second = pool.get_connection(db_path)
+
+        # Assert
+        assert second is not first
+        assert second.execute("SELECT 1").fetchone()[0] == 1
+
+    # Another thread's connection stays usable and is replaced on its next use
+    def test_close_database_leaves_other_threads_connections_open(self, pool, db_path):
+        # Arrange
+        with pool.connection(db_path) as conn:
+            conn.execute("CREATE TABLE emissions (user_id INTEGER)")
+        opened = threading.Event()
+        closed = threading.Event()
+        results = []
+
+        def reader():
+            first = pool.get_connection(db_path)
+            opened.set()
+            closed.wait(5)
+            results.append(first.execute("SELECT COUNT(*) FROM emissions").fetchone())
+            results.append(pool.get_connection(db_path) is first)
+
+        thread = threading.Thread(target=reader)
+        thread.start()
+        opened.wait(5)
+
+        # Act
+        pool.close_database(db_path)
+        closed.set()
+        thread.join()
+
+        # Assert
+        assert results == [(0,), False]
+
+    # Shutting down leaves a connection another thread is using open
+    def test_close_all_leaves_other_threads_connections_open(self, pool, db_path):
+        # Arrange
+        with pool.connection(db_path) as conn:
+            conn.execute("CREATE TABLE emissions (user_id INTEGER)")
+        own = pool.get_connection(db_path)
+        opened = threading.Event()
+        closed = threading.Event()
+        results = []
+
+        def calculation():
+            first = pool.get_connection(db_path)
+            opened.set()
+            closed.wait(5)
+            with first:
+                first.execute("INSERT INTO emissions VALUES (1)")
+            results.append(first.execute("SELECT COUNT(*) FROM emissions").fetchone())
+
+        thread = threading.Thread(target=calculation)
+        thread.start()
+        opened.wait(5)
+
+        # Act
+        pool.close_all()
+        closed.set()
+        thread.join()
+
+        # Assert
+        assert results == [(1,)]
+        with pytest.raises(sqlite3.ProgrammingError):
+            own.execute("SELECT 1")
+
+    # A thread's connections are closed when the thread ends
+    def test_finished_threads_release_their_connections(self, pool, db_path):
+        # Arrange
+        opened = []
+        threads = [
+            threading.Thread(target=lambda: opened.append(pool.get_connection(db_path)))
+            for _ in range(3)
+        ]
+
+        # Act
+        for thread in threads:
+            thread.start()
+            thread.join()
+
+        # Assert
+        assert len(opened) == 3
+        assert pool._connections == []
+        with pytest.raises(sqlite3.ProgrammingError):
+            opened[0].execute("SELECT 1")
+
+    # Jobs on Qt's thread pool do not leave their connections behind
+    def test_qt_pool_jobs_release_their_connections(self, pool, db_path):
+        # Arrange
+        thread_pool = QThreadPool()
+
+        class Job(QRunnable):
+            def run(self):
+                pool.get_connection(db_path).execute("SELECT 1")
+
+        # Act
+        for _ in range(5):
+            thread_pool.start(Job())
+        thread_pool.waitForDone()
+
+        # Assert
+        assert pool._connections == []
@@ -0,0 +1,126 @@
+import sqlite3
+import sys
+import threading
+
+import pytest
+
+from src.data.emissions_factor_registry import EmissionsFactorRegistry
+
+
+def create_emissions_variables_database(db_path, fuel_types, farming_techniques):
+    conn = sqlite3.connect(db_path)
+    conn.execute(
+        "CREATE TABLE fuel_types (fuel_type TEXT PRIMARY KEY, emissions_modifier REAL)"
+    )
+    conn.execute(
+        "CREATE TABLE farming_techniques (technique TEXT PRIMARY KEY, emissions_modifier REAL, description TEXT)"
+    )
+    conn.executemany("INSERT INTO fuel_types VALUES (?, ?)", fuel_types)
+    conn.executemany(
+        "INSERT INTO farming_techniques VALUES (?, ?, ?)", farming_techniques
+    )
+    conn.commit()
+    conn.close()
+
+
+class TestEmissionsFactorRegistry:
+    @pytest.fixture
+    def db_path(self, tmp_path):
+        db_path = tmp_path / "emissions_variables.db"
+        create_emissions_variables_database(
+            db_path,
+            [("gasoline", 2.31), ("diesel", 2.68)],
+            [("conventional", 1.0, ""), ("organic", 0.7, "No synthetic inputs")],
+        )
+        return str(db_path)
+
+    # Tables are loaded once and later lookups are served from memory
+    def test_lookups_load_tables_once(self, db_path, mocker):
+        # Arrange
+        registry = EmissionsFactorRegistry(db_path)
+        connect_spy = mocker.spy(sqlite3, "connect")
+
+        # Act
+        gasoline = registry.get_fuel_type_emissions_modifier("gasoline")
+        organic = registry.get_farming_technique("organic")
+        fuel_types = registry.fuel_types()
+
+        # Assert
+        assert gasoline == 2.31
+        assert organic["emissions_modifier"] == 0.7
+        assert organic["description"] == "No synthetic inputs"
+        assert fuel_types == ["gasoline", "diesel"]
+        assert connect_spy.call_count == 1
+        assert registry.stats() == {"hits": 2, "misses": 1, "reloads": 1}
+
+    # Unknown keys return None instead of raising
+    def test_unknown_keys_return_none(self, db_path):
+        # Arrange
+        registry = EmissionsFactorRegistry(db_path)
+
+        # Act & Assert
+        assert registry.get_fuel_type_emissions_modifier("kerosene") is None
+        assert registry.get_farming_technique("biodynamic") is None
+
+    # Invalidating the registry picks up a rebuilt database
+    def test_invalidate_reloads_changed_factors(self, db_path):
+        # Arrange
+        registry = EmissionsFactorRegistry(db_path)
+        assert registry.get_fuel_type_emissions_modifier("gasoline") == 2.31
+        with sqlite3.connect(db_path) as conn:
+            conn.execute(
+                "UPDATE fuel_types SET emissions_modifier = 3.0 WHERE fuel_type = 'gasoline'"
+            )
+
+        # Act
+        stale = registry.get_fuel_type_emissions_modifier("gasoline")
+        registry.invalidate()
+        fresh = registry.get_fuel_type_emissions_modifier("gasoline")
+
+        # Assert
+        assert stale == 2.31
+        assert fresh == 3.0
+        assert registry.reloads == 2
+
+    # A missing database leaves the registry empty and retries on the next lookup
+    def test_missing_database_is_retried(self, tmp_path):
+        # Arrange
+        db_path = tmp_path / "emissions_variables.db"
+        registry = EmissionsFactorRegistry(str(db_path))
+
+        # Act
+        first = registry.fuel_types()
+        create_emissions_variables_database(db_path, [("propane", 1.55)], [])
+        second = registry.fuel_types()
+
+        # Assert
+        assert first == []
+        assert second == ["propane"]
+        assert registry.misses == 2
+
+    # Lookups from many threads are all counted
+    def test_stats_count_concurrent_lookups(self, db_path):
+        # Arrange
+        registry = EmissionsFactorRegistry(db_path)
+        switch_interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+
+        def look_up():
+            for _ in range(2000):
+                registry.get_fuel_type_emissions_modifier("gasoline")
+
+        threads = [threading.Thread(target=look_up) for _ in range(8)]
+
+        # Act
+        try:
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        finally:
+            sys.setswitchinterval(switch_interval)
+
+        # Assert
+        stats = registry.stats()
+        assert stats["hits"] + stats["misses"] == 16000
+        assert stats["misses"] == 1
@@ -0,0 +1,123 @@
+import sqlite3
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.data.database_model import connection_pool, databasesModel
+from src.data.schema_migrations import migrate_emissions_database
+
+ROWS = [
+    (1, "diesel", 10.0, 3.0, "Kilograms", "2025-01-02 00:00:00"),
+    (1, "diesel", 10.0, 1.0, "Kilograms", "2025-01-01 00:00:00"),
+    (2, "diesel", 10.0, 2.0, "Kilograms", "2025-01-01 12:00:00"),
+    (1, "gasoline", 10.0, 4.0, "Kilograms", "2025-01-01 06:00:00"),
+    (1, "diesel", 10.0, 5.0, "Grams", "2025-01-01 06:00:00"),
+]
+
+
+class TestEmissionsHistory:
+    @pytest.fixture
+    def databases_folder(self, tmp_path, mocker):
+        mocker.patch("src.data.database_model.databases_folder", str(tmp_path))
+        db_path = str(tmp_path / "emissions.db")
+        with sqlite3.connect(db_path) as conn:
+            migrate_emissions_database(conn)
+            conn.executemany(
+                """INSERT INTO emissions
+                (user_id, fuel_type, fuel_used, emissions, emissions_unit, timestamp)
+                VALUES (?, ?, ?, ?, ?, ?)""",
+                ROWS,
+            )
+        yield tmp_path
+        connection_pool.close_database(db_path)
+
+    # SQLite returns epoch seconds ordered by time for the filtered rows
+    def test_time_series_returns_epoch_seconds_in_order(self, databases_folder):
+        # Act
+        series = databasesModel.get_emissions_time_series(
+            time_frame=["2025-01-01 00:00:00", "2025-01-31 00:00:00"],
+            user_id="1",
+            fuel_type="diesel",
+            emissions_unit="Kilograms",
+        )
+
+        # Assert
+        assert series == [(1735689600, 1.0), (1735776000, 3.0)]
+
+    # The time frame excludes rows outside of it
+    def test_time_series_filters_time_frame(self, databases_folder):
+        # Act
+        series = databasesModel.get_emissions_time_series(
+            time_frame=["2025-01-01 01:00:00", "2025-01-01 23:00:00"],
+            fuel_type="diesel",
+            emissions_unit="Kilograms",
+        )
+
+        # Assert
+        assert series == [(1735732800, 2.0)]
+
+    # Times match the per-row pandas parsing the chart used before
+    def test_time_series_matches_pandas_timestamps(self, databases_folder):
+        # Act
+        series = databasesModel.get_emissions_time_series()
+
+        # Assert
+        expected = sorted(pd.to_datetime(row[5]).timestamp() for row in ROWS)
+        assert np.array(series, dtype=np.float64)[:, 0].tolist() == expected
+
+    # Every user's points come back from one query, ordered by time
+    def test_time_series_by_user_groups_users(self, databases_folder):
+        # Act
+        series = databasesModel.get_emissions_time_series_by_user(
+            time_frame=["2025-01-01 00:00:00", "2025-01-31 00:00:00"],
+            fuel_type="diesel",
+            emissions_unit="Kilograms",
+        )
+
+        # Assert
+        assert series == [
+            (1, 1735689600, 1.0),
+            (2, 1735732800, 2.0),
+            (1, 1735776000, 3.0),
+        ]
+
+    # Without an emissions unit every row is read in kilograms
+    def test_time_series_converts_units_to_kilograms(self, databases_folder):
+        # Act
+        series = databasesModel.get_emissions_time_series(
+            user_id="1", fuel_type="diesel"
+        )
+
+        # Assert
+        assert series == [
+            (1735689600, 1.0),
+            (1735711200, pytest.approx(0.005)),
+            (1735776000, 3.0),
+        ]
+
+    # time_range is a half-open range of epoch seconds
+    def test_time_series_time_range_excludes_end(self, databases_folder):
+        # Act
+        series = databasesModel.get_emissions_time_series(
+            time_range=(1735689600, 1735776000),
+            user_id="1",
+            fuel_type="diesel",
+            emissions_unit="Kilograms",
+        )
+
+        # Assert
+        assert series == [(1735689600, 1.0)]
+
+    # Totals come from the rollups with the same filters as the history
+    def test_emissions_total_uses_filters(self, databases_folder):
+        # Act
+        total = databasesModel.get_emissions_total(
+            ["2025-01-01 00:00:00", "2025-02-01 00:00:00"],
+            user_id="1",
+            fuel_type="diesel",
+            emissions_unit="Kilograms",
+        )
+
+        # Assert
+        assert total == (4.0, 2)
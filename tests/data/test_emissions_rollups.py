@@ -0,0 +1,194 @@
+import random
+import sqlite3
+from datetime import datetime, timedelta
+
+import pytest
+
+from src.data.emissions_rollups import plan_range, range_total
+from src.data.schema_migrations import (
+    EMISSIONS_SORT_INDEXES,
+    EMISSIONS_TABLE_SCHEMA,
+    migrate_emissions_database,
+)
+
+INSERT = """INSERT INTO emissions (user_id, fuel_type, emissions, emissions_unit, timestamp)
+    VALUES (?, ?, ?, ?, ?)"""
+
+
+def brute_force_total(conn, start, end, **filters):
+    query = "SELECT TOTAL(emissions), COUNT(*) FROM emissions WHERE timestamp >= ? AND timestamp < ?"
+    params = [start, end]
+    for column, value in filters.items():
+        query += f" AND {column} = ?"
+        params.append(value)
+    return conn.execute(query, params).fetchone()
+
+
+class TestEmissionsRollups:
+    @pytest.fixture
+    def conn(self, tmp_path):
+        conn = sqlite3.connect(tmp_path / "emissions.db")
+        migrate_emissions_database(conn)
+        yield conn
+        conn.close()
+
+    @pytest.fixture
+    def random_rows(self):
+        generator = random.Random(7)
+        start = datetime(2024, 11, 20)
+        return [
+            (
+                generator.choice([1, 2]),
+                generator.choice(["diesel", "gasoline"]),
+                round(generator.uniform(0, 10), 2),
+                "Kilograms",
+                (start + timedelta(minutes=generator.randrange(200_000))).strftime(
+                    "%Y-%m-%d %H:%M:%S"
+                ),
+            )
+            for _ in range(3000)
+        ]
+
+    # A range is split into the coarsest whole buckets and raw partial hours
+    def test_plan_range_uses_coarsest_buckets(self):
+        # Act
+        parts = plan_range("2025-01-30 22:30:00", "2025-03-02 01:15:00")
+
+        # Assert
+        assert [(table, str(start), str(end)) for table, start, end in parts] == [
+            (None, "2025-01-30 22:30:00", "2025-01-30 23:00:00"),
+            ("emissions_rollup_hourly", "2025-01-30 23:00:00", "2025-01-31 00:00:00"),
+            ("emissions_rollup_daily", "2025-01-31 00:00:00", "2025-02-01 00:00:00"),
+            ("emissions_rollup_monthly", "2025-02-01 00:00:00", "2025-03-01 00:00:00"),
+            ("emissions_rollup_daily", "2025-03-01 00:00:00", "2025-03-02 00:00:00"),
+            ("emissions_rollup_hourly", "2025-03-02 00:00:00", "2025-03-02 01:00:00"),
+            (None, "2025-03-02 01:00:00", "2025-03-02 01:15:00"),
+        ]
+
+    # Range totals match summing the raw rows, with and without filters
+    @pytest.mark.parametrize(
+        "start, end, filters",
+        [
+            ("2024-11-20 00:00:00", "2025-06-01 00:00:00", {}),
+            ("2024-11-23 13:17:00", "2025-02-11 08:45:30", {}),
+            ("2024-12-31 23:59:59", "2025-01-01 00:00:01", {}),
+            ("2024-12-01 10:10:00", "2025-03-15 16:20:00", {"user_id": 2}),
+            (
+                "2024-11-25 00:00:00",
+                "2025-01-05 12:00:00",
+                {"user_id": 1, "fuel_type": "diesel", "emissions_unit": "Kilograms"},
+            ),
+        ],
+    )
+    def test_range_total_matches_raw_rows(self, conn, random_rows, start, end, filters):
+        # Arrange
+        conn.executemany(INSERT, random_rows)
+
+        # Act
+        total, row_count = range_total(conn, start, end, **filters)
+
+        # Assert
+        expected_total, expected_count = brute_force_total(conn, start, end, **filters)
+        assert row_count == expected_count
+        assert total == pytest.approx(expected_total)
+
+    # Updates and deletes move totals between buckets
+    def test_triggers_follow_updates_and_deletes(self, conn):
+        # Arrange
+        conn.executemany(
+            INSERT,
+            [
+                (1, "diesel", 5.0, "Kilograms", "2025-01-01 10:00:00"),
+                (1, "diesel", 7.0, "Kilograms", "2025-01-02 10:00:00"),
+            ],
+        )
+
+        # Act
+        conn.execute(
+            "UPDATE emissions SET timestamp = '2025-02-01 10:00:00', emissions = 8.0 WHERE id = 1"
+        )
+        conn.execute("DELETE FROM emissions WHERE id = 2")
+
+        # Assert
+        assert range_total(conn, "2025-01-01", "2025-02-01") == (0.0, 0)
+        assert range_total(conn, "2025-02-01", "2025-03-01") == (8.0, 1)
+
+    # Raw partial hours read timestamps the way the rollups bucket them
+    def test_range_total_counts_t_separated_timestamps(self, conn):
+        # Arrange
+        conn.executemany(
+            INSERT,
+            [
+                (1, "diesel", 5.0, "Kilograms", "2024-01-01T10:30:00"),
+                (1, "diesel", 5.0, "Kilograms", "2024-01-01 10:30:00"),
+                (1, "diesel", 3.0, "Kilograms", "2024-01-01T23:59:30"),
+            ],
+        )
+
+        # Act
+        partial_hour = range_total(conn, "2024-01-01 10:00:00", "2024-01-01 10:45:00")
+        whole_day = range_total(conn, "2024-01-01", "2024-01-02")
+        before_midnight = range_total(
+            conn, "2024-01-01 23:59:00", "2024-01-02 00:00:00"
+        )
+
+        # Assert
+        assert partial_hour == (10.0, 2)
+        assert whole_day == (13.0, 3)
+        assert before_midnight == (3.0, 1)
+
+    # Migrating a version 2 database fills the rollups from existing rows
+    def test_migration_backfills_existing_rows(self, tmp_path):
+        # Arrange
+        conn = sqlite3.connect(tmp_path / "old.db")
+        conn.execute(EMISSIONS_TABLE_SCHEMA)
+        for statement in EMISSIONS_SORT_INDEXES:
+            conn.execute(statement)
+        conn.executemany(
+            INSERT,
+            [
+                (1, "diesel", 1.5, "Kilograms", "2025-01-01 10:00:00"),
+                (2, "diesel", 2.5, "Kilograms", "2025-01-15 10:00:00"),
+                (2, None, 4.0, None, "2025-01-20"),
+            ],
+        )
+        conn.execute("PRAGMA user_version = 2")
+        conn.commit()
+
+        # Act
+        migrate_emissions_database(conn)
+
+        # Assert
+        assert conn.execute(
+            "SELECT TOTAL(total_emissions), TOTAL(row_count) FROM emissions_rollup_monthly"
+        ).fetchone() == (8.0, 3)
+        # The row without a unit is kept in the rollups but left out of totals
+        assert range_total(conn, "2025-01-01", "2025-02-01") == (4.0, 2)
+        assert range_total(conn, "2025-01-01", "2025-02-01", user_id=2) == (2.5, 1)
+        conn.close()
+
+    # Totals of rows in different units are summed in kilograms
+    def test_range_total_converts_units_to_kilograms(self, conn):
+        # Arrange
+        conn.executemany(
+            INSERT,
+            [
+                (1, "diesel", 500.0, "Grams", "2025-01-01 10:00:00"),
+                (1, "diesel", 2.0, "Kilograms", "2025-01-15 10:30:00"),
+                (1, "diesel", 0.25, "Metric Tons", "2025-02-03 10:15:00"),
+                (1, "diesel", 750000.0, "Milligrams", "2025-02-03 11:45:00"),
+            ],
+        )
+
+        # Act
+        whole_months = range_total(conn, "2025-01-01", "2025-03-01")
+        partial_hours = range_total(conn, "2025-02-03 10:10:00", "2025-02-03 11:50:00")
+        grams_only = range_total(
+            conn, "2025-01-01", "2025-03-01", emissions_unit="Grams"
+        )
+
+        # Assert
+        assert whole_months[0] == pytest.approx(253.25)
+        assert whole_months[1] == 4
+        assert partial_hours[0] == pytest.approx(250.75)
+        assert grams_only == (pytest.approx(0.5), 1)
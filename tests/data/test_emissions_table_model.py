@@ -0,0 +1,172 @@
+import sqlite3
+
+import pytest
+from PySide6.QtCore import QCoreApplication, Qt
+
+from src.data.emissions_table_model import (
+    TABLE_COLUMNS,
+    EmissionsTableModel,
+    connection_pool,
+)
+from src.data.schema_migrations import migrate_emissions_database
+
+
+def make_row(user_id, fuel_unit="Liters"):
+    return (
+        user_id,
+        "diesel",
+        float(user_id),
+        fuel_unit,
+        26.8,
+        "Kilograms",
+        20.0,
+        "Celsius",
+        "Organic",
+    )
+
+
+class TestEmissionsTableModel:
+    @pytest.fixture(autouse=True)
+    def app(self):
+        return QCoreApplication.instance() or QCoreApplication([])
+
+    @pytest.fixture
+    def db_path(self, tmp_path):
+        db_path = str(tmp_path / "emissions.db")
+        with sqlite3.connect(db_path) as conn:
+            migrate_emissions_database(conn)
+        yield db_path
+        connection_pool.close_database(db_path)
+
+    def insert_rows(self, db_path, rows):
+        with sqlite3.connect(db_path) as conn:
+            conn.executemany(
+                """INSERT INTO emissions (user_id, fuel_type, fuel_used, fuel_unit,
+                emissions, emissions_unit, temperature, temperature_unit, farming_technique)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                rows,
+            )
+
+    def column(self, model, name):
+        column = TABLE_COLUMNS.index(name)
+        return [model.data(model.index(row, column)) for row in range(model.rowCount())]
+
+    # rowCount is the table size, rows are only read when asked for
+    def test_rows_are_read_on_demand(self, db_path, mocker):
+        # Arrange
+        self.insert_rows(db_path, [make_row(i) for i in range(10)])
+        model = EmissionsTableModel(db_path, page_size=4)
+        fetch_page = mocker.spy(model, "_fetch_page")
+
+        # Act
+        row_count = model.rowCount()
+        value = model.data(model.index(9, TABLE_COLUMNS.index("user_id")))
+
+        # Assert
+        assert row_count == 10
+        assert value == 9
+        fetch_page.assert_called_once_with(2)
+        assert model.headerData(1, Qt.Horizontal) == "fuel_type"
+
+    # Pages past the cache size evict the least recently used page
+    def test_page_cache_is_bounded(self, db_path):
+        # Arrange
+        self.insert_rows(db_path, [make_row(i) for i in range(20)])
+        model = EmissionsTableModel(db_path, page_size=2, max_pages=3)
+
+        # Act
+        values = self.column(model, "user_id")
+
+        # Assert
+        assert values == list(range(20))
+        assert list(model._pages) == [7, 8, 9]
+
+    # Later pages start from the recorded key of an earlier page
+    def test_keyset_pagination_after_recorded_page(self, db_path, mocker):
+        # Arrange
+        self.insert_rows(db_path, [make_row(i) for i in range(10)])
+        model = EmissionsTableModel(db_path, page_size=2)
+        model.data(model.index(0, 0))
+        page_query = mocker.spy(model, "_page_query")
+
+        # Act
+        value = model.data(model.index(6, 0))
+
+        # Assert
+        assert value == 6
+        page_query.assert_called_once_with((2,))
+
+    # Sorting goes through ORDER BY, NULLs first in both directions
+    def test_sort_descending_with_nulls(self, db_path):
+        # Arrange
+        self.insert_rows(db_path, [make_row(i) for i in range(9)])
+        with sqlite3.connect(db_path) as conn:
+            conn.execute("UPDATE emissions SET emissions = NULL WHERE id % 3 = 0")
+            conn.execute("UPDATE emissions SET emissions = id WHERE id % 3 != 0")
+        model = EmissionsTableModel(db_path, page_size=2)
+
+        # Act
+        model.sort(TABLE_COLUMNS.index("emissions"), Qt.DescendingOrder)
+        values = self.column(model, "emissions")
+
+        # Assert
+        assert values == [None, None, None, 8, 7, 5, 4, 2, 1]
+
+    # Columns without a sort index keep the table in id order
+    def test_sort_by_unindexed_column_keeps_id_order(self, db_path):
+        # Arrange
+        self.insert_rows(db_path, [make_row(i) for i in range(3)])
+        model = EmissionsTableModel(db_path)
+
+        # Act
+        model.sort(TABLE_COLUMNS.index("fuel_type"), Qt.DescendingOrder)
+
+        # Assert
+        assert model.sort_column is None
+        assert self.column(model, "user_id") == [0, 1, 2]
+
+    # prefetch loads the visible pages and their neighbours
+    def test_prefetch_loads_neighbouring_pages(self, db_path):
+        # Arrange
+        self.insert_rows(db_path, [make_row(i) for i in range(20)])
+        model = EmissionsTableModel(db_path, page_size=2)
+
+        # Act
+        model.prefetch(6, 7)
+
+        # Assert
+        assert sorted(model._pages) == [2, 3, 4]
+
+    # refresh appends new rows in id order without resetting the model
+    def test_refresh_appends_new_rows(self, db_path, mocker):
+        # Arrange
+        self.insert_rows(db_path, [make_row(i) for i in range(3)])
+        model = EmissionsTableModel(db_path, page_size=2)
+        self.column(model, "user_id")
+        inserted = mocker.Mock()
+        model.rowsInserted.connect(inserted)
+        reset = mocker.Mock()
+        model.modelReset.connect(reset)
+
+        # Act
+        self.insert_rows(db_path, [make_row(i) for i in range(3, 5)])
+        added = model.refresh()
+
+        # Assert
+        assert added == 2
+        assert inserted.call_args.args[1:] == (3, 4)
+        reset.assert_not_called()
+        assert self.column(model, "user_id") == [0, 1, 2, 3, 4]
+
+    # A missing table is logged and leaves the model empty
+    def test_missing_table_leaves_model_empty(self, tmp_path):
+        # Arrange
+        db_path = str(tmp_path / "empty.db")
+
+        # Act
+        model = EmissionsTableModel(db_path)
+
+        # Assert
+        assert model.rowCount() == 0
+        assert model.refresh() == 0
+        connection_pool.close_database(db_path)
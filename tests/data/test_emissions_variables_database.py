@@ -0,0 +1,172 @@
+import json
+import os
+import sqlite3
+import threading
+
+import pytest
+
+from src.data import database_model
+from src.data.database_model import connection_pool, databasesModel
+from src.data.emissions_factor_registry import EmissionsFactorRegistry
+
+
+def write_factors(path, gasoline_modifier):
+    path.write_text(
+        json.dumps(
+            {
+                "fuel_types": [
+                    {"fuel_type": "gasoline", "emissions_modifier": gasoline_modifier},
+                    {"fuel_type": "diesel", "emissions_modifier": 2.68},
+                ],
+                "farming_techniques": [
+                    {"technique": "organic", "emissions_modifier": 0.7}
+                ],
+            }
+        ),
+        encoding="utf-8",
+    )
+
+
+class TestEmissionsVariablesDatabase:
+    @pytest.fixture
+    def factors_path(self, tmp_path, mocker):
+        factors_path = tmp_path / "emissions_variables.json"
+        write_factors(factors_path, 2.31)
+        mocker.patch.object(
+            databasesModel, "load_settings", return_value=str(factors_path)
+        )
+        return factors_path
+
+    @pytest.fixture
+    def registry(self, tmp_path, mocker):
+        mocker.patch.object(database_model, "databases_folder", str(tmp_path))
+        db_path = str(tmp_path / "emissions_variables.db")
+        registry = EmissionsFactorRegistry(db_path)
+        mocker.patch.object(database_model, "emissions_factor_registry", registry)
+        yield registry
+        connection_pool.close_database(db_path)
+
+    @pytest.fixture
+    def model(self, registry):
+        return databasesModel()
+
+    # An unchanged factor file keeps the existing database
+    def test_unchanged_factor_file_is_not_rebuilt(
+        self, model, registry, factors_path, mocker
+    ):
+        # Arrange
+        assert model.initialize_emissions_variables_database() == 1
+        inode = os.stat(registry.db_path).st_ino
+        load_spy = mocker.spy(databasesModel, "load_emissions_variables")
+        hash_spy = mocker.spy(database_model.hashlib, "sha256")
+
+        # Act
+        result = model.initialize_emissions_variables_database()
+
+        # Assert
+        assert result == 1
+        load_spy.assert_not_called()
+        hash_spy.assert_not_called()
+        assert os.stat(registry.db_path).st_ino == inode
+
+    # Touching the file without changing its content only rehashes it
+    def test_touched_factor_file_is_hashed_not_rebuilt(
+        self, model, registry, factors_path, mocker
+    ):
+        # Arrange
+        model.initialize_emissions_variables_database()
+        stat = os.stat(factors_path)
+        os.utime(factors_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        load_spy = mocker.spy(databasesModel, "load_emissions_variables")
+
+        # Act
+        model.initialize_emissions_variables_database()
+
+        # Assert
+        load_spy.assert_not_called()
+
+    # Changed factors are built aside and swapped in, the registry reloads them
+    def test_changed_factor_file_is_swapped_in(self, model, registry, factors_path):
+        # Arrange
+        model.initialize_emissions_variables_database()
+        assert registry.get_fuel_type_emissions_modifier("gasoline") == 2.31
+        write_factors(factors_path, 2.5)
+
+        # Act
+        result = model.initialize_emissions_variables_database()
+
+        # Assert
+        assert result == 1
+        assert registry.get_fuel_type_emissions_modifier("gasoline") == 2.5
+        assert registry.get_farming_technique("organic")["emissions_modifier"] == 0.7
+        assert not os.path.exists(f"{registry.db_path}.tmp")
+        with sqlite3.connect(registry.db_path) as conn:
+            assert conn.execute("SELECT COUNT(*) FROM fuel_types").fetchone() == (2,)
+
+    # A reader's open connection keeps working and sees the swapped in factors
+    def test_swap_keeps_other_threads_connections_open(
+        self, model, registry, factors_path
+    ):
+        # Arrange
+        model.initialize_emissions_variables_database()
+        write_factors(factors_path, 2.5)
+        query = "SELECT emissions_modifier FROM fuel_types WHERE fuel_type = 'gasoline'"
+        swapped = threading.Event()
+        read_once = threading.Event()
+        results = []
+
+        def reader():
+            conn = connection_pool.get_connection(registry.db_path)
+            results.append(conn.execute(query).fetchone())
+            read_once.set()
+            swapped.wait(5)
+            results.append(conn.execute(query).fetchone())
+
+        thread = threading.Thread(target=reader)
+        thread.start()
+        read_once.wait(5)
+
+        # Act
+        model.initialize_emissions_variables_database()
+        swapped.set()
+        thread.join()
+
+        # Assert
+        assert results == [(2.31,), (2.5,)]
+
+    # A factor file that fails to load leaves the current database in place
+    def test_invalid_factor_file_keeps_database(self, model, registry, factors_path):
+        # Arrange
+        model.initialize_emissions_variables_database()
+        factors_path.write_text("{not json", encoding="utf-8")
+
+        # Act
+        result = model.initialize_emissions_variables_database()
+
+        # Assert
+        assert result == 0
+        assert registry.get_fuel_type_emissions_modifier("gasoline") == 2.31
+
+    # Factors that fail to insert are discarded and retried on the next launch
+    def test_malformed_factors_are_not_swapped_in(
+        self, model, registry, factors_path, mocker
+    ):
+        # Arrange
+        model.initialize_emissions_variables_database()
+        factors_path.write_text(
+            json.dumps({"fuel_types": [{"fuel_type": "gasoline"}]}), encoding="utf-8"
+        )
+        replace_spy = mocker.spy(registry, "replace_database")
+
+        # Act
+        first = model.initialize_emissions_variables_database()
+        second = model.initialize_emissions_variables_database()
+
+        # Assert
+        assert (first, second) == (0, 0)
+        replace_spy.assert_not_called()
+        assert not os.path.exists(f"{registry.db_path}.tmp")
+        assert registry.get_fuel_type_emissions_modifier("gasoline") == 2.31
+        assert model.read_factor_fingerprint(registry.db_path)["sha256"] != (
+            model.factor_file_fingerprint(str(factors_path), {})["sha256"]
+        )
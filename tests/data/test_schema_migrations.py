@@ -0,0 +1,156 @@
+import sqlite3
+
+import pytest
+
+from src.data.schema_migrations import (
+    EMISSIONS_SCHEMA_VERSION,
+    EMISSIONS_TABLE_SCHEMA,
+    migrate_emissions_database,
+    split_measurement,
+)
+
+
+class TestSchemaMigrations:
+    @pytest.fixture
+    def conn(self, tmp_path):
+        conn = sqlite3.connect(tmp_path / "emissions.db")
+        yield conn
+        conn.close()
+
+    @pytest.mark.parametrize(
+        "value, expected",
+        [
+            ("12 Liters", (12.0, "Liters")),
+            ("2.5 Cubic Meters", (2.5, "Cubic Meters")),
+            ("20°C", (20.0, "C")),
+            ("-4.5°F", (-4.5, "F")),
+            ("24.30", (24.3, None)),
+            (7, (7.0, None)),
+            (None, (None, None)),
+            ("n/a", (None, None)),
+        ],
+    )
+    def test_split_measurement(self, value, expected):
+        assert split_measurement(value) == expected
+
+    # A new database gets the typed table, its indexes and the current version
+    def test_migrate_creates_schema_on_new_database(self, conn):
+        # Act
+        version = migrate_emissions_database(conn)
+
+        # Assert
+        columns = [row[1] for row in conn.execute("PRAGMA table_info(emissions)")]
+        indexes = {row[1] for row in conn.execute("PRAGMA index_list(emissions)")}
+        assert version == EMISSIONS_SCHEMA_VERSION
+        assert conn.execute("PRAGMA user_version").fetchone()[0] == version
+        assert columns[:8] == [
+            "user_id",
+            "fuel_type",
+            "fuel_used",
+            "emissions",
+            "emissions_unit",
+            "temperature",
+            "farming_technique",
+            "timestamp",
+        ]
+        assert {"fuel_unit", "temperature_unit", "id"} <= set(columns)
+        assert {
+            "idx_emissions_user_timestamp",
+            "idx_emissions_fuel_unit_timestamp",
+        } <= indexes
+
+    # Rows written by the old log_transaction are converted to numbers and units
+    def test_migrate_converts_legacy_rows_in_place(self, conn):
+        # Arrange
+        conn.execute(
+            """CREATE TABLE emissions
+            (user_id INTEGER, fuel_type TEXT, fuel_used REAL,
+            emissions REAL, emissions_unit TEXT, temperature REAL, farming_technique TEXT,
+            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP)"""
+        )
+        conn.executemany(
+            "INSERT INTO emissions VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            [
+                (
+                    1,
+                    "gasoline",
+                    "12 Liters",
+                    "27.72",
+                    "Kilograms",
+                    "20°C",
+                    "organic",
+                    "2025-01-01 10:00:00",
+                ),
+                (2, "diesel", 3.5, 9.38, "Grams", 68.0, "conventional", "2025-01-02"),
+            ],
+        )
+        conn.commit()
+
+        # Act
+        migrate_emissions_database(conn)
+
+        # Assert
+        rows = conn.execute(
+            """SELECT id, user_id, fuel_used, fuel_unit, emissions, temperature,
+            temperature_unit, timestamp FROM emissions ORDER BY id"""
+        ).fetchall()
+        assert rows == [
+            (1, 1, 12.0, "Liters", 27.72, 20.0, "Celsius", "2025-01-01 10:00:00"),
+            (2, 2, 3.5, None, 9.38, 68.0, None, "2025-01-02"),
+        ]
+        assert conn.execute("SELECT typeof(emissions) FROM emissions").fetchone() == (
+            "real",
+        )
+
+    # Running the migration again leaves an up-to-date database untouched
+    def test_migrate_is_idempotent(self, conn):
+        # Arrange
+        migrate_emissions_database(conn)
+        conn.execute(
+            "INSERT INTO emissions (user_id, fuel_type, emissions) VALUES (1, 'diesel', 1.0)"
+        )
+        conn.commit()
+
+        # Act
+        version = migrate_emissions_database(conn)
+
+        # Assert
+        assert version == EMISSIONS_SCHEMA_VERSION
+        assert conn.execute("SELECT COUNT(*) FROM emissions").fetchone()[0] == 1
+
+    # Queries filtering by user and time use the new index
+    def test_history_filter_uses_index(self, conn):
+        # Arrange
+        migrate_emissions_database(conn)
+
+        # Act
+        plan = conn.execute(
+            """EXPLAIN QUERY PLAN SELECT * FROM emissions
+            WHERE user_id = ? AND timestamp BETWEEN datetime(?) AND datetime(?)""",
+            ("1", "2025-01-01", "2025-02-01"),
+        ).fetchall()
+
+        # Assert
+        assert any("idx_emissions_user_timestamp" in row[-1] for row in plan)
+
+    # A version 1 database gets the table sort indexes and keeps its rows
+    def test_migrate_adds_sort_indexes_to_version_1(self, conn):
+        # Arrange
+        conn.execute(EMISSIONS_TABLE_SCHEMA)
+        conn.execute(
+            "INSERT INTO emissions (user_id, fuel_type, emissions) VALUES (1, 'diesel', 1.0)"
+        )
+        conn.execute("PRAGMA user_version = 1")
+        conn.commit()
+
+        # Act
+        migrate_emissions_database(conn)
+
+        # Assert
+        plan = conn.execute(
+            """EXPLAIN QUERY PLAN SELECT * FROM emissions
+            ORDER BY emissions DESC NULLS FIRST, id DESC LIMIT 10"""
+        ).fetchall()
+        assert any("idx_emissions_emissions" in row[-1] for row in plan)
+        assert not any("TEMP B-TREE" in row[-1] for row in plan)
+        assert conn.execute("SELECT COUNT(*) FROM emissions").fetchone()[0] == 1
@@ -0,0 +1,112 @@
+import csv
+import inspect
+import json
+import sqlite3
+
+import pytest
+
+from src.data.export_manager import EXPORT_COLUMNS, ExportManager, connection_pool
+from src.data.schema_migrations import migrate_emissions_database
+
+
+class TestStreamingExport:
+    @pytest.fixture
+    def export_manager(self, tmp_path, mocker):
+        db_path = str(tmp_path / "emissions.db")
+        with sqlite3.connect(db_path) as conn:
+            migrate_emissions_database(conn)
+            conn.executemany(
+                """INSERT INTO emissions (user_id, fuel_type, fuel_used, fuel_unit,
+                emissions, emissions_unit, temperature, temperature_unit,
+                farming_technique, timestamp) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                [
+                    (
+                        index,
+                        "diesel",
+                        index + 0.5,
+                        "Liters",
+                        2.68,
+                        "Kilograms",
+                        20.0,
+                        "Celsius",
+                        "Conventional",
+                        f"2025-01-{index + 1:02d} 10:00:00",
+                    )
+                    for index in range(7)
+                ],
+            )
+        mocker.patch("src.data.export_manager.EXPORT_FETCH_SIZE", 3)
+        export_manager = ExportManager()
+        export_manager.db_path = db_path
+        yield export_manager
+        connection_pool.close_database(db_path)
+
+    # Rows are read from the cursor lazily in fetchmany-sized batches
+    def test_fetch_data_is_lazy(self, export_manager):
+        # Act
+        rows = export_manager.fetch_data()
+
+        # Assert
+        assert inspect.isgenerator(rows)
+        assert [row[0] for row in rows] == list(range(7))
+
+    def test_export_to_json_writes_array(self, export_manager, tmp_path):
+        # Arrange
+        output_file = tmp_path / "export.json"
+
+        # Act
+        export_manager.export_to_json(output_file)
+
+        # Assert
+        exported = json.loads(output_file.read_text(encoding="utf-8"))
+        assert len(exported) == 7
+        assert list(exported[0]) == list(EXPORT_COLUMNS)
+        assert exported[6]["fuel_used"] == 6.5
+
+    def test_export_to_json_writes_empty_array(self, export_manager, tmp_path):
+        # Arrange
+        with sqlite3.connect(export_manager.db_path) as conn:
+            conn.execute("DELETE FROM emissions")
+        output_file = tmp_path / "export.json"
+
+        # Act
+        export_manager.export_to_json(output_file)
+
+        # Assert
+        assert json.loads(output_file.read_text(encoding="utf-8")) == []
+
+    def test_export_to_jsonl_writes_one_object_per_line(self, export_manager, tmp_path):
+        # Arrange
+        output_file = tmp_path / "export.jsonl"
+
+        # Act
+        export_manager.export_to_jsonl(output_file)
+
+        # Assert
+        lines = output_file.read_text(encoding="utf-8").splitlines()
+        assert len(lines) == 7
+        assert json.loads(lines[3])["user_id"] == 3
+
+    # Progress is reported while writing and the export ends at 100%
+    def test_export_to_csv_reports_progress(self, export_manager, tmp_path, mocker):
+        # Arrange
+        output_file = tmp_path / "export.csv"
+        controller = mocker.Mock()
+        export_manager.set_controller(controller)
+        completed = mocker.Mock()
+        export_manager.export_completed.connect(completed)
+
+        # Act
+        export_manager.export_to_csv(output_file)
+
+        # Assert
+        with open(output_file, encoding="utf-8", newline="") as f:
+            rows = list(csv.reader(f))
+        assert rows[0] == list(EXPORT_COLUMNS)
+        assert len(rows) == 8
+        assert controller.update_progress.mock_calls == [
+            mocker.call(42, "Exporting data... 3 entries"),
+            mocker.call(85, "Exporting data... 6 entries"),
+            mocker.call(100, "Export complete"),
+        ]
+        completed.assert_called_once()
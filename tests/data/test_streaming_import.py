@@ -0,0 +1,370 @@
+import csv
+import io
+import json
+import sqlite3
+
+import pytest
+
+from src.data.import_manager import (
+    ImportManager,
+    ImportStopped,
+    connection_pool,
+    iter_json_array,
+)
+from src.data.schema_migrations import migrate_emissions_database
+
+
+def make_entries(count):
+    return [
+        {
+            "user_id": index,
+            "fuel_type": "diesel",
+            "fuel_used": f"{index}.5 Liters",
+            "emissions": "2.68",
+            "emissions_unit": "Kilograms",
+            "temperature": "20°C",
+            "farming_technique": "Conventional",
+            "timestamp": f"2025-01-{index + 1:02d} 10:00:00",
+        }
+        for index in range(count)
+    ]
+
+
+def write_csv(path, entries, encoding="utf-8"):
+    with open(path, "w", encoding=encoding, newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=list(entries[0]))
+        writer.writeheader()
+        writer.writerows(entries)
+
+
+class TestIterJsonArray:
+    # Elements split across reads are reassembled, strings may contain delimiters
+    def test_yields_elements_across_read_boundaries(self):
+        # Arrange
+        elements = [
+            {"fuel_type": "gas ⛽", "note": 'a "quoted" ], {value}'},
+            {"nested": [1, 2, {"deep": None}]},
+            12.5,
+            "text",
+        ]
+        file = io.BytesIO(("  \n" + json.dumps(elements, indent=2)).encode("utf-8"))
+
+        # Act
+        result = list(iter_json_array(file, read_size=3))
+
+        # Assert
+        assert result == elements
+
+    @pytest.mark.parametrize("content", [b"[]", b"  [ \n ] "])
+    def test_empty_array(self, content):
+        assert list(iter_json_array(io.BytesIO(content), read_size=2)) == []
+
+    @pytest.mark.parametrize(
+        "content",
+        [b'{"user_id": 1}', b'[{"user_id": 1}, {"user_id"', b'[{"user_id": 1} {}]'],
+    )
+    def test_invalid_documents_raise(self, content):
+        with pytest.raises(ValueError):
+            list(iter_json_array(io.BytesIO(content), read_size=4))
+
+
+class TestStreamingImport:
+    @pytest.fixture
+    def db_path(self, tmp_path, monkeypatch):
+        monkeypatch.setattr("src.data.import_manager.databases_folder", str(tmp_path))
+        db_path = str(tmp_path / "emissions.db")
+        with sqlite3.connect(db_path) as conn:
+            migrate_emissions_database(conn)
+        yield db_path
+        connection_pool.close_database(db_path)
+
+    @staticmethod
+    def write_json(tmp_path, entries):
+        path = tmp_path / "history.json"
+        path.write_text(json.dumps(entries), encoding="utf-8")
+        return str(path)
+
+    @staticmethod
+    def write_jsonl(tmp_path, entries):
+        path = tmp_path / "history.jsonl"
+        path.write_text("\n".join(map(json.dumps, entries)), encoding="utf-8")
+        return str(path)
+
+    def count_rows(self, db_path):
+        with sqlite3.connect(db_path) as conn:
+            return conn.execute("SELECT COUNT(*) FROM emissions").fetchone()[0]
+
+    # Rows are inserted in fixed-size transactions while the file is read
+    def test_csv_import_inserts_in_chunks(self, db_path, tmp_path, mocker):
+        # Arrange
+        csv_file = tmp_path / "history.csv"
+        write_csv(csv_file, make_entries(5))
+        import_manager = ImportManager(chunk_size=2)
+        insert_spy = mocker.spy(ImportManager, "insert_data")
+
+        # Act
+        import_manager.import_from_csv(str(csv_file))
+
+        # Assert
+        assert [len(call.args[0]) for call in insert_spy.call_args_list] == [2, 2, 1]
+        assert self.count_rows(db_path) == 5
+
+    # import_completed carries the time span of the imported rows per series
+    def test_import_completed_carries_imported_spans(self, db_path, tmp_path, mocker):
+        # Arrange
+        entries = make_entries(4)
+        for entry in entries:
+            entry["user_id"] = 7
+        entries[3]["fuel_type"] = "gasoline"
+        ImportManager().import_from_json(self.write_json(tmp_path, entries[:1]))
+        import_manager = ImportManager(chunk_size=2)
+        completed = mocker.Mock()
+        import_manager.import_completed.connect(completed)
+
+        # Act
+        import_manager.import_from_jsonl(self.write_jsonl(tmp_path, entries[1:]))
+
+        # Assert
+        completed.assert_called_once_with(
+            [
+                (7, "diesel", "Kilograms", 1735812000, 1735898400),
+                (7, "gasoline", "Kilograms", 1735984800, 1735984800),
+            ]
+        )
+
+    # Progress is reported as the file is consumed and completes at 100%
+    def test_json_import_reports_progress(self, db_path, tmp_path, mocker):
+        # Arrange
+        json_file = tmp_path / "history.json"
+        json_file.write_text(json.dumps(make_entries(20)), encoding="utf-8")
+        import_manager = ImportManager(chunk_size=5)
+        controller = mocker.Mock()
+        import_manager.set_controller(controller)
+        completed = mocker.Mock()
+        import_manager.import_completed.connect(completed)
+
+        # Act
+        import_manager.import_from_json(str(json_file))
+
+        # Assert
+        percentages = [call.args[0] for call in controller.update_progress.mock_calls]
+        assert percentages == sorted(percentages)
+        assert controller.update_progress.mock_calls[-1] == mocker.call(
+            100, "Import complete"
+        )
+        assert self.count_rows(db_path) == 20
+        completed.assert_called_once()
+
+    # An invalid row stops the import, chunks before it stay committed
+    def test_invalid_entry_stops_import_after_committed_chunks(self, db_path, tmp_path):
+        # Arrange
+        entries = make_entries(5)
+        entries[3]["fuel_used"] = ""
+        json_file = tmp_path / "history.json"
+        json_file.write_text(json.dumps(entries), encoding="utf-8")
+        import_manager = ImportManager(chunk_size=2)
+
+        # Act & Assert
+        with pytest.raises(
+            ImportStopped, match="Missing value for key: fuel_used"
+        ) as e:
+            import_manager.import_from_json(str(json_file))
+        assert (e.value.inserted, e.value.entry_number) == (2, 4)
+        assert "Entries 1 to 2 were imported" in str(e.value)
+        assert self.count_rows(db_path) == 2
+
+    # The committed entries are reported, and a fixed file is imported from next_entry
+    def test_stopped_import_reports_committed_rows_and_resumes(
+        self, db_path, tmp_path, mocker
+    ):
+        # Arrange
+        entries = make_entries(5)
+        entries[3]["fuel_used"] = ""
+        jsonl_file = self.write_jsonl(tmp_path, entries)
+        import_manager = ImportManager(chunk_size=2)
+        completed = mocker.Mock()
+        stopped = mocker.Mock()
+        import_manager.import_completed.connect(completed)
+        import_manager.import_stopped.connect(stopped)
+        with pytest.raises(ImportStopped) as e:
+            import_manager.import_from_jsonl(jsonl_file)
+        entries[3]["fuel_used"] = "3.5 Liters"
+        jsonl_file = self.write_jsonl(tmp_path, entries)
+
+        # Act
+        import_manager.import_from_jsonl(jsonl_file, start_entry=e.value.next_entry)
+
+        # Assert
+        assert e.value.next_entry == 3
+        assert [len(call.args[0]) for call in stopped.call_args_list] == [2]
+        assert [len(call.args[0]) for call in completed.call_args_list] == [3]
+        with sqlite3.connect(db_path) as conn:
+            assert conn.execute(
+                "SELECT user_id FROM emissions ORDER BY id"
+            ).fetchall() == [(index,) for index in range(5)]
+
+    # A chunk the database rejects is rolled back, resuming starts at its first entry
+    def test_failed_insert_reports_first_entry_of_chunk(
+        self, db_path, tmp_path, mocker
+    ):
+        # Arrange
+        import_manager = ImportManager(chunk_size=2)
+        mocker.patch.object(
+            ImportManager,
+            "insert_data",
+            side_effect=[None, sqlite3.OperationalError("database is locked")],
+        )
+        jsonl_file = self.write_jsonl(tmp_path, make_entries(5))
+
+        # Act
+        with pytest.raises(ImportStopped, match="database is locked") as e:
+            import_manager.import_from_jsonl(jsonl_file)
+
+        # Assert
+        assert (e.value.inserted, e.value.entry_number) == (2, 3)
+
+    # Non-UTF-8 files are still detected and imported
+    def test_csv_import_with_utf_16_encoding(self, db_path, tmp_path):
+        # Arrange
+        entries = make_entries(3)
+        entries[0]["fuel_type"] = "gasolina señal"
+        csv_file = tmp_path / "history.csv"
+        write_csv(csv_file, entries, encoding="utf-16")
+
+        # Act
+        ImportManager().import_from_csv(str(csv_file))
+
+        # Assert
+        with sqlite3.connect(db_path) as conn:
+            rows = conn.execute(
+                "SELECT fuel_type, fuel_used, fuel_unit FROM emissions ORDER BY id"
+            ).fetchall()
+        assert rows[0] == ("gasolina señal", 0.5, "Liters")
+        assert len(rows) == 3
+
+    # A Latin-1 character past the sample stops the import after the committed
+    # chunks, which resumes from next_entry with the encoding pinned
+    def test_csv_import_with_late_latin_1_character(self, db_path, tmp_path):
+        # Arrange
+        entries = make_entries(6000)
+        for entry in entries:
+            entry["temperature"] = "20"
+        entries[5500]["fuel_type"] = "gasolina señal"
+        csv_file = tmp_path / "history.csv"
+        write_csv(csv_file, entries, encoding="latin-1")
+        import_manager = ImportManager()
+        with pytest.raises(ImportStopped, match="utf-8") as e:
+            import_manager.import_from_csv(str(csv_file))
+
+        # Act
+        import_manager.import_from_csv(
+            str(csv_file), encoding="latin-1", start_entry=e.value.next_entry
+        )
+
+        # Assert
+        assert (e.value.inserted, e.value.next_entry) == (5000, 5001)
+        with sqlite3.connect(db_path) as conn:
+            assert self.count_rows(db_path) == 6000
+            assert conn.execute(
+                "SELECT fuel_type FROM emissions WHERE user_id = 5500"
+            ).fetchone() == ("gasolina señal",)
+
+
+class TestEncodingDetection:
+    @pytest.mark.parametrize(
+        "encoding, expected",
+        [("utf-8-sig", "utf-8-sig"), ("utf-16", "utf-16"), ("utf-32", "utf-32")],
+    )
+    def test_byte_order_mark_decides_encoding(self, tmp_path, encoding, expected):
+        # Arrange
+        csv_file = tmp_path / "history.csv"
+        csv_file.write_text("user_id,fuel_type\n1,gas⛽\n", encoding=encoding)
+
+        # Act
+        detected = ImportManager.detect_encoding(str(csv_file))
+
+        # Assert
+        assert detected == {"encoding": expected, "confidence": 1.0}
+
+    # Valid UTF-8 in the sample skips chardet, even if the file is much larger
+    def test_utf_8_sample_skips_chardet(self, tmp_path, mocker):
+        # Arrange
+        csv_file = tmp_path / "history.csv"
+        csv_file.write_bytes(("1,señal\n" * 100_000).encode("utf-8"))
+        detector = mocker.patch("chardet.universaldetector.UniversalDetector")
+
+        # Act
+        detected = ImportManager.detect_encoding(str(csv_file))
+
+        # Assert
+        assert detected == {"encoding": "utf-8", "confidence": 1.0}
+        detector.assert_not_called()
+
+    # Bytes past the sample are not read, a late invalid byte is left to the import
+    def test_late_invalid_byte_is_not_read(self, tmp_path, mocker):
+        # Arrange
+        csv_file = tmp_path / "history.csv"
+        csv_file.write_bytes(
+            ("1,diesel\n" * 20_000 + "2,gasolina señal düración\n" * 50).encode(
+                "latin-1"
+            )
+        )
+        detector = mocker.patch("chardet.universaldetector.UniversalDetector")
+
+        # Act
+        detected = ImportManager.detect_encoding(str(csv_file))
+
+        # Assert
+        assert detected == {"encoding": "utf-8", "confidence": 1.0}
+        detector.assert_not_called()
+
+    # Other encodings are detected by chardet from a bounded sample
+    def test_chardet_reads_at_most_the_sample_limit(self, tmp_path, mocker):
+        # Arrange
+        mocker.patch("src.data.import_manager.DETECTION_SAMPLE_LIMIT", 256 * 1024)
+        csv_file = tmp_path / "history.csv"
+        csv_file.write_bytes(
+            ("1,gasolina señal düración\n" * 100_000).encode("latin-1")
+        )
+        detector = mocker.patch("chardet.universaldetector.UniversalDetector")
+        detector.return_value.done = False
+        detector.return_value.close.return_value = {
+            "encoding": "ISO-8859-1",
+            "confidence": 0.73,
+        }
+
+        # Act
+        detected = ImportManager.detect_encoding(str(csv_file))
+
+        # Assert
+        fed = sum(len(call.args[0]) for call in detector.return_value.feed.mock_calls)
+        assert detected["encoding"] == "ISO-8859-1"
+        assert fed == 256 * 1024
+
+    # A pinned encoding is used as is, without detection
+    def test_pinned_encoding_skips_detection(self, tmp_path, mocker):
+        # Arrange
+        mocker.patch("src.data.import_manager.databases_folder", str(tmp_path))
+        db_path = str(tmp_path / "emissions.db")
+        with sqlite3.connect(db_path) as conn:
+            migrate_emissions_database(conn)
+        entries = make_entries(2)
+        entries[0]["fuel_type"] = "gasolina señal"
+        csv_file = tmp_path / "history.csv"
+        write_csv(csv_file, entries, encoding="cp1252")
+        detect = mocker.spy(ImportManager, "detect_encoding")
+
+        # Act
+        ImportManager().import_from_csv(str(csv_file), encoding="cp1252")
+
+        # Assert
+        detect.assert_not_called()
+        with sqlite3.connect(db_path) as conn:
+            assert conn.execute(
+                "SELECT fuel_type FROM emissions ORDER BY id"
+            ).fetchone() == ("gasolina señal",)
+        connection_pool.close_database(db_path)
+
+    def test_unknown_pinned_encoding_raises(self, tmp_path):
+        with pytest.raises(ValueError, match="Unknown encoding"):
+            ImportManager().import_from_csv(str(tmp_path / "x.csv"), encoding="nope")
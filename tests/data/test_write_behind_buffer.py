@@ -0,0 +1,193 @@
+import sqlite3
+import time
+
+import pytest
+from PySide6.QtCore import QCoreApplication
+
+from src.data.schema_migrations import migrate_emissions_database
+from src.data.write_behind_buffer import WriteBehindBuffer, connection_pool
+
+ROW = (1, "diesel", 10.0, "Liters", 26.8, "Kilograms", 20.0, "Celsius", "Organic")
+
+
+class TestWriteBehindBuffer:
+    @pytest.fixture(autouse=True)
+    def app(self):
+        return QCoreApplication.instance() or QCoreApplication([])
+
+    @pytest.fixture
+    def db_path(self, tmp_path):
+        db_path = str(tmp_path / "emissions.db")
+        with sqlite3.connect(db_path) as conn:
+            migrate_emissions_database(conn)
+        yield db_path
+        connection_pool.close_database(db_path)
+
+    def count_rows(self, db_path):
+        with sqlite3.connect(db_path) as conn:
+            return conn.execute("SELECT COUNT(*) FROM emissions").fetchone()[0]
+
+    # Rows wait in memory and are written together with one flushed signal
+    def test_flush_writes_buffered_rows_once(self, db_path, mocker):
+        # Arrange
+        buffer = WriteBehindBuffer(db_path)
+        flushed = mocker.Mock()
+        buffer.flushed.connect(flushed)
+
+        # Act
+        for _ in range(3):
+            buffer.append(ROW)
+        before_flush = self.count_rows(db_path)
+        written = buffer.flush()
+
+        # Assert
+        assert before_flush == 0
+        assert written == 3
+        assert self.count_rows(db_path) == 3
+        flushed.assert_called_once()
+        row_count, spans = flushed.call_args.args
+        assert row_count == 3
+        assert [span[:3] for span in spans] == [(1, "diesel", "Kilograms")]
+        assert spans[0].start <= spans[0].end
+
+    # Reaching max_rows flushes without waiting for the timer
+    def test_max_rows_flushes_immediately(self, db_path):
+        # Arrange
+        buffer = WriteBehindBuffer(db_path, flush_interval_ms=60_000, max_rows=2)
+
+        # Act
+        buffer.append(ROW)
+        buffer.append(ROW)
+
+        # Assert
+        assert self.count_rows(db_path) == 2
+        assert buffer.pending_rows == 0
+
+    # Buffered rows are written once the flush interval has passed
+    def test_timer_flushes_after_interval(self, db_path, app):
+        # Arrange
+        buffer = WriteBehindBuffer(db_path, flush_interval_ms=10)
+
+        # Act
+        buffer.append(ROW)
+        deadline = time.monotonic() + 5
+        while buffer.pending_rows and time.monotonic() < deadline:
+            app.processEvents()
+            time.sleep(0.005)
+
+        # Assert
+        assert self.count_rows(db_path) == 1
+
+    # The timestamp is taken when the row is added, not when it is written
+    def test_rows_are_timestamped_on_append(self, db_path, mocker):
+        # Arrange
+        buffer = WriteBehindBuffer(db_path)
+        mock_datetime = mocker.patch("src.data.write_behind_buffer.datetime")
+        mock_datetime.now.return_value.strftime.return_value = "2025-01-01 10:00:00"
+
+        # Act
+        buffer.append(ROW)
+        mock_datetime.now.return_value.strftime.return_value = "2025-01-01 11:00:00"
+        buffer.flush()
+
+        # Assert
+        with sqlite3.connect(db_path) as conn:
+            timestamp = conn.execute("SELECT timestamp FROM emissions").fetchone()[0]
+        assert timestamp == "2025-01-01 10:00:00"
+
+    # A failed write keeps the rows for the next flush
+    def test_failed_flush_keeps_rows(self, tmp_path):
+        # Arrange
+        db_path = str(tmp_path / "missing_table.db")
+        buffer = WriteBehindBuffer(db_path)
+        buffer.append(ROW)
+
+        # Act
+        written = buffer.flush()
+
+        # Assert
+        assert written == 0
+        assert buffer.pending_rows == 1
+        connection_pool.close_database(db_path)
+
+    # A failed write is retried by the flush timer, waiting longer after each failure
+    def test_failed_flush_is_retried_with_backoff(self, tmp_path):
+        # Arrange
+        db_path = str(tmp_path / "missing_table.db")
+        buffer = WriteBehindBuffer(db_path, flush_interval_ms=100, max_rows=1)
+        buffer.append(ROW)
+        first_delay = buffer._timer.interval()
+
+        # Act
+        buffer.append(ROW)
+        buffer.flush()
+
+        # Assert
+        assert first_delay == 200
+        assert buffer._timer.isActive()
+        assert buffer._timer.interval() == 400
+        assert buffer.pending_rows == 2
+        connection_pool.close_database(db_path)
+
+    # Rows that still fail after max_retries are dropped and reported
+    def test_failed_rows_are_dropped_after_max_retries(self, tmp_path, mocker):
+        # Arrange
+        db_path = str(tmp_path / "missing_table.db")
+        buffer = WriteBehindBuffer(db_path, max_retries=2)
+        write_failed = mocker.Mock()
+        buffer.write_failed.connect(write_failed)
+        buffer.append(ROW)
+        buffer.append(ROW)
+
+        # Act
+        retries = [buffer.flush(), buffer.flush()]
+        kept = buffer.pending_rows
+        buffer.flush()
+
+        # Assert
+        assert retries == [0, 0]
+        assert kept == 2
+        assert buffer.pending_rows == 0
+        write_failed.assert_called_once()
+        assert write_failed.call_args.args[0] == 2
+        assert "no such table" in write_failed.call_args.args[1]
+        connection_pool.close_database(db_path)
+
+    # The final flush retries in place, then drops and reports what it could not write
+    def test_flush_final_reports_dropped_rows(self, tmp_path, mocker):
+        # Arrange
+        db_path = str(tmp_path / "missing_table.db")
+        buffer = WriteBehindBuffer(db_path, flush_interval_ms=1, max_retries=2)
+        write = mocker.spy(buffer, "_write")
+        write_failed = mocker.Mock()
+        buffer.write_failed.connect(write_failed)
+        buffer.append(ROW)
+
+        # Act
+        written = buffer.flush_final()
+
+        # Assert
+        assert written == 0
+        assert write.call_count == 3
+        assert buffer.pending_rows == 0
+        write_failed.assert_called_once()
+        assert write_failed.call_args.args[0] == 1
+        connection_pool.close_database(db_path)
+
+    # Rows added after the final flush are dropped and reported instead of waiting
+    def test_append_after_flush_final_is_reported(self, db_path, mocker):
+        # Arrange
+        buffer = WriteBehindBuffer(db_path)
+        buffer.append(ROW)
+        write_failed = mocker.Mock()
+        buffer.write_failed.connect(write_failed)
+
+        # Act
+        written = buffer.flush_final()
+        buffer.append(ROW)
+
+        # Assert
+        assert written == 1
+        assert self.count_rows(db_path) == 1
+        assert buffer.pending_rows == 0
+        write_failed.assert_called_once_with(1, "The application was closing")
@@ -0,0 +1,108 @@
+import threading
+
+import pytest
+
+from src.services.lookup_cache import LookupCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestLookupCache:
+    @pytest.fixture
+    def clock(self):
+        return FakeClock()
+
+    @pytest.fixture
+    def path(self, tmp_path):
+        return str(tmp_path / "lookup_cache.json")
+
+    # A fresh result is reused, also by a cache loaded from the same file
+    def test_fresh_result_is_persisted_and_reused(self, clock, path, mocker):
+        # Arrange
+        fetch = mocker.Mock(return_value=[1.5, 2.5])
+        LookupCache(path, clock).get("location", 60, fetch)
+
+        # Act
+        cache = LookupCache(path, clock)
+        value = cache.get("location", 60, fetch)
+
+        # Assert
+        assert value == [1.5, 2.5]
+        fetch.assert_called_once()
+        assert cache.stats() == {"hits": 1, "stale_hits": 0, "misses": 0}
+
+    # An expired result is returned at once and replaced in the background
+    def test_stale_result_is_returned_while_revalidating(self, clock, path):
+        # Arrange
+        cache = LookupCache(path, clock)
+        cache.get("temperature", 60, lambda: [20.0])
+        clock.now += 61
+        revalidated = threading.Event()
+        results = []
+
+        def on_revalidated(value):
+            results.append(value)
+            revalidated.set()
+
+        # Act
+        value = cache.get("temperature", 60, lambda: [21.0], on_revalidated)
+        revalidated.wait(5)
+
+        # Assert
+        assert value == [20.0]
+        assert results == [[21.0]]
+        assert cache.get("temperature", 60, lambda: [22.0]) == [21.0]
+        assert cache.stats() == {"hits": 1, "stale_hits": 1, "misses": 1}
+
+    # A failed refresh keeps the stale result and is retried next time
+    def test_failed_revalidation_keeps_stale_result(self, clock, path, mocker):
+        # Arrange
+        cache = LookupCache(path, clock)
+        cache.get("location", 60, lambda: [1.0, 2.0])
+        clock.now += 61
+        fetch = mocker.Mock(side_effect=ConnectionError("offline"))
+
+        # Act
+        cache.get("location", 60, fetch)
+        for thread in threading.enumerate():
+            if thread.name == "revalidate location":
+                thread.join(5)
+
+        # Assert
+        assert cache.get("location", 60, lambda: None) == [1.0, 2.0]
+        fetch.assert_called_once()
+
+    # Without a stored result errors reach the caller and None is not stored
+    def test_miss_raises_and_none_is_not_stored(self, clock, path):
+        # Arrange
+        cache = LookupCache(path, clock)
+
+        def offline():
+            raise ConnectionError("offline")
+
+        # Act
+        with pytest.raises(ConnectionError):
+            cache.get("location", 60, offline)
+        value = cache.get("location", 60, lambda: None)
+
+        # Assert
+        assert value is None
+        assert cache.stats()["misses"] == 2
+
+    # An unreadable file starts an empty cache
+    def test_corrupt_file_is_ignored(self, clock, path):
+        # Arrange
+        with open(path, "w") as file:
+            file.write("{not json")
+
+        # Act
+        cache = LookupCache(path, clock)
+
+        # Assert
+        assert cache.get("location", 60, lambda: [3.0, 4.0]) == [3.0, 4.0]
@@ -0,0 +1,90 @@
+import numpy as np
+import pytest
+
+from src.services.unit_conversions_service import UnitConversionsService
+
+
+class TestUnitConversionsService:
+    # Kilograms are scaled to every emissions unit in one vectorized multiply
+    @pytest.mark.parametrize(
+        "emissions_unit, expected",
+        [
+            ("Milligrams", [1_500_000.0, 0.0, 2_000_000_000.0]),
+            ("Grams", [1500.0, 0.0, 2_000_000.0]),
+            ("Kilograms", [1.5, 0.0, 2000.0]),
+            ("Metric Tons", [0.0015, 0.0, 2.0]),
+        ],
+    )
+    def test_scale_kilograms_to_unit(self, emissions_unit, expected):
+        # Act
+        scaled = UnitConversionsService.scale_kilograms_to_unit(
+            np.array([1.5, 0.0, 2000.0]), emissions_unit
+        )
+
+        # Assert
+        np.testing.assert_allclose(scaled, expected)
+
+    # Scaling agrees with the calculator's conversion of a single result
+    @pytest.mark.parametrize("emissions_unit", UnitConversionsService.EMISSIONS_UNITS)
+    def test_scale_matches_calculation_result_conversion(self, emissions_unit):
+        assert UnitConversionsService.scale_kilograms_to_unit(
+            26.8, emissions_unit
+        ) == pytest.approx(
+            UnitConversionsService.convert_calculation_result_to_desired_unit(
+                26.8, emissions_unit
+            )
+        )
+
+    # Factors work across units of a dimension in both directions
+    @pytest.mark.parametrize(
+        "from_unit, to_unit, expected",
+        [
+            ("Grams", "Metric Tons", 1e-6),
+            ("Metric Tons", "Milligrams", 1e9),
+            ("Cubic Meters", "Liters", 1000.0),
+            ("Cubic Feet", "Cubic Meters", 0.0283168),
+            ("Kilowatt Hours", "Megajoules", 3.6),
+        ],
+    )
+    def test_conversion_factor(self, from_unit, to_unit, expected):
+        assert UnitConversionsService.conversion_factor(
+            from_unit, to_unit
+        ) == pytest.approx(expected)
+
+    # Units of different dimensions cannot be converted, unknown units raise
+    def test_conversion_checks_dimensions(self):
+        with pytest.raises(ValueError):
+            UnitConversionsService.convert(1.0, "Liters", "Kilograms")
+        with pytest.raises(ValueError):
+            UnitConversionsService.convert_volume_to_volume(1.0, "Therms")
+        with pytest.raises(KeyError):
+            UnitConversionsService.convert(1.0, "Gallons", "Liters")
+
+    # A unit pair's factor is computed once and reused
+    def test_conversion_factor_is_memoized(self):
+        # Arrange
+        UnitConversionsService.conversion_factor.cache_clear()
+
+        # Act
+        for _ in range(3):
+            UnitConversionsService.convert(np.ones(10), "Cubic Feet", "Liters")
+
+        # Assert
+        cache_info = UnitConversionsService.conversion_factor.cache_info()
+        assert (cache_info.misses, cache_info.hits) == (1, 2)
+
+    # The named conversions keep their results for scalars and arrays
+    def test_named_conversions(self):
+        assert UnitConversionsService.convert_mass_to_mass(2500.0, "Grams") == 2.5
+        np.testing.assert_allclose(
+            UnitConversionsService.convert_volume_to_volume(
+                np.array([1.0, 2.0]), "Cubic Feet"
+            ),
+            [28.3168, 56.6336],
+        )
+        assert (
+            UnitConversionsService.convert_calculation_result_to_desired_unit(
+                1.5, "Milligrams"
+            )
+            == 1_500_000.0
+        )
@@ -0,0 +1,60 @@
+import pytest
+
+from src.ui.GeneralTabWidget import GeneralTabModel
+
+
+class TestLoadRealTimeTemperatureData:
+    @pytest.fixture
+    def model(self, mocker, tmp_path):
+        mocker.patch("src.ui.GeneralTabWidget.databases_folder", str(tmp_path))
+        mocker.patch(
+            "src.ui.GeneralTabWidget.user_internet_connection_check",
+            return_value=True,
+        )
+        application_model = mocker.Mock()
+        application_model.settings_model.get_api_key.return_value = "key"
+        application_model.settings_model.get_setting.return_value = None
+        return GeneralTabModel(application_model)
+
+    # ipinfo returns coordinates as strings, they are cached as numbers
+    def test_string_coordinates_from_ipinfo(self, model, mocker):
+        # Arrange
+        location_service = mocker.patch("src.ui.GeneralTabWidget.UserLocationService")
+        location_service.return_value.get_user_location.return_value = (
+            "37.3860",
+            "-122.0838",
+        )
+        weather_service = mocker.patch("src.ui.GeneralTabWidget.WeatherService")
+        weather_service.return_value.get_weather_data.return_value = (
+            20.0,
+            68.0,
+            293.15,
+        )
+
+        # Act
+        model.load_real_time_temperature_data()
+        model.load_real_time_temperature_data()
+
+        # Assert
+        assert list(model.real_time_temp_data) == [20.0, 68.0, 293.15]
+        weather_service.return_value.get_weather_data.assert_called_once_with(
+            37.386, -122.0838
+        )
+        assert model.lookup_cache.stats() == {
+            "hits": 2,
+            "stale_hits": 0,
+            "misses": 2,
+        }
+
+    # An unknown location is not cached
+    def test_unknown_coordinates_are_rejected(self, model, mocker):
+        # Arrange
+        location_service = mocker.patch("src.ui.GeneralTabWidget.UserLocationService")
+        location_service.return_value.get_user_location.return_value = (None, None)
+
+        # Act
+        with pytest.raises(ConnectionError):
+            model.load_real_time_temperature_data()
+
+        # Assert
+        assert "location" not in model.lookup_cache._entries
@@ -0,0 +1,44 @@
+import pytest
+
+from src.data.emissions_changes import EmissionsSpan
+from src.ui.VisualizationTabWidget import VisualizationTabModel
+
+
+class TestVisualizationTabModel:
+    @pytest.fixture
+    def model(self, mocker):
+        application_model = mocker.Mock()
+        databases_model = application_model.databases_model
+        databases_model.get_emissions_time_series.return_value = [(100, 2.5)]
+        databases_model.get_emissions_time_series_by_user.return_value = []
+        return VisualizationTabModel(application_model)
+
+    # A user id typed with padding shares the cache entry of the database's int id
+    def test_typed_and_stored_user_ids_share_a_series(self, model):
+        # Arrange
+        model.get_series((" 7", "diesel"), 0, 1000)
+        fetch = model.databases_model.get_emissions_time_series
+
+        # Act
+        added = model.add_rows([EmissionsSpan(7, "diesel", "Kilograms", 200, 300)])
+
+        # Assert
+        assert (7, "diesel") in model.series_cache
+        assert fetch.call_args.kwargs["user_id"] == "7"
+        assert fetch.call_args.kwargs["time_range"] == (200, 301)
+        assert added is True
+
+    # Invalidating a fuel type drops its series of every user
+    def test_invalidate_by_fuel_type(self, model):
+        # Arrange
+        model.get_series(("7", "diesel"), 0, 1000)
+        model.get_series((None, "diesel"), 0, 1000)
+        model.get_series(("7", "gasoline"), 0, 1000)
+
+        # Act
+        model.invalidate_data_cache(fuel_type="diesel")
+
+        # Assert
+        assert (7, "diesel") not in model.series_cache
+        assert (None, "diesel") not in model.series_cache
+        assert (7, "gasoline") in model.series_cache
@@ -0,0 +1,61 @@
+import numpy as np
+import pytest
+
+from src.utils.downsampling import MIN_LEVEL_POINTS, MinMaxPyramid
+
+
+class TestMinMaxPyramid:
+    @pytest.fixture
+    def series(self):
+        x = np.arange(100_000, dtype=np.float64)
+        y = np.sin(x / 500)
+        y[12_345] = 50.0
+        y[67_890] = -50.0
+        return x, y
+
+    # Coarser levels shrink until the last one fits MIN_LEVEL_POINTS
+    def test_levels_shrink_to_min_points(self, series):
+        # Act
+        pyramid = MinMaxPyramid(*series)
+
+        # Assert
+        sizes = [len(level_x) for level_x, _ in pyramid.levels]
+        assert sizes[0] == 100_000
+        assert all(later < earlier for earlier, later in zip(sizes, sizes[1:]))
+        assert sizes[-1] <= MIN_LEVEL_POINTS < sizes[-2]
+
+    # Min-max decimation keeps spikes at every level, in time order
+    def test_levels_keep_extremes(self, series):
+        # Act
+        pyramid = MinMaxPyramid(*series)
+
+        # Assert
+        for level_x, level_y in pyramid.levels:
+            assert level_y.max() == 50.0
+            assert level_y.min() == -50.0
+            assert np.all(np.diff(level_x) >= 0)
+
+    # A wide range is served from a coarse level, a narrow one from the raw points
+    def test_select_picks_resolution_for_range(self, series):
+        # Arrange
+        pyramid = MinMaxPyramid(*series)
+
+        # Act
+        wide_x, _ = pyramid.select(0, 100_000, max_points=2000)
+        narrow_x, narrow_y = pyramid.select(1000, 1100, max_points=2000)
+
+        # Assert
+        assert len(wide_x) <= 2000
+        assert narrow_x.tolist() == list(range(999, 1102))
+        np.testing.assert_array_equal(narrow_y, series[1][999:1102])
+
+    # NaN points are dropped and unsorted input is sorted by x
+    def test_drops_nans_and_sorts(self):
+        # Act
+        pyramid = MinMaxPyramid([3.0, 1.0, np.nan, 2.0], [30.0, 10.0, 5.0, np.nan])
+
+        # Assert
+        level_x, level_y = pyramid.levels[0]
+        assert level_x.tolist() == [1.0, 3.0]
+        assert level_y.tolist() == [10.0, 30.0]
+        assert len(pyramid) == 2
@@ -0,0 +1,108 @@
+import numpy as np
+import pytest
+
+from src.utils.series_cache import SeriesCache
+
+POINTS = np.arange(0, 1000, 10, dtype=np.float64)
+
+
+def fetch_points(key, start, end):
+    times = POINTS[(POINTS >= start) & (POINTS < end)]
+    return {"time": times, "emissions": times * 2}
+
+
+class TestSeriesCache:
+    @pytest.fixture
+    def fetch(self, mocker):
+        return mocker.Mock(side_effect=fetch_points)
+
+    # Only the parts of a range that are not cached are fetched
+    def test_fetches_only_missing_edges(self, fetch):
+        # Arrange
+        cache = SeriesCache(fetch)
+        cache.get("a", 100, 200)
+        fetch.reset_mock()
+
+        # Act
+        columns = cache.get("a", 50, 250)
+
+        # Assert
+        assert [call.args for call in fetch.call_args_list] == [
+            ("a", 50, 100),
+            ("a", 200, 250),
+        ]
+        assert columns["time"].tolist() == list(range(50, 250, 10))
+        np.testing.assert_array_equal(columns["emissions"], columns["time"] * 2)
+
+    # Touching intervals merge and a covered range needs no fetch
+    def test_merges_adjacent_intervals(self, fetch):
+        # Arrange
+        cache = SeriesCache(fetch)
+        cache.get("a", 0, 100)
+        cache.get("a", 200, 300)
+        cache.get("a", 100, 200)
+        fetch.reset_mock()
+
+        # Act
+        columns = cache.get("a", 20, 280)
+
+        # Assert
+        fetch.assert_not_called()
+        assert cache.series("a").intervals == [(0, 300)]
+        assert columns["time"].tolist() == list(range(20, 280, 10))
+
+    # Least recently used series are evicted over the memory budget
+    def test_evicts_least_recently_used_over_budget(self, fetch):
+        # Arrange
+        cache = SeriesCache(fetch, max_bytes=2 * 2 * 8 * 50)
+
+        # Act
+        cache.get("a", 0, 500)
+        cache.get("b", 0, 500)
+        cache.get("a", 0, 10)
+        cache.get("c", 0, 500)
+
+        # Assert
+        assert "a" in cache and "c" in cache
+        assert "b" not in cache
+        assert cache.nbytes <= cache.max_bytes
+
+    # invalidate drops matching series only
+    def test_invalidate_matching_series(self, fetch):
+        # Arrange
+        cache = SeriesCache(fetch)
+        cache.get(("1", "diesel"), 0, 100)
+        cache.get(("2", "gasoline"), 0, 100)
+
+        # Act
+        removed = cache.invalidate(lambda key: key[1] == "diesel")
+
+        # Assert
+        assert removed == 1
+        assert ("1", "diesel") not in cache
+        assert ("2", "gasoline") in cache
+
+    # refresh refetches only the cached parts of a span and splices new points in
+    def test_refresh_splices_new_points_into_cached_parts(self, mocker):
+        # Arrange
+        points = list(range(0, 100, 10))
+
+        def fetch(key, start, end):
+            times = np.array(sorted(t for t in points if start <= t < end), float)
+            return {"time": times, "emissions": times * 2}
+
+        fetch_mock = mocker.Mock(side_effect=fetch)
+        cache = SeriesCache(fetch_mock)
+        cache.get("a", 0, 50)
+        fetch_mock.reset_mock()
+        points.extend([25, 45, 75])
+
+        # Act
+        added = cache.refresh("a", 20, 80)
+        columns = cache.get("a", 0, 50)
+
+        # Assert
+        assert added == 2
+        fetch_mock.assert_called_once_with("a", 20, 50)
+        assert columns["time"].tolist() == [0, 10, 20, 25, 30, 40, 45]
+        assert cache.refresh("b", 0, 100) == 0
@@ -0,0 +1,89 @@
+import json
+import os
+
+import pytest
+
+from src.utils.startup_tracer import StartupTracer
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 10.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestStartupTracer:
+    @pytest.fixture
+    def clock(self):
+        return FakeClock()
+
+    # Phases are timed from the tracer's creation
+    def test_phase_records_offset_and_duration(self, clock):
+        # Arrange
+        tracer = StartupTracer(clock)
+        clock.now = 10.5
+
+        # Act
+        with tracer.phase("setup_tabs"):
+            clock.now = 10.75
+
+        # Assert
+        (event,) = tracer.events
+        assert event.name == "setup_tabs"
+        assert event.start == pytest.approx(0.5)
+        assert event.duration == pytest.approx(0.25)
+
+    # Threaded phases started before finish() delay the report until they end
+    def test_finish_waits_for_threaded_phases(self, clock, tmp_path):
+        # Arrange
+        tracer = StartupTracer(clock)
+        work = tracer.traced(lambda: None, "database_initialization")
+
+        # Act
+        tracer.finish(str(tmp_path), chrome_trace=True)
+        written_before = os.listdir(tmp_path)
+        work()
+
+        # Assert
+        assert written_before == []
+        assert sorted(path.suffix for path in tmp_path.iterdir()) == [".json", ".txt"]
+        assert "database_initialization" in tracer.report()
+
+    # Nothing is recorded or wrapped once the tracer has finished
+    def test_no_events_after_finish(self, clock, tmp_path):
+        # Arrange
+        tracer = StartupTracer(clock)
+        tracer.finish(str(tmp_path), chrome_trace=False)
+
+        def work():
+            pass
+
+        # Act
+        with tracer.phase("late"):
+            pass
+        traced = tracer.traced(work)
+
+        # Assert
+        assert [event.name for event in tracer.events] == ["finish"]
+        assert traced is work
+
+    # The Chrome trace holds complete events in microseconds and instant events
+    def test_chrome_trace_format(self, clock):
+        # Arrange
+        tracer = StartupTracer(clock)
+        clock.now = 10.001
+        with tracer.phase("AppModel"):
+            clock.now = 10.003
+        tracer.mark("imports done")
+
+        # Act
+        trace = json.loads(json.dumps(tracer.chrome_trace()))
+
+        # Assert
+        complete, instant = trace["traceEvents"]
+        assert complete["ph"] == "X"
+        assert (complete["ts"], complete["dur"]) == (1000, 2000)
+        assert instant["ph"] == "i"
+        assert instant["ts"] == 3000